@@ -1,14 +1,20 @@
+from core.pagination import EstimatedCountPaginator
 from django.contrib import admin
 from unfold.admin import ModelAdmin
 
 from .models import AuditLogEntry
+from .search import search_entries
 
 
 @admin.register(AuditLogEntry)
 class AuditLogEntryAdmin(ModelAdmin):
+    # No exact COUNT(*) over the whole table on every changelist page
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("timestamp", "user", "action", "ip_address", "content_object", "details")
     list_filter = ("action", "user", "timestamp")
-    search_fields = ("user__username", "action", "ip_address", "user_agent", "details")
+    # The search box goes through the full-text index (get_search_results), which covers these
+    search_fields = ("user__username", "action", "ip_address", "details")
     date_hierarchy = "timestamp"
     readonly_fields = (
         "timestamp",
@@ -22,6 +28,11 @@ class AuditLogEntryAdmin(ModelAdmin):
         "details",
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search_entries(queryset, search_term), False
+
     def has_add_permission(self, request):
         return False
 
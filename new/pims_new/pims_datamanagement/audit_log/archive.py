@@ -0,0 +1,334 @@
+"""
+Cold archive for old audit log entries.
+
+``archive_before`` moves every whole month older than a cutoff out of the
+database into ``settings.AUDIT_LOG_ARCHIVE_DIR``: one gzip file of JSON
+lines per month (``audit-2025-09.jsonl.gz``, newest entry first), plus
+further parts (``audit-2025-09.2.jsonl.gz``) when entries for an archived
+month turn up later, e.g. from a replayed spool. ``index.json`` lists each
+archived month with its parts, entry count, first/last timestamp and the
+actions and user ids it contains, so readers open only the files that can
+match. It backs the archive_audit_log command and the maintain_audit_log
+task.
+
+Each month is archived in one transaction: the part file is written, the
+rows are deleted (on PostgreSQL the month's partition is locked, detached
+and dropped, see audit_log.partitions) and the index is updated before the
+commit. A failure can leave a month both archived and in the database, but
+never in neither.
+
+``with_archived`` is the read side: it extends an AuditLogEntry queryset
+with the archived entries of the same date range and filters, for the
+audit log list and the exports. Archived entries come back as unsaved
+AuditLogEntry instances after the database rows, newest first, streamed
+from the part files a page or an export chunk at a time (ArchivedEntries).
+"""
+
+import gzip
+import heapq
+import json
+from datetime import timedelta
+from itertools import batched, islice
+from pathlib import Path
+
+from core.utils.dates import day_bounds, day_range
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max, prefetch_related_objects
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import partitions
+from .search import build_search_text, text_matches
+from .writer import SPOOL_FIELDS
+
+INDEX_NAME = "index.json"
+
+# The spooled columns plus the id, so archived entries keep their identity
+ARCHIVE_FIELDS = ("id", *SPOOL_FIELDS)
+
+
+def archive_dir():
+    return Path(settings.AUDIT_LOG_ARCHIVE_DIR)
+
+
+def month_key(month):
+    return f"{month.year}-{month.month:02d}"
+
+
+def read_index():
+    try:
+        return json.loads((archive_dir() / INDEX_NAME).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def _write_index(index):
+    path = archive_dir() / INDEX_NAME
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(json.dumps(index, indent=1, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+def archive_cutoff(now=None, days=None):
+    """Start of the oldest month that stays in the database."""
+    days = settings.AUDIT_LOG_ARCHIVE_AFTER_DAYS if days is None else days
+    return partitions.month_start(timezone.localdate(now) - timedelta(days=days))
+
+
+def months_to_archive(cutoff):
+    """The months before ``cutoff`` that still have entries in the database, oldest first."""
+    from .models import AuditLogEntry
+
+    oldest = AuditLogEntry.objects.filter(timestamp__lt=day_range(cutoff)[0]).order_by("timestamp").first()
+    if oldest is None:
+        return []
+    month = partitions.month_start(timezone.localdate(oldest.timestamp))
+    months = []
+    while month < cutoff:
+        months.append(month)
+        month = partitions.add_months(month, 1)
+    return months
+
+
+def archive_month(month):
+    """Move the month's entries into a new archive part. Returns how many were archived."""
+    from .models import AuditLogEntry
+
+    since, until = day_bounds(month, partitions.add_months(month, 1))
+    in_month = AuditLogEntry.objects.filter(timestamp__gte=since, timestamp__lt=until)
+    with transaction.atomic():
+        partition = partitions.lock_partition(month)
+        # Entries written while this runs get higher ids and wait for the next run
+        last_id = in_month.aggregate(last=Max("pk"))["last"]
+        if last_id is None:
+            if partition:
+                partitions.drop_partition(partition)
+            return 0
+        rows = in_month.filter(pk__lte=last_id)
+
+        index = read_index()
+        entry = index.setdefault(
+            month_key(month), {"parts": [], "count": 0, "first": None, "last": None, "actions": [], "user_ids": []}
+        )
+        number = len(entry["parts"]) + 1
+        part = f"audit-{month_key(month)}.jsonl.gz" if number == 1 else f"audit-{month_key(month)}.{number}.jsonl.gz"
+        path = archive_dir() / part
+        path.parent.mkdir(parents=True, exist_ok=True)
+        count, first, last, actions, user_ids = 0, None, None, set(entry["actions"]), set(entry["user_ids"])
+        with gzip.open(path, "wt", encoding="utf-8") as archive_file:
+            for row in rows.order_by("-timestamp", "-pk").values_list(*ARCHIVE_FIELDS).iterator(chunk_size=2000):
+                record = dict(zip(ARCHIVE_FIELDS, row, strict=True))
+                # Full precision; DjangoJSONEncoder would cut timestamps to milliseconds
+                record["timestamp"] = record["timestamp"].isoformat()
+                archive_file.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+                count += 1
+                last = last or record["timestamp"]
+                first = record["timestamp"]
+                actions.add(record["action"])
+                if record["user_id"]:
+                    user_ids.add(record["user_id"])
+
+        if partition:
+            partitions.drop_partition(partition)
+        rows.delete()
+
+        entry["parts"].append(part)
+        entry["count"] += count
+        entry["first"] = min(filter(None, [entry["first"], first]), key=parse_datetime)
+        entry["last"] = max(filter(None, [entry["last"], last]), key=parse_datetime)
+        entry["actions"] = sorted(actions)
+        entry["user_ids"] = sorted(user_ids)
+        _write_index(index)
+    return count
+
+
+def archive_before(cutoff):
+    """Archive every month before ``cutoff``. Returns {month: entries archived}."""
+    return {month: archive_month(month) for month in months_to_archive(cutoff)}
+
+
+def _from_record(record):
+    from .models import AuditLogEntry
+
+    entry = AuditLogEntry(**record)
+    entry.archived = True
+    return entry
+
+
+def _read_part(part):
+    """A part's records, newest first as archive_month wrote them, one line at a time."""
+    with gzip.open(archive_dir() / part, "rt", encoding="utf-8") as archive_file:
+        for line in archive_file:
+            record = json.loads(line)
+            record["timestamp"] = parse_datetime(record["timestamp"])
+            yield record
+
+
+def _newest_first(record):
+    return record["timestamp"], record["id"]
+
+
+class ArchivedEntries:
+    """
+    The archived entries with ``since <= timestamp < until`` (either bound may
+    be None), optionally for one user, a set of actions and a search term
+    matched like AuditLogListView's ``q``. Newest first.
+
+    Nothing is read up front: iterating or slicing streams the matching
+    months' parts line by line and stops once past ``since`` or the end of
+    the slice, so a page near the top never opens the older months and no
+    month is ever held in memory whole. ``count`` takes whole months that
+    lie inside the range from the index when no other filter is given.
+    """
+
+    def __init__(self, since=None, until=None, user_id=None, actions=None, search=None):
+        self.since = since
+        self.until = until
+        self.user_id = int(user_id) if user_id else None
+        self.actions = set(actions) if actions else None
+        self.search = search or None
+        self._count = None
+
+    def _months(self):
+        """Index entries of the months that can hold a match, newest first."""
+        index = read_index()
+        for key in sorted(index, reverse=True):
+            month = index[key]
+            if self.since and parse_datetime(month["last"]) < self.since:
+                continue
+            if self.until and parse_datetime(month["first"]) >= self.until:
+                continue
+            if self.user_id and self.user_id not in month["user_ids"]:
+                continue
+            if self.actions and not self.actions.intersection(month["actions"]):
+                continue
+            yield month
+
+    def _records(self, month):
+        # Each part is newest first; late parts interleave with the earlier ones
+        records = heapq.merge(*(_read_part(part) for part in month["parts"]), key=_newest_first, reverse=True)
+        for record in records:
+            if self.since and record["timestamp"] < self.since:
+                return
+            if self._matches(record):
+                yield record
+
+    def _matches(self, record):
+        if self.until and record["timestamp"] >= self.until:
+            return False
+        if self.user_id and record["user_id"] != self.user_id:
+            return False
+        if self.actions and record["action"] not in self.actions:
+            return False
+        if self.search:
+            # Months archived before search_text existed have no username in theirs
+            text = record.get("search_text") or build_search_text(
+                record["action"], None, record["ip_address"], record["details"]
+            )
+            return text_matches(text, self.search)
+        return True
+
+    def _all_records(self):
+        for month in self._months():
+            yield from self._records(month)
+
+    def _whole_month(self, month):
+        if self.user_id or self.actions or self.search:
+            return False
+        if self.since and parse_datetime(month["first"]) < self.since:
+            return False
+        return not (self.until and parse_datetime(month["last"]) >= self.until)
+
+    def count(self):
+        if self._count is None:
+            self._count = sum(
+                month["count"] if self._whole_month(month) else sum(1 for _ in self._records(month))
+                for month in self._months()
+            )
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def exists(self):
+        return next(self._all_records(), None) is not None
+
+    def __iter__(self):
+        return map(_from_record, self._all_records())
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key : key + 1][0]
+        return [_from_record(record) for record in islice(self._all_records(), key.start, key.stop)]
+
+
+def read_archived(since=None, until=None, user_id=None, actions=None, search=None, limit=None):
+    """The first ``limit`` (default all) archived entries matching, newest first; see ArchivedEntries."""
+    return ArchivedEntries(since, until, user_id, actions, search)[:limit]
+
+
+class ArchivedResults:
+    """
+    A live AuditLogEntry queryset followed by archived entries, sliceable and
+    countable like a queryset so ListView's paginator and the exports can
+    use it as their object list.
+    """
+
+    ordered = True
+
+    # Archived entries get their related objects loaded this many at a time while iterating
+    chunk_size = 500
+
+    def __init__(self, queryset, archived, related=()):
+        self.queryset = queryset
+        self.archived = archived
+        self.related = related
+        self._live_count = None
+
+    def count(self):
+        if self._live_count is None:
+            self._live_count = self.queryset.count()
+        return self._live_count + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        yield from self.queryset
+        for chunk in batched(self.archived, self.chunk_size, strict=False):
+            yield from self._with_related(list(chunk))
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key : key + 1][0]
+        start, stop = key.start or 0, key.stop
+        if self._live_count is None:
+            self._live_count = self.queryset.count()
+        live = list(self.queryset[start:stop]) if start < self._live_count else []
+        if stop is not None and stop <= self._live_count:
+            return live
+        archived_stop = None if stop is None else stop - self._live_count
+        archived = self.archived[max(start - self._live_count, 0) : archived_stop]
+        return live + self._with_related(archived)
+
+    def _with_related(self, entries):
+        if self.related:
+            prefetch_related_objects(entries, *self.related)
+        return entries
+
+
+def with_archived(queryset, since=None, until=None, user_id=None, actions=None, search=None, related=()):
+    """
+    ``queryset`` plus the archived entries matching the same range and filters,
+    or ``queryset`` itself when no archived month overlaps the range.
+    ``related`` are the relations to load on the archived entries, as the
+    queryset's select_related would.
+    """
+    if since is None and until is None:
+        return queryset
+    archived = ArchivedEntries(since, until, user_id=user_id, actions=actions, search=search)
+    if not archived.exists():
+        return queryset
+    return ArchivedResults(queryset, archived, related)
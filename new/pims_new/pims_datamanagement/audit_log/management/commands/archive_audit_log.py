@@ -0,0 +1,40 @@
+from audit_log.archive import archive_cutoff, archive_dir, archive_month, month_key, months_to_archive
+from audit_log.partitions import ensure_partitions
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves audit log entries from whole months older than AUDIT_LOG_ARCHIVE_AFTER_DAYS into compressed "
+        "archive files under AUDIT_LOG_ARCHIVE_DIR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Archive months older than this many days instead of AUDIT_LOG_ARCHIVE_AFTER_DAYS.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the months that would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(days=options["days"])
+        months = months_to_archive(cutoff)
+        if not months:
+            self.stdout.write(self.style.SUCCESS(f"Nothing to archive before {cutoff}."))
+        elif options["dry_run"]:
+            self.stdout.write(f"Would archive {', '.join(month_key(month) for month in months)} to {archive_dir()}.")
+            return
+        total = 0
+        for month in months:
+            archived = archive_month(month)
+            total += archived
+            self.stdout.write(f"{month_key(month)}: archived {archived} entr{'y' if archived == 1 else 'ies'}.")
+        if months:
+            self.stdout.write(self.style.SUCCESS(f"Archived {total} audit log entries to {archive_dir()}."))
+        # On PostgreSQL, make sure the coming months have their partitions
+        ensure_partitions()
@@ -0,0 +1,73 @@
+import json
+
+from audit_log.models import AuditLogEntry
+from audit_log.search import build_search_text
+from audit_log.writer import SPOOL_FIELDS, spool_path, write
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+
+class Command(BaseCommand):
+    help = "Writes the audit log entries spooled to AUDIT_LOG_SPOOL_PATH while the database was unavailable."
+
+    def handle(self, *args, **options):
+        path = spool_path()
+        replaying = path.with_name(f"{path.name}.replaying")
+        # A leftover .replaying file is from an interrupted run; finish that one first
+        if not replaying.exists():
+            if not path.exists():
+                self.stdout.write(self.style.SUCCESS("The audit spool is empty."))
+                return
+            # New failures keep appending to a fresh spool file while this one is replayed
+            path.rename(replaying)
+
+        rows, unreadable = [], []
+        with replaying.open(encoding="utf-8") as spool_file:
+            for line in spool_file:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    unreadable.append(line if line.endswith("\n") else f"{line}\n")
+                    continue
+                rows.append({name: row.get(name) for name in SPOOL_FIELDS})
+        if unreadable:
+            # Kept for manual repair; the .replaying file is removed below
+            rejected = path.with_name(f"{path.name}.rejected")
+            with rejected.open("a", encoding="utf-8") as rejected_file:
+                rejected_file.write("".join(unreadable))
+
+        # References to rows deleted since are dropped, as SET_NULL would have done
+        usernames = dict(
+            get_user_model().objects.filter(pk__in={r["user_id"] for r in rows}).values_list("pk", "username")
+        )
+        content_type_ids = set(
+            ContentType.objects.filter(pk__in={r["content_type_id"] for r in rows}).values_list("pk", flat=True)
+        )
+        entries = []
+        for row in rows:
+            row["timestamp"] = parse_datetime(row["timestamp"]) if row["timestamp"] else None
+            if row["user_id"] not in usernames:
+                row["user_id"] = None
+            if row["content_type_id"] not in content_type_ids:
+                row["content_type_id"] = None
+            # Spool files written before search_text existed lack it
+            if not row["search_text"]:
+                row["search_text"] = build_search_text(
+                    row["action"], usernames.get(row["user_id"]), row["ip_address"], row["details"]
+                )
+            entries.append(AuditLogEntry(**row))
+
+        written = write(entries)
+        replaying.unlink()
+        if unreadable:
+            self.stdout.write(
+                self.style.WARNING(f"Moved {len(unreadable)} unreadable line(s) to {rejected} for manual repair.")
+            )
+        if written:
+            self.stdout.write(self.style.SUCCESS(f"Replayed {len(entries)} spooled audit log entries."))
+        else:
+            self.stdout.write(
+                self.style.ERROR(f"Could not write {len(entries)} audit log entries; they are back in the spool.")
+            )
@@ -0,0 +1,12 @@
+from .writer import audit_buffer
+
+
+class AuditBufferMiddleware:
+    """Write the audit log entries of a request in one batch once the response is ready."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit_buffer():
+            return self.get_response(request)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 07:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit_log", "0002_alter_auditlogentry_action"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="auditlogentry",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
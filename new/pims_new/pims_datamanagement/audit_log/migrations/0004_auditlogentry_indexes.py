@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-18 07:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit_log", "0003_auditlogentry_timestamp_default"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="auditlogentry",
+            name="content_type",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="contenttypes.contenttype",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="auditlogentry",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="audit_logs",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlogentry",
+            index=models.Index(fields=["action", "timestamp"], name="audit_action_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auditlogentry",
+            index=models.Index(fields=["user", "timestamp"], name="audit_user_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auditlogentry",
+            index=models.Index(fields=["content_type", "object_id", "timestamp"], name="audit_object_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auditlogentry",
+            index=models.Index(fields=["timestamp"], name="audit_time_idx"),
+        ),
+    ]
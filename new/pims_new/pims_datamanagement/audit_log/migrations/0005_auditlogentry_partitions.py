@@ -0,0 +1,95 @@
+# Generated by Django 6.0 on 2026-10-18 08:05
+
+from datetime import date, datetime, time
+
+from django.db import migrations
+from django.utils import timezone
+
+# Frozen copy of audit_log.partitions at the time of this migration
+PARTITION_MONTHS_AHEAD = 3
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_partition(cursor, qn, table, month):
+    tz = timezone.get_current_timezone()
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {qn(f'{table}_y{month.year}m{month.month:02d}')} PARTITION OF {qn(table)} "
+        "FOR VALUES FROM (%s) TO (%s)",
+        [datetime.combine(month, time.min, tz), datetime.combine(add_months(month, 1), time.min, tz)],
+    )
+
+
+def partition_audit_table(apps, schema_editor):
+    """
+    Rebuild the audit table as a monthly-partitioned table on PostgreSQL,
+    moving its rows across. Other databases are left alone.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    AuditLogEntry = apps.get_model("audit_log", "AuditLogEntry")
+    table = AuditLogEntry._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+        if cursor.fetchone() is not None:
+            return
+    old = f"{table}_unpartitioned"
+    sequence = f"{table}_id_seq"
+    qn = connection.ops.quote_name
+    user_table = AuditLogEntry._meta.get_field("user").related_model._meta.db_table
+    content_type_table = AuditLogEntry._meta.get_field("content_type").related_model._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old)}")
+        # The old id column is an identity column, which partitioned tables only
+        # support from PostgreSQL 17; a plain sequence works everywhere
+        cursor.execute(f"ALTER SEQUENCE IF EXISTS {qn(sequence)} RENAME TO {qn(f'{old}_id_seq')}")
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(old)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f"CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id")
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval(%s)", [sequence])
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, "timestamp")')
+        for column, target in (("user_id", user_table), ("content_type_id", content_type_table)):
+            cursor.execute(
+                f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f'{table}_{column}_fk')} FOREIGN KEY ({qn(column)}) "
+                f"REFERENCES {qn(target)} (id) DEFERRABLE INITIALLY DEFERRED"
+            )
+        cursor.execute(f"CREATE TABLE {qn(f'{table}_default')} PARTITION OF {qn(table)} DEFAULT")
+
+        cursor.execute(f'SELECT min("timestamp") FROM {qn(old)}')
+        oldest = cursor.fetchone()[0]
+        month = month_start(timezone.localdate(oldest) if oldest else timezone.localdate())
+        last = add_months(month_start(timezone.localdate()), PARTITION_MONTHS_AHEAD)
+        while month <= last:
+            create_partition(cursor, qn, table, month)
+            month = add_months(month, 1)
+
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old)}")
+        cursor.execute(f"SELECT setval(%s, coalesce((SELECT max(id) FROM {qn(table)}), 0) + 1, false)", [sequence])
+        cursor.execute(f"DROP TABLE {qn(old)}")
+
+    # Indexes created on the parent are created on every partition, present and future
+    for index in AuditLogEntry._meta.indexes:
+        schema_editor.add_index(AuditLogEntry, index)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit_log", "0004_auditlogentry_indexes"),
+    ]
+
+    operations = [
+        # PostgreSQL only; a partitioned table behaves like the plain one, so
+        # going back leaves it partitioned
+        migrations.RunPython(partition_audit_table, migrations.RunPython.noop),
+    ]
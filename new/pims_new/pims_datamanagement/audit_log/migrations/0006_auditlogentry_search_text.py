@@ -0,0 +1,84 @@
+# Generated by Django 6.0 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+# Frozen copy of audit_log.search at the time of this migration
+FTS_TABLE = "audit_log_search"
+
+
+def detail_values(value):
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from detail_values(item)
+    elif isinstance(value, list | tuple):
+        for item in value:
+            yield from detail_values(item)
+    elif value is not None and not isinstance(value, bool):
+        yield value
+
+
+def backfill_search_text(apps, schema_editor):
+    """Fill search_text for entries logged before it existed."""
+    AuditLogEntry = apps.get_model("audit_log", "AuditLogEntry")
+
+    batch = []
+    entries = AuditLogEntry.objects.filter(search_text="").select_related("user")
+    for entry in entries.iterator(chunk_size=2000):
+        parts = [entry.action, entry.user.username if entry.user else None, entry.ip_address]
+        parts.extend(detail_values(entry.details))
+        entry.search_text = " ".join(str(part) for part in parts if part not in (None, ""))
+        batch.append(entry)
+        if len(batch) == 2000:
+            AuditLogEntry.objects.bulk_update(batch, ["search_text"])
+            batch = []
+    AuditLogEntry.objects.bulk_update(batch, ["search_text"])
+
+
+def install_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    table = apps.get_model("audit_log", "AuditLogEntry")._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                f"USING fts5(search_text, content='{table}', content_rowid='id')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_text ON {table} BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+                f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == "postgresql":
+            table = connection.ops.quote_name(table)
+            cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                "GENERATED ALWAYS AS (to_tsvector('simple', search_text)) STORED"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS audit_search_vector_idx ON {table} USING gin (search_vector)")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit_log", "0005_auditlogentry_partitions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auditlogentry",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        # FTS5 table and triggers on SQLite, tsvector column and GIN index on
+        # PostgreSQL; neither is a model field, so they are created by hand
+        migrations.RunPython(install_search_index, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 
 
 class AuditLogEntry(models.Model):
@@ -43,24 +44,50 @@ class AuditLogEntry(models.Model):
         # Add more actions as needed
     ]
 
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the action is logged; entries are written later in batches (see audit_log.writer)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+    # The FKs get no index of their own: they lead the composite indexes in Meta
     user = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="audit_logs"
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="audit_logs",
+        db_index=False,
     )
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.CharField(max_length=255, blank=True, null=True)
 
     # Generic foreign key to the object that was affected
-    content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True)
+    content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True, db_index=False)
     object_id = models.PositiveIntegerField(null=True, blank=True)
     content_object = GenericForeignKey("content_type", "object_id")
 
     details = models.JSONField(blank=True, null=True)  # For storing extra information like old/new values
+    # Written when the action is logged and indexed for full-text search (see audit_log.search)
+    search_text = models.TextField(blank=True, default="", editable=False)
 
     class Meta:
         ordering = ["-timestamp"]
         verbose_name_plural = "Audit Log Entries"
+        # Reads filter on action, user or the affected object and then on a
+        # timestamp range (or order by timestamp), so each index ends in it
+        indexes = [
+            models.Index(fields=["action", "timestamp"], name="audit_action_time_idx"),
+            models.Index(fields=["user", "timestamp"], name="audit_user_time_idx"),
+            models.Index(fields=["content_type", "object_id", "timestamp"], name="audit_object_time_idx"),
+            models.Index(fields=["timestamp"], name="audit_time_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.search_text:
+            from .search import build_search_text
+
+            self.search_text = build_search_text(
+                self.action, self.user.username if self.user else None, self.ip_address, self.details
+            )
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.action} by {self.user or 'Anonymous'} at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
@@ -0,0 +1,149 @@
+"""
+Monthly partitions for the audit log on PostgreSQL.
+
+On PostgreSQL the audit_log_auditlogentry table is partitioned by RANGE on
+``timestamp``, one partition per calendar month (``<table>_y2026m10``) plus
+a DEFAULT partition for anything outside them. Reads that filter on a
+timestamp range only touch the months they cover, and archiving a month
+(see audit_log.archive) detaches and drops its partition instead of
+deleting row by row.
+
+A partitioned table's primary key has to include the partition key, so the
+key is (id, timestamp); ids still come from one sequence and stay unique.
+``ensure_partitions`` creates the partitions for the coming months and runs
+from the maintain_audit_log task, moving any rows for those months out of
+the DEFAULT partition first. On other databases every function here
+is a no-op and the table stays a plain table.
+"""
+
+from datetime import date
+
+from core.utils.dates import day_bounds
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+# Partitions are created this many months ahead of the current one
+PARTITION_MONTHS_AHEAD = 3
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def _table():
+    from .models import AuditLogEntry
+
+    return AuditLogEntry._meta.db_table
+
+
+def is_partitioned(connection=None, table=None):
+    connection = connection or default_connection
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table or _table()])
+        return cursor.fetchone() is not None
+
+
+def default_partition(cursor, table):
+    """The name of ``table``'s DEFAULT partition, or None."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s) AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'",
+        [table],
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _create_partition(connection, cursor, table, month):
+    """
+    Create the month's partition. Rows for the month already in the DEFAULT
+    partition (written before the month had one, or by a replayed spool)
+    would make CREATE ... PARTITION OF fail, so when there are any the
+    default is detached, the partition created, the rows moved into it and
+    the default attached again, all in one transaction.
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(table, month)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return
+    bounds = list(day_bounds(month, add_months(month, 1)))
+    create = f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)"
+    default = default_partition(cursor, table)
+    stranded = False
+    if default:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {qn(default)} WHERE "timestamp" >= %s AND "timestamp" < %s)', bounds
+        )
+        stranded = cursor.fetchone()[0]
+    if not stranded:
+        cursor.execute(create, bounds)
+        return
+
+    # Generated columns (search_vector) are recomputed, not copied
+    cursor.execute(
+        "SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attnum > 0 "
+        "AND NOT attisdropped AND attgenerated = '' ORDER BY attnum",
+        [table],
+    )
+    columns = ", ".join(qn(column) for (column,) in cursor.fetchall())
+    with transaction.atomic(using=connection.alias):
+        cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(default)}")
+        cursor.execute(create, bounds)
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(default)} WHERE "timestamp" >= %s AND "timestamp" < %s '
+            f"RETURNING {columns}) INSERT INTO {qn(table)} ({columns}) SELECT {columns} FROM moved",
+            bounds,
+        )
+        cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(default)} DEFAULT")
+
+
+def ensure_partitions(months_ahead=PARTITION_MONTHS_AHEAD, now=None, connection=None):
+    """Create the partitions from this month to ``months_ahead`` months out. Returns how many were checked."""
+    connection = connection or default_connection
+    table = _table()
+    if not is_partitioned(connection, table):
+        return 0
+    current = month_start(timezone.localdate(now))
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            _create_partition(connection, cursor, table, add_months(current, offset))
+    return months_ahead + 1
+
+
+def lock_partition(month, connection=None):
+    """
+    Lock the month's partition against writes for the rest of the transaction
+    and return its name, or None when the month has no partition of its own.
+    """
+    connection = connection or default_connection
+    table = _table()
+    if not is_partitioned(connection, table):
+        return None
+    name = partition_name(table, month)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is None:
+            return None
+        cursor.execute(f"LOCK TABLE {connection.ops.quote_name(name)} IN EXCLUSIVE MODE")
+    return name
+
+
+def drop_partition(name, connection=None):
+    connection = connection or default_connection
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(_table())} DETACH PARTITION {qn(name)}")
+        cursor.execute(f"DROP TABLE {qn(name)}")
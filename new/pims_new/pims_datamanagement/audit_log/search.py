@@ -0,0 +1,164 @@
+"""
+Full-text search over the audit log.
+
+Every entry carries ``search_text``, written when the action is logged: the
+action, the acting user's username, the IP address and every value in
+``details`` (which holds the file number and title for file and document
+actions). The database indexes that column:
+
+* SQLite: an FTS5 table ``audit_log_search`` using the audit table as its
+  external content, kept in step by triggers. Searches are ranked by bm25.
+* PostgreSQL: a generated ``search_vector`` tsvector column with a GIN
+  index. Searches are ranked by ts_rank.
+* Anything else: a plain icontains on ``search_text``.
+
+``search_entries`` turns a user's search box input into a prefix query on
+the words in it, so "FILE_CRE it/00" finds FILE_CREATED entries for file
+IT/001 as the old icontains search did, without scanning the table.
+
+SQLite drops a table's triggers when a migration rebuilds the table, so
+``install`` also runs after every migrate (see audit_log.signals) and puts
+missing pieces back, rebuilding the FTS index when it had to.
+"""
+
+import re
+from functools import cache
+
+from django.db import connection as default_connection
+from django.db import connections
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "audit_log_search"
+
+# Words in a search; underscores split words as they do in both databases' tokenizers
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def build_search_text(action, username=None, ip_address=None, details=None):
+    """The text an entry is found by."""
+    parts = [action, username, ip_address]
+    parts.extend(_detail_values(details))
+    return " ".join(str(part) for part in parts if part not in (None, ""))
+
+
+def _detail_values(value):
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _detail_values(item)
+    elif isinstance(value, list | tuple):
+        for item in value:
+            yield from _detail_values(item)
+    elif value is not None and not isinstance(value, bool):
+        yield value
+
+
+def _table():
+    from .models import AuditLogEntry
+
+    return AuditLogEntry._meta.db_table
+
+
+def install(connection=None):
+    """Create the search index for this database if it is missing. Safe to run repeatedly."""
+    connection = connection or default_connection
+    if connection.vendor == "sqlite":
+        _install_sqlite(connection)
+    elif connection.vendor == "postgresql":
+        _install_postgresql(connection)
+    search_backend.cache_clear()
+
+
+def _install_sqlite(connection):
+    table = _table()
+    triggers = {
+        f"{FTS_TABLE}_ai": (
+            f"AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+        ),
+        f"{FTS_TABLE}_ad": (
+            f"AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END"
+        ),
+        f"{FTS_TABLE}_au": (
+            f"AFTER UPDATE OF search_text ON {table} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+            f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+        ),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = %s OR tbl_name = %s", [FTS_TABLE, table])
+        existing = {row[0] for row in cursor.fetchall()}
+        if FTS_TABLE in existing and existing.issuperset(triggers):
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(search_text, content='{table}', content_rowid='id')"
+        )
+        for name, body in triggers.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _install_postgresql(connection):
+    table = connection.ops.quote_name(_table())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', search_text)) STORED"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS audit_search_vector_idx ON {table} USING gin (search_vector)")
+
+
+@cache
+def search_backend(alias="default"):
+    """Which search index the database has: "fts5", "tsvector" or None."""
+    connection = connections[alias]
+    if connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names():
+        return "fts5"
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            columns = connection.introspection.get_table_description(cursor, _table())
+        if any(column.name == "search_vector" for column in columns):
+            return "tsvector"
+    return None
+
+
+def search_entries(queryset, query):
+    """
+    Entries of ``queryset`` matching every word of ``query`` (as a prefix),
+    best match first and newest first among equals.
+    """
+    words = WORD_RE.findall(query.lower())
+    if not words:
+        return queryset
+    backend = search_backend(queryset.db)
+    if backend == "fts5":
+        match = " ".join(f'"{word}"*' for word in words)
+        table = queryset.model._meta.db_table
+        return (
+            queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]))
+            .annotate(
+                search_rank=RawSQL(
+                    f"SELECT rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id", [match]
+                )
+            )
+            .order_by("search_rank", "-timestamp")
+        )
+    if backend == "tsvector":
+        tsquery = " & ".join(f"{word}:*" for word in words)
+        vector = f"{connections[queryset.db].ops.quote_name(queryset.model._meta.db_table)}.search_vector"
+        return (
+            queryset.filter(RawSQL(f"{vector} @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField()))
+            .annotate(search_rank=RawSQL(f"ts_rank({vector}, to_tsquery('simple', %s))", [tsquery]))
+            .order_by("-search_rank", "-timestamp")
+        )
+    for word in words:
+        queryset = queryset.filter(search_text__icontains=word)
+    return queryset
+
+
+def text_matches(text, query):
+    """Whether every word of ``query`` starts a word of ``text``: search_entries in Python, for archived entries."""
+    text_words = WORD_RE.findall((text or "").lower())
+    return all(any(word.startswith(term) for word in text_words) for term in WORD_RE.findall(query.lower()))
@@ -1,6 +1,9 @@
+from audit_log import search, writer
 from audit_log.utils import log_action
+from celery.signals import task_postrun, task_prerun
 from django.contrib.auth.signals import user_logged_out
-from django.db.models.signals import post_delete, post_save
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from user_management.models import CustomUser
 
@@ -24,3 +27,20 @@ def log_user_delete(sender, instance, **kwargs):
     # Avoid passing instance as the user or obj since it's already deleted in the DB
     # when this signal runs, which would cause an IntegrityError in SQLite.
     log_action(None, "USER_DELETED", obj=None, details={"username": instance.username})
+
+
+@receiver(task_prerun)
+def begin_task_audit_buffer(**kwargs):
+    writer.begin()
+
+
+@receiver(task_postrun)
+def end_task_audit_buffer(**kwargs):
+    writer.end()
+
+
+@receiver(post_migrate)
+def install_audit_search(sender, app_config, using, **kwargs):
+    # Migrations that rebuild the audit table on SQLite drop the FTS triggers with it
+    if app_config.label == "audit_log":
+        search.install(connections[using])
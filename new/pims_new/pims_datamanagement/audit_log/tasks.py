@@ -0,0 +1,15 @@
+from celery import shared_task
+
+
+@shared_task
+def maintain_audit_log():
+    """
+    Archive audit log months older than AUDIT_LOG_ARCHIVE_AFTER_DAYS and, on
+    PostgreSQL, create the partitions for the coming months.
+    """
+    from .archive import archive_before, archive_cutoff
+    from .partitions import ensure_partitions
+
+    archived = archive_before(archive_cutoff())
+    ensure_partitions()
+    return f"Archived {sum(archived.values())} audit log entries from {len(archived)} months"
@@ -0,0 +1,244 @@
+"""
+Tests for the audit log archive (audit_log.archive) and partition helpers (audit_log.partitions).
+
+Covers:
+1. archive_audit_log moves whole months past the horizon into gzip JSON-lines files listed in index.json
+2. Entries that turn up later for an archived month go into a further part
+3. --dry-run only lists the months
+4. The audit log list and the activity export read archived months when the date range reaches them
+5. Archived entries are streamed: a page opens only the months it reaches, whole-month counts come from the index
+6. Month arithmetic; partitioning is a no-op off PostgreSQL
+7. On PostgreSQL: coming months get partitions, rows stranded in the DEFAULT partition move into a new
+   month's partition, and archiving a month drops its partition
+"""
+
+import gzip
+import json
+import tempfile
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from audit_log import archive
+from audit_log.archive import ArchivedEntries, read_archived, read_index
+from audit_log.models import AuditLogEntry
+from audit_log.partitions import (
+    add_months,
+    default_partition,
+    ensure_partitions,
+    is_partitioned,
+    month_start,
+    partition_name,
+)
+from audit_log.search import search_entries
+from audit_log.views import AuditLogListView
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from user_management.models import CustomUser
+
+
+def at(day, hour=12):
+    return datetime.combine(day, time(hour), timezone.get_current_timezone())
+
+
+class ArchiveTestMixin:
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.archive_dir = Path(archive_dir.name)
+        settings_override = override_settings(AUDIT_LOG_ARCHIVE_DIR=archive_dir.name, AUDIT_LOG_ARCHIVE_AFTER_DAYS=365)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = CustomUser.objects.create_user(username="clerk", password="Test1234!")
+        self.other = CustomUser.objects.create_user(username="other", password="Test1234!")
+        self.today = timezone.localdate()
+        self.old_month = month_start(self.today - timedelta(days=400))
+        self.older_month = add_months(self.old_month, -1)
+
+    def log(self, action, timestamp, user=None, **fields):
+        return AuditLogEntry.objects.create(action=action, timestamp=timestamp, user=user or self.user, **fields)
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command("archive_audit_log", *args, stdout=out)
+        return out.getvalue()
+
+
+class ArchiveCommandTest(ArchiveTestMixin, TestCase):
+    def test_archives_whole_old_months(self):
+        self.log("LOGIN", at(self.older_month))
+        self.log("FILE_CREATED", at(self.old_month), details={"file": "IT/001"})
+        self.log("FILE_SENT", at(self.old_month + timedelta(days=3)), user=self.other)
+        recent = self.log("LOGIN", at(self.today - timedelta(days=10)))
+
+        self.assertIn("Archived 3 audit log entries", self.archive())
+        self.assertEqual(list(AuditLogEntry.objects.values_list("pk", flat=True)), [recent.pk])
+
+        index = read_index()
+        key = f"{self.old_month:%Y-%m}"
+        self.assertEqual(sorted(index), [f"{self.older_month:%Y-%m}", key])
+        self.assertEqual(index[key]["count"], 2)
+        self.assertEqual(index[key]["actions"], ["FILE_CREATED", "FILE_SENT"])
+        self.assertEqual(index[key]["user_ids"], sorted([self.user.pk, self.other.pk]))
+        with gzip.open(self.archive_dir / index[key]["parts"][0], "rt") as archive_file:
+            records = [json.loads(line) for line in archive_file]
+        # Newest first, full timestamps
+        self.assertEqual([r["action"] for r in records], ["FILE_SENT", "FILE_CREATED"])
+        self.assertEqual(records[1]["details"], {"file": "IT/001"})
+        self.assertEqual(datetime.fromisoformat(records[1]["timestamp"]), at(self.old_month))
+
+        self.assertIn("Nothing to archive", self.archive())
+
+    def test_late_entries_get_a_new_part(self):
+        self.log("LOGIN", at(self.old_month))
+        self.archive()
+        self.log("LOGOUT", at(self.old_month, hour=18))
+        self.archive()
+        month = read_index()[f"{self.old_month:%Y-%m}"]
+        self.assertEqual(len(month["parts"]), 2)
+        self.assertEqual(month["count"], 2)
+        self.assertEqual([e.action for e in read_archived()], ["LOGOUT", "LOGIN"])
+
+    def test_dry_run(self):
+        self.log("LOGIN", at(self.old_month))
+        self.assertIn(f"Would archive {self.old_month:%Y-%m}", self.archive("--dry-run"))
+        self.assertEqual(AuditLogEntry.objects.count(), 1)
+        self.assertEqual(read_index(), {})
+
+
+class ArchivedReadTest(ArchiveTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.auditor = CustomUser.objects.create_user(username="auditor", password="Test1234!", is_superuser=True)
+        for day in range(5):
+            self.log("LOGIN", at(self.old_month + timedelta(days=day)), ip_address="10.0.0.9")
+        self.log("FILE_SENT", at(self.old_month + timedelta(days=6)), user=self.other)
+        self.archive()
+        self.recent = self.log("FILE_CREATED", at(self.today - timedelta(days=1)))
+        self.client = Client()
+        self.client.force_login(self.auditor)
+
+    def entries(self, **params):
+        response = self.client.get(reverse("audit_log:audit_log_list"), params)
+        return response, [(e.action, getattr(e, "archived", False)) for e in response.context["log_entries"]]
+
+    def test_list_reads_archive_for_date_range(self):
+        response, entries = self.entries(start_date=str(self.old_month))
+        self.assertEqual(response.context["paginator"].count, 7)
+        self.assertEqual(entries[:2], [("FILE_CREATED", False), ("FILE_SENT", True)])
+        self.assertContains(response, "Archived")
+
+        with patch.object(AuditLogListView, "paginate_by", 5):
+            _, entries = self.entries(start_date=str(self.old_month), page=2)
+        self.assertEqual(entries, [("LOGIN", True), ("LOGIN", True)])
+
+        # Filters apply to the archived entries too
+        _, entries = self.entries(start_date=str(self.old_month), user=self.other.pk)
+        self.assertEqual(entries, [("FILE_SENT", True)])
+        _, entries = self.entries(start_date=str(self.old_month), q="10.0.0.9")
+        self.assertEqual(len(entries), 5)
+        _, entries = self.entries(start_date=str(self.old_month), end_date=str(self.old_month + timedelta(days=1)))
+        self.assertEqual(entries, [("LOGIN", True), ("LOGIN", True)])
+
+    def test_list_without_range_reads_live_table(self):
+        _, entries = self.entries()
+        self.assertNotIn(True, [archived for _, archived in entries])
+
+    def test_export_includes_archived_months(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("audit_log:export_full_activity"), {"days": 500})
+        rows = response.content.decode().strip().splitlines()
+        # Header, the live entry and five archived logins
+        self.assertEqual(len(rows), 7)
+
+    def test_archive_is_streamed(self):
+        self.log("LOGOUT", at(self.older_month))
+        self.archive()
+        since = at(self.older_month, hour=0)
+
+        with patch.object(archive, "_read_part", wraps=archive._read_part) as read_part:
+            archived = ArchivedEntries(since)
+            self.assertEqual(archived.count(), 7)
+            read_part.assert_not_called()
+            self.assertEqual([e.action for e in archived[:2]], ["FILE_SENT", "LOGIN"])
+            self.assertEqual(read_part.call_count, 1)
+
+        self.assertEqual(ArchivedEntries(since, user_id=self.other.pk).count(), 1)
+        self.assertEqual([e.action for e in read_archived(since, limit=1)], ["FILE_SENT"])
+        self.assertEqual([e.action for e in ArchivedEntries(since)[6:]], ["LOGOUT"])
+
+
+class PartitionHelperTest(TestCase):
+    def test_month_arithmetic(self):
+        self.assertEqual(add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(month_start(date(2026, 10, 18)), date(2026, 10, 1))
+
+    def test_no_partitions_off_postgresql(self):
+        if connection.vendor == "postgresql":
+            self.assertTrue(is_partitioned())
+        else:
+            self.assertFalse(is_partitioned())
+            self.assertEqual(ensure_partitions(), 0)
+
+
+@skipUnless(connection.vendor == "postgresql", "audit log partitions are PostgreSQL only")
+class PostgresPartitionTest(ArchiveTestMixin, TestCase):
+    def partition_of(self, entry):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT tableoid::regclass::text FROM {AuditLogEntry._meta.db_table} WHERE id = %s", [entry.pk]
+            )
+            return cursor.fetchone()[0].strip('"')
+
+    def partition_exists(self, month):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [partition_name(AuditLogEntry._meta.db_table, month)])
+            return cursor.fetchone()[0] is not None
+
+    def test_ensure_partitions_creates_coming_months(self):
+        self.assertTrue(is_partitioned())
+        self.assertEqual(ensure_partitions(months_ahead=2), 3)
+        current = month_start(self.today)
+        for offset in range(3):
+            self.assertTrue(self.partition_exists(add_months(current, offset)))
+        # Running again is harmless
+        self.assertEqual(ensure_partitions(months_ahead=2), 3)
+
+    def test_rows_in_default_partition_move_to_new_partition(self):
+        month = add_months(month_start(self.today), 8)
+        self.assertFalse(self.partition_exists(month))
+        entry = self.log("FILE_CREATED", at(month), details={"file": "IT/042"})
+        with connection.cursor() as cursor:
+            default = default_partition(cursor, AuditLogEntry._meta.db_table)
+        self.assertEqual(self.partition_of(entry), default)
+
+        ensure_partitions(months_ahead=8)
+
+        self.assertEqual(self.partition_of(entry), partition_name(AuditLogEntry._meta.db_table, month))
+        moved = AuditLogEntry.objects.get(pk=entry.pk)
+        self.assertEqual(
+            (moved.action, moved.timestamp, moved.details), ("FILE_CREATED", at(month), {"file": "IT/042"})
+        )
+        # The generated search column is filled in on the moved row
+        self.assertEqual(list(search_entries(AuditLogEntry.objects.all(), "it/042")), [moved])
+        with connection.cursor() as cursor:
+            self.assertEqual(default_partition(cursor, AuditLogEntry._meta.db_table), default)
+
+    def test_archive_drops_the_month_partition(self):
+        ensure_partitions(months_ahead=0, now=at(self.old_month))
+        self.assertTrue(self.partition_exists(self.old_month))
+        entry = self.log("LOGIN", at(self.old_month))
+        self.assertEqual(self.partition_of(entry), partition_name(AuditLogEntry._meta.db_table, self.old_month))
+
+        self.assertIn("Archived 1 audit log entries", self.archive())
+
+        self.assertFalse(self.partition_exists(self.old_month))
+        self.assertFalse(AuditLogEntry.objects.exists())
+        self.assertEqual([e.pk for e in read_archived()], [entry.pk])
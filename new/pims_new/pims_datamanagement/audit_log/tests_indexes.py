@@ -0,0 +1,97 @@
+"""
+Tests for the audit log indexes and the range lookups that use them.
+
+Covers:
+1. Action, user and object reads over a timestamp range are planned on their composite index
+2. Today's counters use a half-open range on the timestamp index, so midnight belongs to the next day
+3. The audit log list treats its end date as inclusive
+"""
+
+from datetime import datetime, time, timedelta
+
+from audit_log.models import AuditLogEntry
+from core.utils.dates import day_range
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from document_management.stats import StatsService
+from user_management.models import CustomUser
+
+
+def explain(queryset):
+    """The query plan for ``queryset``; PostgreSQL is told to avoid seq scans, which it prefers on tiny tables."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+class AuditIndexTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="clerk", password="Test1234!")
+        self.content_type = ContentType.objects.get_for_model(CustomUser)
+        self.now = timezone.now()
+        AuditLogEntry.objects.bulk_create(
+            AuditLogEntry(
+                user=self.user if i % 2 else None,
+                action=("FILE_CREATED", "FILE_SENT", "LOGIN")[i % 3],
+                content_type=self.content_type,
+                object_id=i % 5,
+                timestamp=self.now - timedelta(hours=i),
+            )
+            for i in range(60)
+        )
+        self.since = self.now - timedelta(days=1)
+
+    def assertUsesIndex(self, queryset, index_name):  # noqa: N802
+        self.assertIn(index_name, explain(queryset))
+
+    def test_action_range(self):
+        self.assertUsesIndex(
+            AuditLogEntry.objects.filter(action="LOGIN", timestamp__gte=self.since), "audit_action_time_idx"
+        )
+        self.assertUsesIndex(
+            AuditLogEntry.objects.filter(action="ACCOUNT_LOCKED").order_by("-timestamp")[:5], "audit_action_time_idx"
+        )
+
+    def test_user_range(self):
+        self.assertUsesIndex(
+            AuditLogEntry.objects.filter(user=self.user, timestamp__gte=self.since).order_by("-timestamp"),
+            "audit_user_time_idx",
+        )
+
+    def test_object_history(self):
+        self.assertUsesIndex(
+            AuditLogEntry.objects.filter(content_type=self.content_type, object_id=3).order_by("timestamp"),
+            "audit_object_time_idx",
+        )
+
+    def test_today_range(self):
+        since, until = day_range(timezone.localdate(self.now))
+        self.assertUsesIndex(AuditLogEntry.objects.filter(timestamp__gte=since, timestamp__lt=until), "audit_time_idx")
+
+
+class AuditRangeTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="auditor", password="Test1234!", is_superuser=True)
+        self.day = timezone.localdate() - timedelta(days=3)
+        tz = timezone.get_current_timezone()
+        for moment in (time.min, time(23, 59, 59)):
+            AuditLogEntry.objects.create(action="LOGIN", timestamp=datetime.combine(self.day, moment, tz))
+        AuditLogEntry.objects.create(
+            action="LOGOUT", timestamp=datetime.combine(self.day + timedelta(days=1), time.min, tz)
+        )
+
+    def test_today_excludes_next_midnight(self):
+        now = datetime.combine(self.day, time(12), timezone.get_current_timezone())
+        self.assertEqual(StatsService(now=now).activity_today()["actions"], 2)
+
+    def test_list_end_date_is_inclusive(self):
+        client = Client()
+        client.force_login(self.user)
+        r = client.get(reverse("audit_log:audit_log_list"), {"start_date": str(self.day), "end_date": str(self.day)})
+        self.assertEqual([e.action for e in r.context["log_entries"]], ["LOGIN", "LOGIN"])
+        r = client.get(reverse("audit_log:audit_log_list"), {"end_date": "2026-02-30"})
+        self.assertEqual(r.status_code, 200)
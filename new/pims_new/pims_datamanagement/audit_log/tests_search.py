@@ -0,0 +1,98 @@
+"""
+Tests for the audit log full-text search (audit_log.search).
+
+Covers:
+1. log_action writes search_text from the action, username, IP address and detail values
+2. Search matches every word as a prefix, through the FTS5 table on SQLite, best match first
+3. The audit log list and the admin search through the index
+4. install() puts back triggers a table rebuild dropped and reindexes
+"""
+
+from audit_log import search
+from audit_log.models import AuditLogEntry
+from audit_log.search import build_search_text, search_entries, text_matches
+from audit_log.utils import log_action
+from audit_log.writer import audit_buffer
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from user_management.models import CustomUser
+
+
+class SearchTextTest(TestCase):
+    def test_log_action_writes_search_text(self):
+        user = CustomUser.objects.create_user(username="clerk", password="Test1234!")
+        with audit_buffer():
+            log_action(user, "FILE_SENT", details={"file": "IT/001", "file_title": "Budget 2026", "urgent": True})
+        entry = AuditLogEntry.objects.get(action="FILE_SENT")
+        self.assertEqual(entry.search_text, "FILE_SENT clerk IT/001 Budget 2026")
+
+    def test_nested_details(self):
+        text = build_search_text("CHAIN_CREATED", None, "10.0.0.9", {"steps": [{"approver": "mensah"}], "n": 2})
+        self.assertEqual(text, "CHAIN_CREATED 10.0.0.9 mensah 2")
+
+    def test_text_matches(self):
+        self.assertTrue(text_matches("FILE_CREATED clerk IT/001", "file_cre it/00"))
+        self.assertFalse(text_matches("FILE_CREATED clerk IT/001", "it/002"))
+
+
+class SearchEntriesTest(TestCase):
+    def setUp(self):
+        self.clerk = CustomUser.objects.create_user(username="clerk", password="Test1234!")
+        self.mensah = CustomUser.objects.create_user(username="mensah", password="Test1234!")
+        self.created = AuditLogEntry.objects.create(
+            action="FILE_CREATED", user=self.clerk, details={"file": "IT/001", "file_title": "Budget draft, budget"}
+        )
+        self.sent = AuditLogEntry.objects.create(
+            action="FILE_SENT", user=self.mensah, details={"file": "HR/014", "file_title": "Budget review"}
+        )
+        self.login = AuditLogEntry.objects.create(action="LOGIN", user=self.clerk, ip_address="10.0.0.9")
+
+    def found(self, query):
+        return list(search_entries(AuditLogEntry.objects.all(), query))
+
+    def test_backend(self):
+        expected = {"sqlite": "fts5", "postgresql": "tsvector"}.get(connection.vendor)
+        self.assertEqual(search.search_backend(), expected)
+
+    def test_matches_words_as_prefixes(self):
+        self.assertEqual(self.found("mens"), [self.sent])
+        self.assertEqual(self.found("IT/001"), [self.created])
+        self.assertEqual(self.found("file_cre"), [self.created])
+        self.assertEqual(self.found("10.0.0.9"), [self.login])
+        self.assertEqual(self.found("clerk budget"), [self.created])
+        self.assertEqual(self.found("nobody"), [])
+        self.assertEqual(self.found(" -/ "), list(AuditLogEntry.objects.all()))
+
+    def test_best_match_first(self):
+        # Two mentions of "budget" outrank one in a newer entry
+        self.assertEqual(self.found("budget"), [self.created, self.sent])
+
+    def test_uses_fts_table(self):
+        if search.search_backend() != "fts5":
+            self.skipTest("SQLite FTS5 only")
+        self.assertIn("VIRTUAL TABLE INDEX", search_entries(AuditLogEntry.objects.all(), "budget").explain())
+
+    def test_install_restores_dropped_triggers(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {search.FTS_TABLE}_ai")
+        missed = AuditLogEntry.objects.create(action="LOGOUT", user=self.mensah)
+        self.assertEqual(self.found("logout"), [])
+        search.install(connection)
+        self.assertEqual(self.found("logout"), [missed])
+        later = AuditLogEntry.objects.create(action="LOGOUT", user=self.clerk)
+        self.assertEqual(self.found("logout clerk"), [later])
+
+    def test_list_and_admin_search(self):
+        auditor = CustomUser.objects.create_user(
+            username="auditor", password="Test1234!", is_superuser=True, is_staff=True
+        )
+        client = Client()
+        client.force_login(auditor)
+        response = client.get(reverse("audit_log:audit_log_list"), {"q": "budget"})
+        self.assertEqual(list(response.context["log_entries"]), [self.created, self.sent])
+
+        response = client.get(reverse("admin:audit_log_auditlogentry_changelist"), {"q": "hr/014"})
+        self.assertEqual(list(response.context["cl"].result_list), [self.sent])
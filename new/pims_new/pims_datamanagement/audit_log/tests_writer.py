@@ -0,0 +1,155 @@
+"""
+Tests for the buffered audit log writer (audit_log.writer).
+
+Covers:
+1. A request or audit_buffer block writes all of its entries with one INSERT when it ends
+2. Entries logged inside a rolled-back savepoint are dropped
+3. Outside a unit of work, entries are written when their transaction commits
+4. Entries keep the time they were logged, not the time they were written
+5. A failed write spools the entries to disk and replay_audit_spool loads them
+6. A failing entries_written receiver rolls the batch back into the spool without raising
+7. Unreadable spool lines are kept in a .rejected file
+"""
+
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from audit_log.middleware import AuditBufferMiddleware
+from audit_log.models import AuditLogEntry
+from audit_log.utils import log_action
+from audit_log.writer import audit_buffer, entries_written
+from core.testing import make_user
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+def audit_inserts(queries):
+    return [q for q in queries if q["sql"].startswith('INSERT INTO "audit_log_auditlogentry"')]
+
+
+class AuditWriterTest(TestCase):
+    def setUp(self):
+        self.user = make_user("clerk")
+
+    def test_buffer_writes_one_insert(self):
+        with CaptureQueriesContext(connection) as ctx, audit_buffer():
+            for action in ("FILE_CREATED", "FILE_ACTIVATED", "FILE_CLOSED"):
+                log_action(self.user, action)
+            self.assertFalse(AuditLogEntry.objects.exists())
+        self.assertEqual(len(audit_inserts(ctx.captured_queries)), 1)
+        self.assertEqual(AuditLogEntry.objects.count(), 3)
+
+    def test_request_writes_one_insert(self):
+        def view(request):
+            log_action(self.user, "FILE_CREATED", request=request)
+            log_action(self.user, "FILE_ACTIVATED", request=request)
+            return HttpResponse()
+
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.5")
+        with CaptureQueriesContext(connection) as ctx:
+            AuditBufferMiddleware(view)(request)
+        self.assertEqual(len(audit_inserts(ctx.captured_queries)), 1)
+        self.assertEqual(list(AuditLogEntry.objects.values_list("ip_address", flat=True)), ["10.0.0.5"] * 2)
+
+    def test_rolled_back_entries_are_dropped(self):
+        with audit_buffer():
+            log_action(self.user, "FILE_CREATED")
+            try:
+                with transaction.atomic():
+                    log_action(self.user, "FILE_ACTIVATED")
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            log_action(self.user, "FILE_CLOSED")
+        self.assertEqual(
+            sorted(AuditLogEntry.objects.values_list("action", flat=True)), ["FILE_CLOSED", "FILE_CREATED"]
+        )
+
+    def test_written_on_commit_outside_a_buffer(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+            log_action(self.user, "FILE_CREATED")
+            log_action(self.user, "FILE_ACTIVATED")
+            self.assertFalse(AuditLogEntry.objects.exists())
+        # Both entries share one callback
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(AuditLogEntry.objects.count(), 2)
+
+    def test_timestamp_is_log_time(self):
+        with audit_buffer():
+            log_action(self.user, "FILE_CREATED")
+            logged_by = timezone.now()
+        self.assertLessEqual(AuditLogEntry.objects.get().timestamp, logged_by)
+
+
+class AuditSpoolTest(TestCase):
+    def setUp(self):
+        self.user = make_user("clerk")
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.spool = Path(spool_dir.name) / "audit_spool.jsonl"
+        settings_override = override_settings(AUDIT_LOG_SPOOL_PATH=str(self.spool))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_failed_write_is_spooled_and_replayed(self):
+        gone = make_user("gone")
+        failing_insert = patch.object(AuditLogEntry.objects, "bulk_create", side_effect=DatabaseError)
+        with self.assertLogs("audit_log.writer", "ERROR"), failing_insert, audit_buffer():
+            log_action(self.user, "FILE_CREATED", details={"file": "IT/001"})
+            log_action(gone, "FILE_ACTIVATED")
+            logged_by = timezone.now()
+        self.assertFalse(AuditLogEntry.objects.exists())
+        self.assertEqual(len(self.spool.read_text().splitlines()), 2)
+
+        gone.delete()
+        out = StringIO()
+        call_command("replay_audit_spool", stdout=out)
+        self.assertIn("Replayed 2 ", out.getvalue())
+        self.assertFalse(self.spool.exists())
+        created = AuditLogEntry.objects.get(action="FILE_CREATED")
+        self.assertEqual((created.user, created.details), (self.user, {"file": "IT/001"}))
+        self.assertLessEqual(created.timestamp, logged_by)
+        # The deleted user's entry is kept without its user
+        self.assertIsNone(AuditLogEntry.objects.get(action="FILE_ACTIVATED").user)
+
+    def test_failing_receiver_spools_the_batch(self):
+        def broken_receiver(sender, entries, **kwargs):
+            raise RuntimeError("rollup unavailable")
+
+        entries_written.connect(broken_receiver)
+        self.addCleanup(entries_written.disconnect, broken_receiver)
+
+        def view(request):
+            log_action(self.user, "FILE_CREATED", request=request)
+            return HttpResponse()
+
+        with self.assertLogs("audit_log.writer", "ERROR"):
+            response = AuditBufferMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AuditLogEntry.objects.exists())
+        self.assertEqual(len(self.spool.read_text().splitlines()), 1)
+
+    def test_unreadable_lines_are_kept(self):
+        failing_insert = patch.object(AuditLogEntry.objects, "bulk_create", side_effect=DatabaseError)
+        with self.assertLogs("audit_log.writer", "ERROR"), failing_insert, audit_buffer():
+            log_action(self.user, "FILE_CREATED")
+        with self.spool.open("a", encoding="utf-8") as spool_file:
+            spool_file.write('{"action": "FILE_CLO\n')
+
+        out = StringIO()
+        call_command("replay_audit_spool", stdout=out)
+        self.assertIn("Moved 1 unreadable line(s)", out.getvalue())
+        self.assertEqual(AuditLogEntry.objects.get().action, "FILE_CREATED")
+        rejected = self.spool.with_name(f"{self.spool.name}.rejected")
+        self.assertEqual(rejected.read_text(), '{"action": "FILE_CLO\n')
+
+    def test_replay_with_empty_spool(self):
+        out = StringIO()
+        call_command("replay_audit_spool", stdout=out)
+        self.assertIn("empty", out.getvalue())
@@ -1,10 +1,13 @@
+from . import writer
 from .models import AuditLogEntry
+from .search import build_search_text
 
 
 def log_action(user, action, request=None, obj=None, details=None):
     """
     Helper function to create an AuditLogEntry.
     Automatically captures file and document details if obj is provided.
+    The entry is written by audit_log.writer with the rest of the request or task.
     """
     ip_address = None
     user_agent = None
@@ -38,12 +41,18 @@ def log_action(user, action, request=None, obj=None, details=None):
                 details.setdefault("file_title", getattr(obj.file, "title", ""))
             details.setdefault("document_title", getattr(obj, "title", ""))
 
-    AuditLogEntry.objects.create(
-        user=user if user and user.is_authenticated else None,
-        action=action,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        content_type=content_type,
-        object_id=object_id,
-        details=details,
+    if not (user and user.is_authenticated):
+        user = None
+
+    writer.add(
+        AuditLogEntry(
+            user=user,
+            action=action,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            content_type=content_type,
+            object_id=object_id,
+            details=details,
+            search_text=build_search_text(action, user.username if user else None, ip_address, details),
+        )
     )
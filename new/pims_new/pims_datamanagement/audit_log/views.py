@@ -1,18 +1,34 @@
 import contextlib
 from datetime import timedelta
 
+from core.pagination import KeysetPaginationMixin
+from core.utils.dates import day_range
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Count, Q
+from django.db.models import Count
 from django.http import HttpResponse
 from django.shortcuts import render
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.views.generic import ListView, View
 from user_management.models import CustomUser
 
+from .archive import with_archived
 from .models import AuditLogEntry
+from .search import search_entries
 
+# What the list and export templates read from an entry, loaded for archived entries in bulk
+ARCHIVED_ENTRY_RELATED = ("user__staff__department", "user__staff__designation", "content_type")
 
-class AuditLogListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+
+def _parse_day(value):
+    """A date from a YYYY-MM-DD query parameter, or None when it is missing or invalid."""
+    try:
+        return parse_date(value or "")
+    except ValueError:
+        return None
+
+
+class AuditLogListView(LoginRequiredMixin, UserPassesTestMixin, KeysetPaginationMixin, ListView):
     model = AuditLogEntry
     template_name = "audit_log/audit_log_list.html"
     context_object_name = "log_entries"
@@ -24,6 +40,10 @@ class AuditLogListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
             return True
         return user.groups.filter(name__iexact="Executives").exists()
 
+    def use_keyset(self, queryset):
+        # Search results are ranked and archived months aren't in the table: those get page numbers
+        return super().use_keyset(queryset) and not self.request.GET.get("q")
+
     def get_queryset(self):
         queryset = super().get_queryset().select_related("user", "user__staff__department", "user__staff__designation")
 
@@ -38,19 +58,28 @@ class AuditLogListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
             queryset = queryset.filter(user_id=user_id)
         if action:
             queryset = queryset.filter(action=action)
-        if start_date:
-            queryset = queryset.filter(timestamp__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(timestamp__lte=end_date)
+        # Dates are inclusive local days, filtered as half-open timestamp ranges
+        start_date = _parse_day(start_date)
+        end_date = _parse_day(end_date)
+        since = day_range(start_date)[0] if start_date else None
+        until = day_range(end_date)[1] if end_date else None
+        if since:
+            queryset = queryset.filter(timestamp__gte=since)
+        if until:
+            queryset = queryset.filter(timestamp__lt=until)
         if search_query:
-            queryset = queryset.filter(
-                Q(details__icontains=search_query)
-                | Q(action__icontains=search_query)
-                | Q(user__username__icontains=search_query)
-                | Q(ip_address__icontains=search_query)
-                | Q(user_agent__icontains=search_query)
-            )
-        return queryset
+            # Best match first; see audit_log.search
+            queryset = search_entries(queryset, search_query)
+        # A date range reaching into archived months lists their entries too
+        return with_archived(
+            queryset,
+            since,
+            until,
+            user_id=user_id,
+            actions={action} if action else None,
+            search=search_query,
+            related=ARCHIVED_ENTRY_RELATED,
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -202,6 +231,14 @@ class AccessDeniedExportView(LoginRequiredMixin, View):
 
         if not is_registry:
             entries = entries.filter(user=target_user)
+        entries = with_archived(
+            entries,
+            since,
+            None,
+            user_id=None if is_registry else target_user.pk,
+            actions={"ACCESS_REQUEST_REJECTED"},
+            related=ARCHIVED_ENTRY_RELATED,
+        )
 
         fmt = request.GET.get("format", "csv")
 
@@ -297,6 +334,14 @@ class FullActivityExportView(LoginRequiredMixin, View):
         # If not registry, or if a specific user was requested, filter by user
         if not is_registry or user_id:
             qs = qs.filter(user=target_user)
+        qs = with_archived(
+            qs,
+            since,
+            None,
+            user_id=target_user.pk if not is_registry or user_id else None,
+            actions=self.SECTION_MAP.get(section),
+            related=ARCHIVED_ENTRY_RELATED,
+        )
 
         fmt = request.GET.get("format", "csv")
 
@@ -0,0 +1,198 @@
+"""
+Buffered audit log writer.
+
+``log_action`` used to INSERT its entry on the spot, so a request that moved
+a file through several states (plus the signals firing alongside) paid for
+one INSERT per entry. Entries now go to the writer, which collects them for
+the current unit of work and writes them with one ``bulk_create`` when it
+ends. A unit of work is a request (AuditBufferMiddleware), a Celery task
+(task_prerun/task_postrun, see audit_log.signals) or an explicit
+``with audit_buffer():`` block.
+
+Entries logged inside a transaction are only due once it commits: they are
+registered with ``transaction.on_commit``, so a rollback drops them just as
+it used to drop the INSERT. If the unit of work ends while that transaction
+is still open (a command running inside ``atomic()``, a test case), they
+are written into it. Outside any unit of work, entries are written when
+their transaction commits, or straight away in autocommit mode.
+
+bulk_create does not send post_save, so each written batch is announced
+with the ``entries_written`` signal instead. Its receivers run in the same
+transaction as the INSERT, so what they maintain (the activity rollups)
+stays in step with the entries that were actually written.
+
+When the write or one of those receivers fails, the entries are appended as
+JSON lines to ``settings.AUDIT_LOG_SPOOL_PATH`` and the replay_audit_spool
+command loads them later. The failure is logged rather than raised, so it
+never turns the request or task that logged the entries into an error.
+"""
+
+import json
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Sent with ``entries`` (a list of saved AuditLogEntry) after every batch is written
+entries_written = Signal()
+
+# The AuditLogEntry columns kept in the spool file
+SPOOL_FIELDS = (
+    "timestamp",
+    "user_id",
+    "action",
+    "ip_address",
+    "user_agent",
+    "content_type_id",
+    "object_id",
+    "details",
+    "search_text",
+)
+
+_state = Local()
+
+
+class _Scope:
+    def __init__(self):
+        self.depth = 0
+        self.ready = []
+        self.batches = []
+
+
+class _Batch:
+    """Entries logged inside one transaction, made due by its on_commit callback."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.entries = []
+        self.written = False
+
+    def __call__(self):
+        if self.written:
+            return
+        self.written = True
+        if self.scope is not None and self.scope.depth:
+            self.scope.ready.extend(self.entries)
+        else:
+            write(self.entries)
+
+
+def _current_scope():
+    return getattr(_state, "scope", None)
+
+
+def _is_registered(connection, batch, savepoint_ids=None):
+    """Whether the batch's on_commit callback is still waiting (optionally under exactly these savepoints)."""
+    return any(
+        func is batch and (savepoint_ids is None or sids == savepoint_ids) for sids, func, _ in connection.run_on_commit
+    )
+
+
+def add(entry):
+    """Queue an unsaved AuditLogEntry to be written with the rest of the current unit of work."""
+    scope = _current_scope()
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        if scope is not None:
+            scope.ready.append(entry)
+        else:
+            write([entry])
+        return
+
+    batch = getattr(_state, "batch", None)
+    if (
+        batch is None
+        or batch.scope is not scope
+        or not _is_registered(connection, batch, set(connection.savepoint_ids))
+    ):
+        batch = _Batch(scope)
+        _state.batch = batch
+        transaction.on_commit(batch)
+        if scope is not None:
+            scope.batches.append(batch)
+    batch.entries.append(entry)
+
+
+def begin():
+    """Start (or join) a unit of work on this thread."""
+    scope = _current_scope()
+    if scope is None:
+        scope = _state.scope = _Scope()
+    scope.depth += 1
+
+
+def end():
+    """End the unit of work started by the matching ``begin`` and write what it collected."""
+    scope = _current_scope()
+    if scope is None:
+        return
+    scope.depth -= 1
+    if scope.depth:
+        return
+    _state.scope = None
+    _state.batch = None
+
+    connection = transaction.get_connection()
+    entries = scope.ready
+    for batch in scope.batches:
+        if not batch.written and _is_registered(connection, batch):
+            # The scope ends inside the batch's transaction: write into it
+            batch.written = True
+            entries.extend(batch.entries)
+    write(entries)
+
+
+@contextmanager
+def audit_buffer():
+    """Collect the entries logged inside the block and write them in one go when it ends."""
+    begin()
+    try:
+        yield
+    finally:
+        end()
+
+
+def write(entries):
+    """
+    Insert ``entries`` with one bulk_create and send ``entries_written``. If
+    either fails, they are spooled to disk instead and False is returned.
+    """
+    from .models import AuditLogEntry
+
+    if not entries:
+        return True
+    try:
+        with transaction.atomic():
+            AuditLogEntry.objects.bulk_create(entries)
+            entries_written.send(sender=AuditLogEntry, entries=entries)
+    except Exception:
+        logger.exception("Could not write %d audit log entries; spooling them", len(entries))
+        spool(entries)
+        return False
+    return True
+
+
+def spool_path():
+    return Path(settings.AUDIT_LOG_SPOOL_PATH)
+
+
+def spool(entries):
+    """Append ``entries`` to the spool file, one JSON object per line."""
+    lines = [
+        json.dumps({name: getattr(entry, name) for name in SPOOL_FIELDS}, cls=DjangoJSONEncoder) for entry in entries
+    ]
+    try:
+        path = spool_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as spool_file:
+            spool_file.write("".join(f"{line}\n" for line in lines))
+    except OSError:
+        # Last resort: keep the entries in the error log
+        logger.exception("Could not spool audit log entries: %s", lines)
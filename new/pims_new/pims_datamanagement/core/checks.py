@@ -0,0 +1,34 @@
+"""
+System checks for deployment settings the apps rely on.
+"""
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends that keep entries in one process only
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warn when the default cache is not shared between processes outside DEBUG.
+
+    Access grants, role sets, the org snapshot version, badge counts and the
+    registry desk all live in the default cache and are invalidated there.
+    With a per-process backend, each gunicorn worker and Celery process keeps
+    its own copy, and an invalidation only reaches the process that made it.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            "The default cache is local to each process, so cache invalidations are not seen by other workers.",
+            hint="Set CACHE_URL (e.g. redis://localhost:6379/1) to a cache shared by every web and Celery process.",
+            id="core.W001",
+        )
+    ]
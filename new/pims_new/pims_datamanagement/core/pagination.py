@@ -0,0 +1,264 @@
+"""
+Keyset pagination and estimated counts for long, newest-first lists.
+
+Django's Paginator pages with OFFSET and shows an exact COUNT(*). On the
+audit log, notifications and the inbox/outbox both get slower as the table
+grows and the deeper the user pages, since the database has to count every
+matching row and walk past every skipped one.
+
+KeysetPaginator pages on the list's ordering instead, a timestamp followed
+by the id as a tie-breaker: the next page is "the rows after the last one
+shown", which the (..., timestamp) index answers directly at any depth. The
+position travels in the query string as an opaque cursor, ``?after=`` for
+the next page and ``?before=`` for the previous one. There are no page
+numbers, and the total is an estimate (see ``estimated_count``).
+
+KeysetPaginationMixin plugs it into a ListView. Its context includes
+``pagination_query`` (the current query string without the cursor), and
+``partials/keyset_pagination.html`` renders the Previous/Next links, as
+HTMX requests when given a ``pagination_target``.
+"""
+
+import base64
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+# Lists are counted exactly up to this many rows; past it the count is estimated
+COUNT_LIMIT = 10_000
+
+
+def estimated_count(queryset, limit=COUNT_LIMIT):
+    """
+    ``(count, exact)`` for ``queryset`` without counting past ``limit`` rows.
+    Beyond it PostgreSQL returns the planner's row estimate; other databases
+    return ``limit`` itself, to be read as "more than".
+    """
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor == "postgresql":
+        plan = json.loads(queryset.explain(format="json"))
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= limit:
+            return estimate, False
+    count = queryset[: limit + 1].count()
+    if count > limit:
+        return limit, False
+    return count, True
+
+
+def count_label(count, exact, limit=COUNT_LIMIT):
+    """How to show a count from ``estimated_count``: "1,234", "10,000+" or "about 1,234,000"."""
+    if exact:
+        return f"{count:,}"
+    if count == limit:
+        return f"{count:,}+"
+    return f"about {count:,}"
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A Paginator whose total comes from ``estimated_count``, for admin changelists.
+
+    Up to ``count_limit`` rows the count is exact and the changelist pages as
+    usual. Past it the count is only a bound or an estimate, so page numbers
+    are not checked against ``num_pages`` and the changelist shows unfold's
+    Previous/Next links instead of numbered pages.
+    """
+
+    count_limit = COUNT_LIMIT
+
+    @cached_property
+    def _count(self):
+        return estimated_count(self.object_list, limit=self.count_limit)
+
+    @property
+    def count(self):
+        return self._count[0]
+
+    @property
+    def count_is_exact(self):
+        return self._count[1]
+
+    @property
+    def template_name(self):
+        return None if self.count_is_exact else "unfold/helpers/pagination_infinite.html"
+
+    def validate_number(self, number):
+        if self.count_is_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"]) from None
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        if self.count_is_exact:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = self.object_list[bottom : bottom + self.per_page]
+        if number > 1 and not object_list:
+            raise EmptyPage(self.error_messages["no_results"])
+        return self._get_page(object_list, number, self)
+
+
+def _encode(values):
+    # isoformat keeps microseconds, which DjangoJSONEncoder would cut to milliseconds
+    values = [value.isoformat() if hasattr(value, "isoformat") else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def _decode(cursor, fields):
+    """The key values in ``cursor``, or None when it is not a cursor for these fields."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        return [field.to_python(value) for field, value in zip(fields, values, strict=True)]
+    except (ValueError, ValidationError):
+        return None
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator; iterates like a Page, with cursors instead of numbers."""
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self)} rows>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Pages ``queryset`` by its ``ordering`` (model field names, "-" for
+    descending), which must end in a unique field such as "-pk" so every row
+    has its own position.
+    """
+
+    keyset = True
+
+    def __init__(self, queryset, per_page, ordering=("-timestamp", "-pk")):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        opts = queryset.model._meta
+        self.keys = [
+            (name.lstrip("-"), opts.pk if name.lstrip("-") == "pk" else opts.get_field(name.lstrip("-")))
+            for name in self.ordering
+        ]
+
+    @cached_property
+    def _count(self):
+        return estimated_count(self.queryset)
+
+    @property
+    def count(self):
+        return self._count[0]
+
+    @property
+    def count_is_exact(self):
+        return self._count[1]
+
+    @property
+    def count_label(self):
+        return count_label(*self._count)
+
+    def _cursor(self, row):
+        return _encode([getattr(row, field.attname) for _, field in self.keys])
+
+    def _beyond(self, values, backwards=False):
+        """Rows after the position ``values`` in the list's order (before it when ``backwards``)."""
+        # (a, b) after (x, y) in descending order: a < x, or a = x and b < y
+        conditions, equal = [], Q()
+        for (name, _), order, value in zip(self.keys, self.ordering, values, strict=True):
+            lookup = "lt" if order.startswith("-") != backwards else "gt"
+            conditions.append(equal & Q(**{f"{name}__{lookup}": value}))
+            equal &= Q(**{name: value})
+        return reduce(operator.or_, conditions)
+
+    def page(self, after=None, before=None):
+        """The first page, the page after cursor ``after`` or the page before cursor ``before``."""
+        fields = [field for _, field in self.keys]
+        after = _decode(after, fields) if after else None
+        before = _decode(before, fields) if before else None
+        if before is not None:
+            reverse = [order[1:] if order.startswith("-") else f"-{order}" for order in self.ordering]
+            rows = list(
+                self.queryset.filter(self._beyond(before, backwards=True)).order_by(*reverse)[: self.per_page + 1]
+            )
+            if len(rows) > self.per_page:
+                rows = rows[: self.per_page][::-1]
+                return KeysetPage(rows, self, next_cursor=self._cursor(rows[-1]), previous_cursor=self._cursor(rows[0]))
+            # Back at the start, which may have gained rows since; show a full first page
+            after = None
+
+        queryset = self.queryset.filter(self._beyond(after)) if after is not None else self.queryset
+        rows = list(queryset.order_by(*self.ordering)[: self.per_page + 1])
+        more_after = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        return KeysetPage(
+            rows,
+            self,
+            next_cursor=self._cursor(rows[-1]) if more_after else None,
+            previous_cursor=self._cursor(rows[0]) if after is not None and rows else None,
+        )
+
+
+class KeysetPaginationMixin:
+    """
+    Keyset pagination for a ListView whose queryset is ordered by
+    ``keyset_ordering``. Views return False from ``use_keyset`` for listings
+    that cannot be paged that way (e.g. ordered by search rank), which then
+    get the usual page numbers.
+    """
+
+    keyset_ordering = ("-timestamp", "-pk")
+
+    def use_keyset(self, queryset):
+        return isinstance(queryset, QuerySet)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_keyset(queryset):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        page = paginator.page(after=self.request.GET.get("after"), before=self.request.GET.get("before"))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.copy()
+        for name in ("after", "before", "page"):
+            query.pop(name, None)
+        context["pagination_query"] = query.urlencode()
+        return context
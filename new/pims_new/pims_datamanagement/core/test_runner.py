@@ -0,0 +1,25 @@
+"""
+Test runner that starts every test with empty caches.
+
+Test databases reuse primary keys from one test to the next, so an entry
+cached by one test (a user's grants, the org snapshot, badge counts) would
+otherwise be served to an unrelated row with the same id in the next.
+"""
+
+import unittest
+
+from django.core.cache import caches
+from django.test.runner import DiscoverRunner
+
+
+class CacheClearingResultMixin:
+    def startTest(self, test):  # noqa: N802
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        super().startTest(test)
+
+
+class PimsTestRunner(DiscoverRunner):
+    def get_resultclass(self):
+        resultclass = super().get_resultclass() or unittest.TextTestResult
+        return type(resultclass.__name__, (CacheClearingResultMixin, resultclass), {})
@@ -0,0 +1,22 @@
+"""
+Fixtures shared by the apps' test modules.
+"""
+
+from django.contrib.auth.models import Group
+from organization.models import Designation, Staff
+from user_management.models import CustomUser
+
+
+def make_user(username, group_name=None, is_superuser=False):
+    u = CustomUser.objects.create_user(username=username, password="Test1234!")
+    u.is_superuser = is_superuser
+    u.save()
+    if group_name:
+        g, _ = Group.objects.get_or_create(name=group_name)
+        u.groups.add(g)
+    return u
+
+
+def make_staff(user, designation_name="Officer", dept=None, unit=None):
+    desig, _ = Designation.objects.get_or_create(name=designation_name, defaults={"level": 5})
+    return Staff.objects.create(user=user, designation=desig, department=dept, unit=unit)
@@ -0,0 +1,23 @@
+"""
+Date ranges for datetime columns.
+
+Filter a datetime column for a local date with a half-open range
+(``col__gte=since, col__lt=until``) rather than ``col__date=``: the
+``__date`` lookup wraps the column in a conversion function, so the
+database cannot use an index on it and has to convert every row.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def day_bounds(start, end):
+    """Aware datetimes for the half-open range of local dates [start, end)."""
+    tz = timezone.get_current_timezone()
+    return datetime.combine(start, time.min, tz), datetime.combine(end, time.min, tz)
+
+
+def day_range(day):
+    """Aware datetimes for the half-open range covering the local date ``day``."""
+    return day_bounds(day, day + timedelta(days=1))
@@ -1,7 +1,17 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin, TabularInline
 
-from .models import ChainTemplate, ChainTemplateStep, Document, EmailLog, File, FileAccessRequest, FileMovement
+from .models import (
+    ChainTemplate,
+    ChainTemplateStep,
+    DashboardSnapshot,
+    Document,
+    EmailLog,
+    File,
+    FileAccessRequest,
+    FileCounter,
+    FileMovement,
+)
 
 
 @admin.register(File)
@@ -61,3 +71,17 @@ class EmailLogAdmin(ModelAdmin):
     search_fields = ("subject", "recipient_email", "sent_by__username", "file__file_number")
     readonly_fields = ("sent_at",)
     autocomplete_fields = ("sent_by", "file")
+
+
+@admin.register(DashboardSnapshot)
+class DashboardSnapshotAdmin(ModelAdmin):
+    list_display = ("scope_kind", "scope_id", "created_at")
+    list_filter = ("scope_kind",)
+    readonly_fields = ("scope_kind", "scope_id", "data", "created_at")
+
+
+@admin.register(FileCounter)
+class FileCounterAdmin(ModelAdmin):
+    list_display = ("department", "file_type", "status", "count")
+    list_filter = ("file_type", "status", "department")
+    readonly_fields = ("department", "file_type", "status", "count")
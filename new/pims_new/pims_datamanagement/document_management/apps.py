@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DocumentManagementConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "document_management"
+
+    def ready(self):
+        import core.checks  # noqa
+        import document_management.signals  # noqa
@@ -0,0 +1,114 @@
+"""
+Denormalized file counts per (department, file_type, status).
+
+Every FileCounter row holds the number of files with that key, so "how many
+files are pending activation" or "how many active policy files does this
+department have" is a read of a handful of rows instead of a count over the
+File table.
+
+The rows are changed in the same transaction as the files they count:
+``File.save`` moves a file between keys, the ``post_delete`` signal takes it
+out, and ``FileQuerySet.update``/``bulk_create`` adjust the keys of the rows
+they touch. Deleting a department moves its counts to the "no department"
+keys, matching the SET_NULL on File.department (which the deletion collector
+applies with a plain UPDATE that bypasses FileQuerySet). Any change to a
+pending_activation count drops the cached registry badge counts.
+
+``counter_drift`` compares the table with the File rows; the
+reconcile_file_counters command reports the drift and repairs it.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+# The File columns a counter key is made of, in key order
+KEY_FIELDS = ("department_id", "file_type", "status")
+# The same columns as model field names, as used in update()/update_fields
+KEY_FIELD_NAMES = ("department", "file_type", "status")
+
+
+def counter_key(file_obj):
+    """(department_id, file_type, status) of a File instance, or of a values dict."""
+    values = file_obj if isinstance(file_obj, dict) else file_obj.__dict__
+    return tuple(values.get(name) for name in KEY_FIELDS)
+
+
+def key_filter(key):
+    return dict(zip(KEY_FIELDS, key, strict=True))
+
+
+def tally(files):
+    """{key: number of files} for a File queryset, in one grouped query."""
+    return {
+        (department_id, file_type, status): n
+        for department_id, file_type, status, n in files.order_by()
+        .values(*KEY_FIELDS)
+        .annotate(n=Count("pk"))
+        .values_list(*KEY_FIELDS, "n")
+    }
+
+
+def diff(before, after):
+    """{key: delta} taking ``before`` counts to ``after`` counts."""
+    deltas = {key: -n for key, n in before.items()}
+    for key, n in after.items():
+        deltas[key] = deltas.get(key, 0) + n
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def increment(model, lookup, delta):
+    """Add ``delta`` to the ``count`` of the ``model`` row matching ``lookup``, creating it if needed."""
+    rows = model.objects.filter(**lookup)
+    if rows.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # Another transaction created the row first
+        rows.update(count=F("count") + delta)
+
+
+def apply_deltas(deltas):
+    """Add each delta to its counter row, creating rows for keys not seen before."""
+    from notifications.badges import invalidate_pending
+
+    from .models import FileCounter
+
+    if any(key[2] == "pending_activation" for key, delta in deltas.items() if delta):
+        invalidate_pending()
+    for key, delta in deltas.items():
+        if delta:
+            increment(FileCounter, key_filter(key), delta)
+
+
+def recount(keys):
+    """Set the counter rows for ``keys`` to the number of files that currently have them."""
+    from notifications.badges import invalidate_pending
+
+    from .models import File, FileCounter
+
+    for key in keys:
+        n = File.objects.filter(**key_filter(key)).count()
+        if not FileCounter.objects.filter(**key_filter(key)).update(count=n):
+            FileCounter.objects.create(count=n, **key_filter(key))
+    invalidate_pending()
+
+
+def move_department(department_id):
+    """Move the counts of a department that is being deleted to the "no department" keys."""
+    from .models import FileCounter
+
+    rows = FileCounter.objects.filter(department_id=department_id)
+    apply_deltas({(None, file_type, status): n for file_type, status, n in rows.values_list(*KEY_FIELDS[1:], "count")})
+    rows.delete()
+
+
+def counter_drift():
+    """[(key, stored count, actual count)] for every key where the table disagrees with the File rows."""
+    from .models import File, FileCounter
+
+    stored = {counter_key(row): row["count"] for row in FileCounter.objects.values(*KEY_FIELDS, "count")}
+    actual = tally(File.objects.all())
+    drift = [(key, stored.get(key, 0), actual.get(key, 0)) for key in stored.keys() | actual.keys()]
+    return sorted((row for row in drift if row[1] != row[2]), key=lambda row: tuple(str(v or "") for v in row[0]))
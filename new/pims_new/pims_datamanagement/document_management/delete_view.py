@@ -4,7 +4,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import get_object_or_404, redirect
 from django.views.generic import View
 
-from .models import Document, FileAccessRequest
+from .grants import has_active_grant
+from .models import Document
 
 
 class DocumentDeleteView(LoginRequiredMixin, UserPassesTestMixin, View):
@@ -26,11 +27,7 @@ class DocumentDeleteView(LoginRequiredMixin, UserPassesTestMixin, View):
             pass
 
         # Check for active read-write access
-        active_access = FileAccessRequest.objects.filter(
-            file=file_obj, requested_by=user, status="approved", access_type="read_write"
-        ).first()
-
-        return bool(active_access and active_access.is_active)
+        return has_active_grant(user, file_obj, "read_write")
 
     def post(self, request, pk):
         document = get_object_or_404(Document, pk=pk)
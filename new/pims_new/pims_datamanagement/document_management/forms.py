@@ -78,9 +78,7 @@ class FileForm(forms.ModelForm):
             try:
                 creator_staff = self.user.staff
                 if creator_staff.is_registry:
-                    self.fields["owner"].queryset = Staff.objects.exclude(
-                        designation__name__icontains="registry"
-                    ).order_by("user__username")
+                    self.fields["owner"].queryset = Staff.objects.exclude(registry_role=True).order_by("user__username")
                 elif creator_staff.is_hod:
                     self.fields["owner"].queryset = (
                         Staff.objects.filter(department=creator_staff.headed_department)
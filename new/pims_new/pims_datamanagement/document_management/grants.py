@@ -0,0 +1,69 @@
+"""
+Per-user cache of active file access grants.
+
+"Does this user hold an approved, unexpired FileAccessRequest for this file?"
+is asked on nearly every file, document and download request. Each user's
+active grants are cached as ``{file_id: (access_type, expires_at)}``; the entry
+lives until the earliest grant expires (capped at GRANT_CACHE_MAX_AGE) and is
+dropped whenever one of the user's access requests is saved, deleted or
+bulk-updated (see ``invalidate_grants``).
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+GRANT_CACHE_MAX_AGE = 3600
+
+
+def _cache_key(user_id):
+    return f"document_management:grants:{user_id}"
+
+
+def _load_grants(user_id, now):
+    from .models import FileAccessRequest
+
+    grants = {}
+    rows = (
+        FileAccessRequest.objects.filter(requested_by_id=user_id, status="approved")
+        .filter(Q(expires_at__gt=now) | Q(expires_at__isnull=True))
+        .order_by()
+        .values_list("file_id", "access_type", "expires_at")
+    )
+    for file_id, access_type, expires_at in rows:
+        # Several grants for one file collapse to the most permissive one
+        if grants.get(file_id, (None,))[0] != "read_write":
+            grants[file_id] = (access_type, expires_at)
+    return grants
+
+
+def get_active_grants(user):
+    """Map file id -> (access_type, expires_at) for the user's approved, unexpired access requests."""
+    if not user.is_authenticated:
+        return {}
+    now = timezone.now()
+    key = _cache_key(user.pk)
+    grants = cache.get(key)
+    if grants is None:
+        grants = _load_grants(user.pk, now)
+        expiries = [expires_at for _, expires_at in grants.values() if expires_at]
+        timeout = GRANT_CACHE_MAX_AGE
+        if expiries:
+            timeout = max(1, min(timeout, int((min(expiries) - now).total_seconds())))
+        cache.set(key, grants, timeout)
+    return {file_id: grant for file_id, grant in grants.items() if grant[1] is None or grant[1] > now}
+
+
+def has_active_grant(user, file, access_type=None):
+    """True if ``user`` holds an active grant on ``file`` (of ``access_type``, when given)."""
+    grant = get_active_grants(user).get(getattr(file, "pk", file))
+    return grant is not None and (access_type is None or grant[0] == access_type)
+
+
+def invalidate_grants(*user_ids):
+    """Drop cached grants now and again once the current transaction commits."""
+    keys = [_cache_key(user_id) for user_id in user_ids if user_id]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
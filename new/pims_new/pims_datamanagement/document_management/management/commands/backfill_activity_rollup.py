@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from document_management.rollups import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the daily activity rollup from the audit log and file movements, "
+        "for all of history or for the given dates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First date to recompute (YYYY-MM-DD).")
+        parser.add_argument("--end", help="Last date to recompute, inclusive (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options["start"]) if options["start"] else None
+            end = date.fromisoformat(options["end"]) + timedelta(days=1) if options["end"] else None
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}") from exc
+        if start and end and start >= end:
+            raise CommandError("--start must not be after --end.")
+
+        with transaction.atomic():
+            written = rebuild_rollup(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup row(s)."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from document_management.counters import counter_drift, key_filter, recount
+
+
+class Command(BaseCommand):
+    help = "Compares the FileCounter table with the File rows and repairs any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift; leave the counters as they are.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = counter_drift()
+            for key, stored, actual in drift:
+                labels = key_filter(key)
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"department={labels['department_id']} file_type={labels['file_type']} "
+                        f"status={labels['status']}: counter says {stored}, files say {actual}"
+                    )
+                )
+            if not drift:
+                self.stdout.write(self.style.SUCCESS("File counters are in step with the files."))
+                return
+            if options["dry_run"]:
+                self.stdout.write(
+                    self.style.WARNING(f"{len(drift)} counter(s) drifted; run without --dry-run to repair.")
+                )
+                return
+            recount(key for key, _, _ in drift)
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drift)} counter(s)."))
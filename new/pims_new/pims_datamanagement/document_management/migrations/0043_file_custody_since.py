@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 06:41
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_custody_since(apps, schema_editor):
+    File = apps.get_model("document_management", "File")
+    FileMovement = apps.get_model("document_management", "FileMovement")
+    # Same reference point get_custody_duration() used: the latest "sent" movement.
+    # Files never sent keep NULL, which means "since created_at".
+    last_sent = (
+        FileMovement.objects.filter(file=OuterRef("pk"), action="sent").order_by("-moved_at").values("moved_at")[:1]
+    )
+    File.objects.filter(current_location__isnull=False).update(custody_since=Subquery(last_sent))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("document_management", "0042_emaillog"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="file",
+            name="custody_since",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="When the file last changed hands. Empty means it has been at its location since creation.",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_custody_since, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("document_management", "0043_file_custody_since"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardSnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "scope_kind",
+                    models.CharField(
+                        choices=[("organization", "Organization"), ("department", "Department"), ("unit", "Unit")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "scope_id",
+                    models.PositiveIntegerField(
+                        blank=True, help_text="Department or unit id; empty for the organization.", null=True
+                    ),
+                ),
+                ("data", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(fields=["scope_kind", "scope_id", "-created_at"], name="dashboard_snapshot_scope_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 6.0 on 2026-10-18 07:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    # Frozen copy of document_management.counters.rebuild_counters at the time of this migration
+    File = apps.get_model("document_management", "File")
+    FileCounter = apps.get_model("document_management", "FileCounter")
+    rows = (
+        File.objects.order_by()
+        .values("department_id", "file_type", "status")
+        .annotate(n=models.Count("pk"))
+        .values_list("department_id", "file_type", "status", "n")
+    )
+    FileCounter.objects.bulk_create(
+        [
+            FileCounter(department_id=department_id, file_type=file_type, status=status, count=n)
+            for department_id, file_type, status, n in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("document_management", "0044_dashboardsnapshot"),
+        ("organization", "0013_org_closure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FileCounter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "file_type",
+                    models.CharField(choices=[("personal", "Personal"), ("policy", "Policy")], max_length=10),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("inactive", "Inactive"),
+                            ("pending_approval", "Pending Approval"),
+                            ("pending_activation", "Pending Activation"),
+                            ("active", "Active"),
+                            ("in_transit", "In Transit"),
+                            ("in_review", "In Review"),
+                            ("rejected", "Rejected"),
+                            ("closed", "Closed"),
+                            ("archived", "Archived"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="organization.department",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("department__isnull", False)),
+                        fields=("department", "file_type", "status"),
+                        name="file_counter_unique_key",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("department__isnull", True)),
+                        fields=("file_type", "status"),
+                        name="file_counter_unique_key_no_department",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 07:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("document_management", "0045_filecounter"),
+        ("organization", "0013_org_closure"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(fields=["uploaded_at"], name="document_uploaded_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="filemovement",
+            index=models.Index(fields=["action", "moved_at"], name="movement_action_moved_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="filemovement",
+            index=models.Index(fields=["file", "moved_at"], name="movement_file_moved_idx"),
+        ),
+    ]
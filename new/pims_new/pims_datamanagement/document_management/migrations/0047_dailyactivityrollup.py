@@ -0,0 +1,90 @@
+# Generated by Django 6.0 on 2026-10-18 07:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    # Frozen copy of document_management.rollups.rebuild_rollup (whole history) at the time of this migration
+    DailyActivityRollup = apps.get_model("document_management", "DailyActivityRollup")
+    sources = (
+        ("audit", apps.get_model("audit_log", "AuditLogEntry"), "timestamp", "user"),
+        ("movement", apps.get_model("document_management", "FileMovement"), "moved_at", "sent_by"),
+    )
+
+    rows = []
+    for source, model, timestamp_field, user_field in sources:
+        staff = f"{user_field}__staff__"
+        department = Coalesce(
+            f"{staff}department_id",
+            f"{staff}division__department_id",
+            f"{staff}section__department_id",
+            f"{staff}unit__department_id",
+        )
+        grouped = (
+            model.objects.order_by()
+            .annotate(day=TruncDate(timestamp_field), report_department=department)
+            .values("day", "report_department", "action")
+            .annotate(n=models.Count("pk"))
+            .values_list("day", "report_department", "action", "n")
+        )
+        for day, department_id, action, n in grouped:
+            rows.append(
+                DailyActivityRollup(date=day, department_id=department_id, source=source, action=action, count=n)
+            )
+    DailyActivityRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit_log", "0002_alter_auditlogentry_action"),
+        ("document_management", "0046_report_indexes"),
+        ("organization", "0013_org_closure"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="file",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name="DailyActivityRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                (
+                    "source",
+                    models.CharField(choices=[("audit", "Audit log"), ("movement", "File movement")], max_length=10),
+                ),
+                ("action", models.CharField(max_length=50)),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="organization.department",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("department__isnull", False)),
+                        fields=("date", "department", "source", "action"),
+                        name="activity_rollup_unique_key",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("department__isnull", True)),
+                        fields=("date", "source", "action"),
+                        name="activity_rollup_unique_key_no_department",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
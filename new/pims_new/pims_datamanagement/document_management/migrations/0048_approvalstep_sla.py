@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-18 07:36
+
+from django.db import migrations, models
+
+
+def backfill_clocks(apps, schema_editor):
+    """
+    Fill started_at for the current steps of active chains and wait_time for
+    actioned steps, taking each step's start as the previous step's
+    actioned_at or, for the first step, the chain's creation.
+    """
+    ApprovalChain = apps.get_model("document_management", "ApprovalChain")
+    ApprovalStep = apps.get_model("document_management", "ApprovalStep")
+
+    changed = []
+    chains = ApprovalChain.objects.exclude(status="draft").prefetch_related("steps")
+    for chain in chains.iterator(chunk_size=500):
+        started_at = chain.created_at
+        for step in sorted(chain.steps.all(), key=lambda step: step.order):
+            if step.actioned_at:
+                step.started_at = started_at
+                step.wait_time = step.actioned_at - started_at
+                started_at = step.actioned_at
+                changed.append(step)
+            elif chain.status == "active" and step.order == chain.current_step:
+                step.started_at = started_at
+                changed.append(step)
+    ApprovalStep.objects.bulk_update(changed, ["started_at", "wait_time"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("document_management", "0047_dailyactivityrollup"),
+        ("organization", "0013_org_closure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="approvalstep",
+            name="escalated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="approvalstep",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="approvalstep",
+            name="wait_time",
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="approvalstep",
+            index=models.Index(fields=["status", "started_at"], name="approval_step_waiting_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="approvalstep",
+            index=models.Index(fields=["approver", "actioned_at"], name="approval_step_actioned_idx"),
+        ),
+        migrations.RunPython(backfill_clocks, migrations.RunPython.noop),
+    ]
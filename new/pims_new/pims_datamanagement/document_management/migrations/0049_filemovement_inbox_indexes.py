@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 08:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("document_management", "0048_approvalstep_sla"),
+        ("organization", "0013_org_closure"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="filemovement",
+            index=models.Index(fields=["sent_to", "action", "moved_at"], name="movement_inbox_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="filemovement",
+            index=models.Index(fields=["sent_by", "action", "moved_at"], name="movement_outbox_idx"),
+        ),
+    ]
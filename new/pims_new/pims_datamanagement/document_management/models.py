@@ -1,12 +1,115 @@
+from datetime import timedelta
 from pathlib import Path
 
 from core.constants import FILE_TYPE_CHOICES, STATUS_CHOICES
 from core.utils.pdf import watermark_pdf_file
 from django.conf import settings
 from django.core.files.base import ContentFile
-from django.db import models
+from django.db import models, transaction
+from django.db.models import BooleanField, Case, DurationField, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from organization.closure import subtree_q
 from organization.models import Department, Division, Section, Staff, Unit
 
+from .counters import KEY_FIELD_NAMES, KEY_FIELDS, apply_deltas, counter_key, diff, recount, tally
+
+
+def custody_overdue_q(threshold_days=2, now=None):
+    """Q for files held at their current location for more than ``threshold_days`` whole days."""
+    cutoff = (now or timezone.now()) - timedelta(days=threshold_days + 1)
+    return Q(custody_since__lte=cutoff) | Q(custody_since__isnull=True, created_at__lte=cutoff)
+
+
+class FileQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Files ``user`` may open, filtered in SQL with the same rules as permissions.can_view_file."""
+        from .permissions import file_visibility_q
+
+        return self.filter(file_visibility_q(user))
+
+    def within_org_node(self, node):
+        """
+        Files filed anywhere under ``node`` (a Department, Division, Section or
+        Unit), plus personal files of staff assigned under it.
+        """
+        return self.filter(subtree_q(node) | (Q(file_type="personal") & subtree_q(node, "owner__")))
+
+    def with_custody(self, threshold_days=2, now=None):
+        """
+        Annotate each file with when it arrived at its current location
+        (``custody_started_at``), how long it has been held there
+        (``custody_held``, a timedelta) and whether that is longer than
+        ``threshold_days`` whole days (``custody_overdue``), all in SQL so the
+        list can be sorted, filtered and paginated on them.
+        """
+        now = now or timezone.now()
+        cutoff = now - timedelta(days=threshold_days + 1)
+        return self.annotate(custody_started_at=Coalesce("custody_since", "created_at")).annotate(
+            custody_held=ExpressionWrapper(Value(now) - F("custody_started_at"), output_field=DurationField()),
+            custody_overdue=Case(
+                When(custody_started_at__lte=cutoff, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+
+    def overdue(self, threshold_days=2, now=None):
+        """
+        Files held at their current location for more than ``threshold_days``
+        whole days, matching File.is_overdue() but filtered on the indexed
+        custody_since column.
+        """
+        return self.filter(custody_overdue_q(threshold_days, now))
+
+    # The bulk write paths keep FileCounter in step, like File.save() does.
+    # bulk_update() goes through update().
+
+    def update(self, **kwargs):
+        changed = [name for name in (*KEY_FIELD_NAMES, *KEY_FIELDS) if name in kwargs]
+        if not changed:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            if any(hasattr(kwargs[name], "resolve_expression") for name in changed):
+                # The new values are only known once the database has computed them
+                files = self.model.objects.filter(pk__in=list(self.values_list("pk", flat=True)))
+                before = tally(files)
+                rows = super().update(**kwargs)
+                after = tally(files)
+            else:
+                before = tally(self)
+                rows = super().update(**kwargs)
+                new_values = {}
+                for i, (attname, name) in enumerate(zip(KEY_FIELDS, KEY_FIELD_NAMES, strict=True)):
+                    if attname in kwargs:
+                        new_values[i] = kwargs[attname]
+                    elif name in kwargs:
+                        new_values[i] = getattr(kwargs[name], "pk", kwargs[name])
+                after = {}
+                for key, n in before.items():
+                    new_key = tuple(new_values.get(i, value) for i, value in enumerate(key))
+                    after[new_key] = after.get(new_key, 0) + n
+            apply_deltas(diff(before, after))
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get("ignore_conflicts") or kwargs.get("update_conflicts"):
+                # Which rows were really written is not known; recount the keys involved
+                recount({counter_key(obj) for obj in objs})
+            else:
+                deltas = {}
+                for obj in created:
+                    deltas[counter_key(obj)] = deltas.get(counter_key(obj), 0) + 1
+                apply_deltas(deltas)
+        return created
+
+    bulk_create.alters_data = True
+
 
 class File(models.Model):
     """
@@ -46,7 +149,7 @@ class File(models.Model):
         default=False,
         help_text="Mark as sensitive. Only HODs, Supervisors, Executives, and MD can view document contents.",
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     owner = models.ForeignKey(
         Staff,
         on_delete=models.SET_NULL,
@@ -62,6 +165,13 @@ class File(models.Model):
         blank=True,
         related_name="files_at_location",
     )
+    custody_since = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="When the file last changed hands. Empty means it has been at its location since creation.",
+    )
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -69,6 +179,8 @@ class File(models.Model):
         related_name="created_files",
     )
 
+    objects = FileQuerySet.as_manager()
+
     class Meta:
         permissions = [
             ("create_file", "Can create a new file"),
@@ -127,14 +239,32 @@ class File(models.Model):
                     "Each staff member can only have one personal folder."
                 )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_location_id = instance.__dict__.get("current_location_id")
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_location_id = self.__dict__.get("current_location_id")
+
+    def _stamp_custody(self, update_fields):
+        """Restart the custody clock when current_location has changed since the file was loaded."""
+        if not hasattr(self, "_loaded_location_id") or self._loaded_location_id == self.current_location_id:
+            return update_fields
+        self.custody_since = timezone.now()
+        if update_fields is not None and "current_location" in update_fields:
+            update_fields = {*update_fields, "custody_since"}
+        return update_fields
+
     def save(self, *args, **kwargs):
         self.full_clean()
         # Enforce uppercase title
         self.title = self.title.upper()
+        kwargs["update_fields"] = self._stamp_custody(kwargs.get("update_fields"))
 
         if not self.file_number:
-            from django.utils import timezone
-
             # Improved file number generation
             prefix = "FMCAB"
 
@@ -164,17 +294,36 @@ class File(models.Model):
 
             self.file_number = f"{prefix}/{year}/{type_code}/{new_serial:04d}"
 
-        super().save(*args, **kwargs)
+        update_fields = kwargs["update_fields"]
+        counted = update_fields is None or bool(set(update_fields) & {*KEY_FIELD_NAMES, *KEY_FIELDS})
+        with transaction.atomic():
+            old_key = self._stored_counter_key() if counted and not self._state.adding else None
+            super().save(*args, **kwargs)
+            if counted:
+                new_key = counter_key(self)
+                if old_key and update_fields is not None:
+                    # Columns left out of update_fields keep their stored value
+                    new_key = tuple(
+                        new if {attname, name} & set(update_fields) else old
+                        for new, old, attname, name in zip(new_key, old_key, KEY_FIELDS, KEY_FIELD_NAMES, strict=True)
+                    )
+                apply_deltas(diff({old_key: 1} if old_key else {}, {new_key: 1}))
+        self._loaded_location_id = self.current_location_id
+
+    def _stored_counter_key(self):
+        """This file's FileCounter key as stored, locking the row for the rest of the transaction."""
+        return File.objects.select_for_update().filter(pk=self.pk).values_list(*KEY_FIELDS).first()
 
-    def get_custody_duration(self):
-        """Days the file has been at its current location, based on FileMovement."""
-        from django.utils import timezone
+    @property
+    def custody_start(self):
+        """When the file arrived at its current location."""
+        return self.custody_since or self.created_at
 
-        if not self.current_location:
+    def get_custody_duration(self):
+        """Days the file has been at its current location."""
+        if not self.current_location_id:
             return 0
-        last_movement = self.movements.filter(action="sent").order_by("-moved_at").first()
-        ref = last_movement.moved_at if last_movement else self.created_at
-        return (timezone.now() - ref).days
+        return (timezone.now() - self.custody_start).days
 
     def is_overdue(self, threshold_days=2):
         """
@@ -297,6 +446,7 @@ class Document(models.Model):
 
     class Meta:
         ordering = ["-uploaded_at"]
+        indexes = [models.Index(fields=["uploaded_at"], name="document_uploaded_at_idx")]
         permissions = [
             ("add_minute", "Can add a minute to a file"),
             ("add_attachment", "Can add an attachment to a file"),
@@ -407,6 +557,15 @@ class FileMovement(models.Model):
 
     class Meta:
         ordering = ["-moved_at"]
+        indexes = [
+            # Movements of one kind inside a date window (reports)
+            models.Index(fields=["action", "moved_at"], name="movement_action_moved_idx"),
+            # A file's next movement after a given one (custody times)
+            models.Index(fields=["file", "moved_at"], name="movement_file_moved_idx"),
+            # Inbox and outbox, newest first and paged by (moved_at, id)
+            models.Index(fields=["sent_to", "action", "moved_at"], name="movement_inbox_idx"),
+            models.Index(fields=["sent_by", "action", "moved_at"], name="movement_outbox_idx"),
+        ]
 
     def __str__(self):
         return f"{self.file.file_number} — {self.action} at {self.moved_at:%Y-%m-%d %H:%M}"
@@ -454,14 +613,6 @@ class ApprovalChain(models.Model):
     def _get_file(self):
         return self.document.file if self.document else self.file
 
-    def _get_registry(self):
-        from django.db.models import Q
-        from organization.models import Staff as StaffModel
-
-        return StaffModel.objects.filter(
-            Q(designation__name__icontains="registry") | Q(user__groups__name__iexact="Registry")
-        ).first()
-
     def advance(self):
         """Move to next step or close chain and return file to registry."""
         next_step = self.steps.filter(order__gt=self.current_step, status="pending").order_by("order").first()
@@ -469,6 +620,7 @@ class ApprovalChain(models.Model):
         if next_step:
             self.current_step = next_step.order
             self.save()
+            next_step.mark_current()
             file_obj.current_location = next_step.approver
             file_obj.save()
         else:
@@ -479,8 +631,9 @@ class ApprovalChain(models.Model):
                 self.document.status = "approved"
                 self.document.save(update_fields=["status"])
             # Return file to registry
-            registry = self._get_registry()
-            file_obj.current_location = registry
+            from .registry_desk import next_registry_officer_id
+
+            file_obj.current_location_id = next_registry_officer_id()
             file_obj.save()
             # Notify sender
             from notifications.utils import create_notification
@@ -502,8 +655,7 @@ class ApprovalChain(models.Model):
         self.steps.filter(order=from_order).update(status="pending", actioned_at=None)
         prev_step = self.steps.filter(order__lt=from_order).order_by("-order").first()
         if prev_step:
-            prev_step.status = "pending"
-            prev_step.save()
+            prev_step.mark_current()
             self.current_step = prev_step.order
             self.save()
             file_obj.current_location = prev_step.approver
@@ -547,14 +699,39 @@ class ApprovalStep(models.Model):
     note = models.TextField(blank=True)
     signature = models.ForeignKey("organization.StaffSignature", on_delete=models.SET_NULL, null=True, blank=True)
     actioned_at = models.DateTimeField(null=True, blank=True)
+    # SLA clock (see document_management.sla): when the step last became the
+    # chain's current step, how long it waited there before it was actioned,
+    # and when its approver's head was last told it is overdue
+    started_at = models.DateTimeField(null=True, blank=True)
+    wait_time = models.DurationField(null=True, blank=True)
+    escalated_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["order"]
         unique_together = [("chain", "order")]
+        indexes = [
+            # Pending steps waiting since before a cutoff (escalation job)
+            models.Index(fields=["status", "started_at"], name="approval_step_waiting_idx"),
+            # An approver's recently actioned steps (SLA percentiles)
+            models.Index(fields=["approver", "actioned_at"], name="approval_step_actioned_idx"),
+        ]
 
     def __str__(self):
         return f"Step {self.order} — {self.approver} [{self.status}]"
 
+    def mark_current(self, now=None):
+        """Start the SLA clock: the step has just become the chain's current step and waits on its approver."""
+        self.status = "pending"
+        self.started_at = now or timezone.now()
+        self.escalated_at = None
+        self.save(update_fields=["status", "started_at", "escalated_at"])
+
+    def record_action(self, now=None):
+        """Stamp actioned_at and store how long the step waited; the caller saves."""
+        self.actioned_at = now or timezone.now()
+        if self.started_at:
+            self.wait_time = self.actioned_at - self.started_at
+
 
 class FileAccessRequest(models.Model):
     """
@@ -616,6 +793,10 @@ class ChainTemplate(models.Model):
         scope = self.department.name if self.department else "Org-Wide"
         return f"{self.name} [{scope}]"
 
+    def resolve_all(self, sender_staff):
+        """[(step, approver or None)] for every step, resolved in a fixed number of queries."""
+        return resolve_template_steps(list(self.steps.all()), sender_staff)
+
 
 class ChainTemplateStep(models.Model):
     """A single step in a chain template, defined by role not person."""
@@ -654,33 +835,61 @@ class ChainTemplateStep(models.Model):
     def __str__(self):
         return f"Step {self.order}: {self.get_role_type_display()}"
 
+    def department_id_for(self, sender_staff):
+        return sender_staff.department_id if self.department_scope == "sender" else self.specific_department_id
+
     def resolve(self, sender_staff):
         """Resolve this step to an actual Staff instance at dispatch time."""
-        if self.role_type == "specific_person":
-            return self.staff
+        return resolve_template_steps([self], sender_staff)[0][1]
 
-        dept = sender_staff.department if self.department_scope == "sender" else self.specific_department
 
-        if self.role_type == "unit_manager":
-            unit = sender_staff.unit if self.department_scope == "sender" else None
-            if unit and unit.head:
-                return unit.head
-            # fallback: any unit head in dept
-            from organization.models import Unit
-
-            u = Unit.objects.filter(department=dept, head__isnull=False).first()
-            return u.head if u else None
-
-        if self.role_type == "hod":
-            return dept.head if dept else None
+def resolve_template_steps(steps, sender_staff):
+    """
+    Resolve chain template steps to approvers for ``sender_staff``.
 
-        if self.role_type == "director_general":
-            return Staff.objects.filter(user__groups__name__iexact="Executive").first()
+    Heads come from the org snapshot; designation and director-general
+    steps share one Staff lookup and every approver is fetched in one more
+    query, so the cost does not grow with the number of steps.
+    Returns ``[(step, Staff or None)]`` in the given order.
+    """
+    from organization.snapshot import get_snapshot
+
+    snapshot = get_snapshot()
+    targets = []
+    lookup_q = Q(pk__in=[])
+    for step in steps:
+        dept_id = step.department_id_for(sender_staff)
+        if step.role_type == "specific_person":
+            targets.append(step.staff_id)
+        elif step.role_type == "unit_manager":
+            head_id = snapshot.unit_heads.get(sender_staff.unit_id) if step.department_scope == "sender" else None
+            # fallback: any unit head in dept
+            targets.append(head_id or snapshot.first_unit_head_in(dept_id))
+        elif step.role_type == "hod":
+            targets.append(snapshot.department_heads.get(dept_id))
+        elif step.role_type == "director_general":
+            targets.append(("executive",))
+            lookup_q |= Q(executive_role=True)
+        elif step.role_type == "designation":
+            targets.append(("designation", step.designation_id, dept_id))
+            lookup_q |= Q(designation_id=step.designation_id, department_id=dept_id)
+        else:
+            targets.append(None)
 
-        if self.role_type == "designation":
-            return Staff.objects.filter(designation=self.designation, department=dept).first()
+    # First match by pk for each lookup, as .first() would give
+    matches = {}
+    if any(isinstance(target, tuple) for target in targets):
+        rows = Staff.objects.filter(lookup_q).order_by("pk")
+        for pk, executive_role, designation_id, department_id in rows.values_list(
+            "pk", "executive_role", "designation_id", "department_id"
+        ):
+            if executive_role:
+                matches.setdefault(("executive",), pk)
+            matches.setdefault(("designation", designation_id, department_id), pk)
+    targets = [matches.get(target) if isinstance(target, tuple) else target for target in targets]
 
-        return None
+    approvers = Staff.objects.select_related("user", "designation").in_bulk([pk for pk in targets if pk])
+    return [(step, approvers.get(pk)) for step, pk in zip(steps, targets, strict=True)]
 
 
 class EmailLog(models.Model):
@@ -717,3 +926,124 @@ class EmailLog(models.Model):
 
     def __str__(self):
         return f"{self.subject} -> {self.recipient_email} ({self.status})"
+
+
+class DashboardSnapshotQuerySet(models.QuerySet):
+    def latest_for(self, scope_kind, scope_id=None, max_age=None):
+        """Newest snapshot for the scope, or None if there is none younger than ``max_age`` seconds."""
+        qs = self.filter(scope_kind=scope_kind, scope_id=scope_id)
+        if max_age is not None:
+            qs = qs.filter(created_at__gte=timezone.now() - timedelta(seconds=max_age))
+        return qs.order_by("-created_at").first()
+
+
+class DashboardSnapshot(models.Model):
+    """
+    Executive dashboard counters for one org scope, precomputed by the
+    refresh_dashboard_snapshots task so dashboards don't recompute them live.
+    """
+
+    SCOPE_ORGANIZATION = "organization"
+    SCOPE_DEPARTMENT = "department"
+    SCOPE_UNIT = "unit"
+    SCOPE_CHOICES = [
+        (SCOPE_ORGANIZATION, "Organization"),
+        (SCOPE_DEPARTMENT, "Department"),
+        (SCOPE_UNIT, "Unit"),
+    ]
+
+    scope_kind = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    scope_id = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Department or unit id; empty for the organization."
+    )
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = DashboardSnapshotQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["scope_kind", "scope_id", "-created_at"], name="dashboard_snapshot_scope_idx")]
+
+    def __str__(self):
+        scope = self.get_scope_kind_display()
+        if self.scope_id:
+            scope = f"{scope} #{self.scope_id}"
+        return f"{scope} @ {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class FileCounterQuerySet(models.QuerySet):
+    def total(self, **filters):
+        """Number of files matching ``filters`` on department, file_type and/or status."""
+        return self.filter(**filters).aggregate(total=Sum("count"))["total"] or 0
+
+    def by_status(self, **filters):
+        """{status: number of files} for every status, over the files matching ``filters``."""
+        counts = dict(self.filter(**filters).values("status").annotate(n=Sum("count")).values_list("status", "n"))
+        return {status: counts.get(status, 0) for status, _ in STATUS_CHOICES}
+
+
+class FileCounter(models.Model):
+    """
+    Number of files per (department, file_type, status), kept in step with
+    the File table by document_management.counters.
+    """
+
+    # Rows of a deleted department are folded into the "no department" rows by a pre_delete signal
+    department = models.ForeignKey(Department, on_delete=models.DO_NOTHING, null=True, blank=True)
+    file_type = models.CharField(max_length=10, choices=FILE_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    objects = FileCounterQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["department", "file_type", "status"],
+                condition=Q(department__isnull=False),
+                name="file_counter_unique_key",
+            ),
+            models.UniqueConstraint(
+                fields=["file_type", "status"],
+                condition=Q(department__isnull=True),
+                name="file_counter_unique_key_no_department",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.department or 'No department'} / {self.file_type} / {self.status}: {self.count}"
+
+
+class DailyActivityRollup(models.Model):
+    """
+    Number of audit entries or file movements per day, department and
+    action, kept up to date by document_management.rollups.
+    """
+
+    SOURCE_CHOICES = [("audit", "Audit log"), ("movement", "File movement")]
+
+    date = models.DateField()
+    # Rows of a deleted department are folded into the "no department" rows by a pre_delete signal
+    department = models.ForeignKey(Department, on_delete=models.DO_NOTHING, null=True, blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    action = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "department", "source", "action"],
+                condition=Q(department__isnull=False),
+                name="activity_rollup_unique_key",
+            ),
+            models.UniqueConstraint(
+                fields=["date", "source", "action"],
+                condition=Q(department__isnull=True),
+                name="activity_rollup_unique_key_no_department",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.department or 'No department'} {self.source}:{self.action} = {self.count}"
@@ -5,9 +5,11 @@ All role-based checks should be defined here as plain functions.
 Views import and call these instead of duplicating logic inline.
 """
 
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 
+from document_management.grants import get_active_grants, has_active_grant
+
 # ---------------------------------------------------------------------------
 # Role helpers
 # ---------------------------------------------------------------------------
@@ -73,13 +75,42 @@ def can_view_file(user, file):
     ):
         return True
     # Approved access request
+    return has_active_grant(user, file)
+
+
+def _same_department_q(field, department_id):
+    """Match ``field`` against a department id, treating None == None as a match like the Python checks."""
+    if department_id is None:
+        return Q(**{f"{field}__isnull": True})
+    return Q(**{field: department_id})
+
+
+def file_visibility_q(user):
+    """
+    The can_view_file rules as a single predicate on File.
+
+    Used by File.objects.visible_to(); keep the two in step.
+    """
+    if user.is_superuser or is_registry(user) or is_executive(user):
+        return Q()
+    staff = get_staff(user)
+    if not staff:
+        return Q(pk__in=[])
+
     from document_management.models import FileAccessRequest
 
-    return (
-        FileAccessRequest.objects.filter(file=file, requested_by=user, status="approved")
-        .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-        .exists()
-    )
+    q = Q(owner=staff) | Q(current_location=staff)
+    if is_hod(user) or is_unit_manager(user):
+        q |= Q(file_type="policy") & _same_department_q("department", staff.department_id)
+    if is_hod(user):
+        q |= Q(file_type="personal") & (
+            (Q(owner__isnull=False) & _same_department_q("owner__department", staff.department_id))
+            | _same_department_q("department", staff.department_id)
+        )
+    approved_access = FileAccessRequest.objects.filter(
+        file=OuterRef("pk"), requested_by=user, status="approved"
+    ).filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
+    return q | Q(Exists(approved_access))
 
 
 def can_activate_file(user, file):
@@ -119,13 +150,7 @@ def can_add_document(user, file):
     staff = get_staff(user)
     if not staff or file.current_location != staff:
         return False
-    from document_management.models import FileAccessRequest
-
-    return (
-        FileAccessRequest.objects.filter(file=file, requested_by=user, status="approved", access_type="read_write")
-        .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-        .exists()
-    )
+    return has_active_grant(user, file, "read_write")
 
 
 def can_dispatch_document(user, file):
@@ -207,82 +232,11 @@ def get_dispatch_recipients(user, file):
     Supervisor sending someone else's file → other supervisors + direct heads.
     Regular staff → unit manager if exists, else section head, else division head, else HOD.
     """
-    from organization.models import Department as Dept
-    from organization.models import Staff, Unit
+    from document_management.routing import DISPATCH, recipient_queryset
 
-    from document_management.views.base import EXCLUDE_REGISTRY_Q
-
-    base_qs = (
-        Staff.objects.exclude(EXCLUDE_REGISTRY_Q)
-        .exclude(user=user)
-        .select_related("user", "designation", "department", "unit", "section", "division")
+    return recipient_queryset(user, DISPATCH, file).select_related(
+        "user", "designation", "department", "unit", "section", "division"
     )
-    staff = get_staff(user)
-    if not staff:
-        return base_qs.none()
-
-    if is_registry(user) or is_executive(user) or is_md(user):
-        return base_qs
-
-    if is_hod(user) or is_unit_manager(user):
-        # HOD and Unit Manager can send to:
-        # - Other HODs
-        # - Heads of units, sections, divisions
-        # - Supervisors
-        allowed_pks = set()
-        
-        # Other HODs
-        for d in Dept.objects.filter(head__isnull=False):
-            if d.head.pk != staff.pk:
-                allowed_pks.add(d.head.pk)
-        
-        # Heads of units
-        for u in Unit.objects.filter(head__isnull=False):
-            if u.head.pk != staff.pk:
-                allowed_pks.add(u.head.pk)
-        
-        # Heads of sections
-        from organization.models import Section
-        for s in Section.objects.filter(head__isnull=False):
-            if s.head.pk != staff.pk:
-                allowed_pks.add(s.head.pk)
-        
-        # Heads of divisions
-        from organization.models import Division
-        for d in Division.objects.filter(head__isnull=False):
-            if d.head.pk != staff.pk:
-                allowed_pks.add(d.head.pk)
-        
-        # Supervisors
-        for s in base_qs.filter(is_supervisor=True):
-            if s.pk != staff.pk:
-                allowed_pks.add(s.pk)
-        
-        return base_qs.filter(pk__in=allowed_pks)
-
-    if is_supervisor(user) and file.owner != staff:
-        supervisor_pks = [s.pk for s in base_qs if s.is_effective_supervisor]
-        head_pks = []
-        if staff.unit and staff.unit.head:
-            head_pks.append(staff.unit.head.pk)
-        if staff.section and staff.section.head:
-            head_pks.append(staff.section.head.pk)
-        if staff.division and staff.division.head:
-            head_pks.append(staff.division.head.pk)
-        if staff.department and staff.department.head:
-            head_pks.append(staff.department.head.pk)
-        return base_qs.filter(pk__in=set(supervisor_pks + head_pks))
-
-    # Regular staff: Unit Head → Section Head → Division Head → HOD
-    if staff.unit and staff.unit.head:
-        return base_qs.filter(pk=staff.unit.head.pk)
-    if staff.section and staff.section.head:
-        return base_qs.filter(pk=staff.section.head.pk)
-    if staff.division and staff.division.head:
-        return base_qs.filter(pk=staff.division.head.pk)
-    if staff.department and staff.department.head:
-        return base_qs.filter(pk=staff.department.head.pk)
-    return base_qs.none()
 
 
 def can_share_document(user):
@@ -290,3 +244,143 @@ def can_share_document(user):
     if user.is_superuser:
         return True
     return user.has_perm("user_management.can_share_documents")
+
+
+# ---------------------------------------------------------------------------
+# Batched capabilities
+# ---------------------------------------------------------------------------
+
+CAPABILITY_FLAGS = ("view", "content", "add_document", "dispatch", "share", "read_write", "custodian")
+
+
+def capabilities_for(user, objects):
+    """
+    Evaluate the file/document rules above for many objects in a fixed number of queries.
+
+    ``objects`` is an iterable of File instances or of Document instances. Returns
+    ``{obj.pk: {...}}`` holding CAPABILITY_FLAGS plus ``owner``, ``access_type``
+    (None, "read_only" or "read_write") and ``in_active_chain``. For documents,
+    ``view`` and ``dispatch`` follow the document page rules and the file flags
+    describe the document's file.
+    """
+    from document_management.models import ApprovalStep, Document, File, FileMovement
+
+    objects = list(objects)
+    if not objects:
+        return {}
+    is_document = isinstance(objects[0], Document)
+
+    if is_document:
+        file_field = Document._meta.get_field("file")
+        files = {doc.file_id: doc.file for doc in objects if doc.file_id and file_field.is_cached(doc)}
+        missing = {doc.file_id for doc in objects if doc.file_id and doc.file_id not in files}
+        files.update(File.objects.in_bulk(missing))
+    else:
+        files = {f.pk: f for f in objects}
+
+    staff = get_staff(user)
+    registry = is_registry(user)
+    unrestricted = user.is_superuser or registry or is_executive(user)
+    hod = is_hod(user)
+    unit_manager = is_unit_manager(user)
+    content = can_view_document_content(user)
+    share = can_share_document(user)
+
+    grants = {}
+    if staff:
+        grants = {file_id: grant[0] for file_id, grant in get_active_grants(user).items() if file_id in files}
+    in_chain = set(
+        Document.objects.filter(file_id__in=files, approval_chains__status="active")
+        .order_by()
+        .values_list("file_id", flat=True)
+    )
+    owner_departments = {}
+    if hod and staff:
+        owner_departments = dict(
+            File.objects.filter(pk__in=files, file_type="personal", owner__isnull=False).values_list(
+                "pk", "owner__department_id"
+            )
+        )
+
+    def file_view(f):
+        if unrestricted:
+            return True
+        if not staff:
+            return False
+        if staff.pk in (f.owner_id, f.current_location_id):
+            return True
+        if f.file_type == "policy" and (hod or unit_manager) and f.department_id == staff.department_id:
+            return True
+        if (
+            f.file_type == "personal"
+            and hod
+            and (
+                (f.owner_id and owner_departments.get(f.pk) == staff.department_id)
+                or f.department_id == staff.department_id
+            )
+        ):
+            return True
+        return f.pk in grants
+
+    file_caps = {}
+    for f in files.values():
+        custodian = staff is not None and f.current_location_id == staff.pk
+        access_type = grants.get(f.pk)
+        writable = f.status == "active" and f.pk not in in_chain
+        file_caps[f.pk] = {
+            "view": file_view(f),
+            "content": content,
+            "add_document": writable and (registry or (custodian and access_type == "read_write")),
+            "dispatch": writable and (registry or custodian),
+            "share": share,
+            "read_write": access_type == "read_write",
+            "custodian": custodian,
+            "owner": staff is not None and f.owner_id == staff.pk,
+            "access_type": access_type,
+            "in_active_chain": f.pk in in_chain,
+        }
+
+    if not is_document:
+        return file_caps
+
+    doc_ids = [doc.pk for doc in objects]
+    shared, pending, approving = set(), set(), set()
+    if staff and content:
+        shared = set(Document.objects.filter(pk__in=doc_ids, shared_with=user).values_list("pk", flat=True))
+        pending = set(
+            FileMovement.objects.filter(document_id__in=doc_ids, sent_to=staff, status="pending").values_list(
+                "document_id", flat=True
+            )
+        )
+        approving = set(
+            ApprovalStep.objects.filter(
+                chain__document_id__in=doc_ids, chain__status="active", approver=staff
+            ).values_list("chain__document_id", flat=True)
+        )
+
+    no_file = dict.fromkeys(CAPABILITY_FLAGS, False)
+    no_file.update(content=content, share=share, access_type=None, owner=False, in_active_chain=False)
+    caps = {}
+    for doc in objects:
+        entry = dict(file_caps.get(doc.file_id, no_file))
+        entry["view"] = bool(
+            staff
+            and content
+            and (
+                entry["view"]
+                or entry["custodian"]
+                or entry["access_type"] is not None
+                or doc.pk in shared
+                or doc.pk in pending
+                or doc.pk in approving
+            )
+        )
+        entry["dispatch"] = bool(
+            doc.file_id
+            and files[doc.file_id].status == "active"
+            and not entry["in_active_chain"]
+            and doc.status != "approved"
+            and (entry["owner"] or entry["custodian"] or registry)
+        )
+        caps[doc.pk] = entry
+    return caps
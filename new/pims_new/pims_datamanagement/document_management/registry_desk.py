@@ -0,0 +1,77 @@
+"""
+Registry desk: picks which registry officer receives a file returned to the registry.
+
+Approvals, chain completion and custody reclaims all hand the file back to
+"the registry". The pool of registry officers comes from the org snapshot,
+so picking one costs no Staff query, and files are spread across the pool
+rather than all landing on the same officer.
+
+Two strategies, chosen with ``settings.REGISTRY_DESK_STRATEGY``:
+
+* ``"least_loaded"`` (default): the officer holding the fewest active files.
+  Loads are counted in one grouped query, cached for REGISTRY_DESK_LOAD_TTL
+  seconds and bumped locally on every assignment.
+* ``"round_robin"``: a shared cursor in the cache walks the pool in turn.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from organization.snapshot import get_snapshot
+
+LEAST_LOADED = "least_loaded"
+ROUND_ROBIN = "round_robin"
+
+REGISTRY_DESK_LOAD_TTL = 300
+
+_LOADS_KEY = "document_management:registry_desk:loads"
+_CURSOR_KEY = "document_management:registry_desk:cursor"
+
+
+def registry_pool():
+    """Registry officer Staff pks, in a stable order."""
+    return sorted(get_snapshot().registry_staff)
+
+
+def _officer_loads(pool):
+    loads = cache.get(_LOADS_KEY)
+    if loads is None or set(loads) != set(pool):
+        from .models import File
+
+        counts = dict(
+            File.objects.filter(current_location_id__in=pool, status="active")
+            .order_by()
+            .values("current_location_id")
+            .annotate(n=Count("pk"))
+            .values_list("current_location_id", "n")
+        )
+        loads = {pk: counts.get(pk, 0) for pk in pool}
+    return loads
+
+
+def _least_loaded(pool):
+    loads = _officer_loads(pool)
+    officer_id = min(pool, key=lambda pk: (loads[pk], pk))
+    loads[officer_id] += 1
+    cache.set(_LOADS_KEY, loads, REGISTRY_DESK_LOAD_TTL)
+    return officer_id
+
+
+def _round_robin(pool):
+    cache.add(_CURSOR_KEY, -1, None)
+    try:
+        cursor = cache.incr(_CURSOR_KEY)
+    except ValueError:
+        # Cache without shared state (e.g. the dummy backend): fall back to the first officer
+        cursor = 0
+    return pool[cursor % len(pool)]
+
+
+def next_registry_officer_id():
+    """Staff pk of the registry officer the next returned file should go to, or None if there is none."""
+    pool = registry_pool()
+    if not pool:
+        return None
+    if getattr(settings, "REGISTRY_DESK_STRATEGY", LEAST_LOADED) == ROUND_ROBIN:
+        return _round_robin(pool)
+    return _least_loaded(pool)
@@ -1,32 +1,67 @@
 import csv
+from datetime import date, timedelta
 
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.paginator import Paginator
 from django.http import HttpResponse
 from django.shortcuts import render
 from django.utils import timezone
 from django.views import View
+from organization.snapshot import get_snapshot
 
-from .reports import get_daily_file_movement_report, get_department_performance_report
+from .reports import (
+    ACTIVITY_GROUPINGS,
+    BOTTLENECK_GROUPINGS,
+    get_activity_report,
+    get_cached_bottleneck_report,
+    get_department_performance_report,
+)
+from .sla import to_hours
 
 
 class DailyFileMovementReportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    MAX_RANGE_DAYS = 366 * 5
+
     def test_func(self):
         return self.request.user.is_superuser or (
             hasattr(self.request.user, "staff") and self.request.user.staff.is_hod
         )
 
+    def get_range(self):
+        """Local dates [start, end) from the inclusive ?start=&end= dates; today when missing or invalid."""
+        today = timezone.localdate()
+        try:
+            start = date.fromisoformat(self.request.GET.get("start") or today.isoformat())
+            last_day = date.fromisoformat(self.request.GET.get("end") or start.isoformat())
+        except ValueError:
+            return today, today + timedelta(days=1)
+        if last_day < start or (last_day - start).days > self.MAX_RANGE_DAYS:
+            return today, today + timedelta(days=1)
+        return start, last_day + timedelta(days=1)
+
     def get(self, request):
-        report_data = get_daily_file_movement_report()
+        start, end = self.get_range()
+        group_by = request.GET.get("group")
+        if group_by not in ACTIVITY_GROUPINGS:
+            group_by = "day"
+        department_id = request.GET.get("department")
+        department_id = int(department_id) if department_id and department_id.isdigit() else None
+        report_data = get_activity_report(start, end, group_by=group_by, department_id=department_id)
 
         if request.GET.get("export") == "csv":
             response = HttpResponse(content_type="text/csv")
-            response["Content-Disposition"] = f'attachment; filename="daily_file_movement_{timezone.now().date()}.csv"'
+            response["Content-Disposition"] = (
+                f'attachment; filename="file_activity_{start}_{report_data["last_day"]}_{group_by}.csv"'
+            )
 
             writer = csv.writer(response)
-            writer.writerow(["Metric", "Count"])
-            writer.writerow(["Files Created", report_data["created_count"]])
-            writer.writerow(["Files Activated", report_data["activated_count"]])
-            writer.writerow(["Files Moved", report_data["moved_count"]])
+            writer.writerow(["Period", "Files Created", "Files Activated", "Files Moved", "Documents Added"])
+            for row in report_data["periods"]:
+                writer.writerow([row["period"], row["created"], row["activated"], row["moved"], row["documents_added"]])
+            totals = report_data["totals"]
+            writer.writerow(
+                ["Total", totals["created"], totals["activated"], totals["moved"], totals["documents_added"]]
+            )
 
             writer.writerow([])
             writer.writerow(["Detailed Created Files"])
@@ -36,29 +71,141 @@ class DailyFileMovementReportView(LoginRequiredMixin, UserPassesTestMixin, View)
 
             return response
 
-        return render(request, "document_management/report_daily_movement.html", {"report": report_data})
+        return render(
+            request,
+            "document_management/report_daily_movement.html",
+            {
+                "report": report_data,
+                "departments": get_snapshot().departments,
+                "selected_department": department_id,
+                "groupings": list(ACTIVITY_GROUPINGS),
+                "query": request.GET.urlencode(),
+            },
+        )
 
 
 class DepartmentPerformanceReportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    WINDOW_CHOICES = (7, 30, 90, 365)
+    DEFAULT_WINDOW = 30
+
     def test_func(self):
         return self.request.user.is_superuser or (
             hasattr(self.request.user, "staff") and self.request.user.staff.is_hod
         )
 
+    def get_days(self):
+        try:
+            days = int(self.request.GET.get("days", self.DEFAULT_WINDOW))
+        except ValueError:
+            return self.DEFAULT_WINDOW
+        return days if days in self.WINDOW_CHOICES else self.DEFAULT_WINDOW
+
     def get(self, request):
-        report_data = get_department_performance_report()
+        days = self.get_days()
+        report_data = get_department_performance_report(days=days)
+        for row in report_data:
+            row["custody_median_hours"] = to_hours(row["custody_median"])
+            row["custody_p90_hours"] = to_hours(row["custody_p90"])
 
         if request.GET.get("export") == "csv":
             response = HttpResponse(content_type="text/csv")
-            response["Content-Disposition"] = f'attachment; filename="dept_performance_{timezone.now().date()}.csv"'
+            response["Content-Disposition"] = (
+                f'attachment; filename="dept_performance_{days}d_{timezone.now().date()}.csv"'
+            )
 
             writer = csv.writer(response)
-            writer.writerow(["Department", "Total Files Owned", "Active Files", "Files Currently Pending"])
+            writer.writerow(
+                [
+                    "Department",
+                    "Total Files Owned",
+                    "Active Files",
+                    "Files Currently Held",
+                    "Documents Added",
+                    "Movements Sent",
+                    "Median Custody (hours)",
+                    "P90 Custody (hours)",
+                ]
+            )
             for row in report_data:
                 writer.writerow(
-                    [row["department"], row["total_files_owned"], row["active_files"], row["files_currently_pending"]]
+                    [
+                        row["department"],
+                        row["total_files_owned"],
+                        row["active_files"],
+                        row["files_currently_held"],
+                        row["documents_added"],
+                        row["movements_sent"],
+                        row["custody_median_hours"] if row["custody_median_hours"] is not None else "",
+                        row["custody_p90_hours"] if row["custody_p90_hours"] is not None else "",
+                    ]
+                )
+
+            return response
+
+        return render(
+            request,
+            "document_management/report_dept_performance.html",
+            {"report_data": report_data, "days": days, "window_choices": self.WINDOW_CHOICES},
+        )
+
+
+class BottleneckReportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    paginate_by = 25
+
+    def test_func(self):
+        return self.request.user.is_superuser or (
+            hasattr(self.request.user, "staff") and self.request.user.staff.is_hod
+        )
+
+    def get(self, request):
+        group_by = request.GET.get("group")
+        if group_by not in BOTTLENECK_GROUPINGS:
+            group_by = BOTTLENECK_GROUPINGS[0]
+        rows, as_of = get_cached_bottleneck_report(group_by)
+
+        if request.GET.get("export") == "csv":
+            response = HttpResponse(content_type="text/csv")
+            response["Content-Disposition"] = f'attachment; filename="bottlenecks_{group_by}_{as_of.date()}.csv"'
+
+            writer = csv.writer(response)
+            writer.writerow(
+                [
+                    "Staff" if group_by == "staff" else "Department",
+                    "Files Held",
+                    "Overdue",
+                    "Oldest Hold Since",
+                    "Longest Held (hours)",
+                    "Approvals Actioned",
+                    "Average Turnaround (hours)",
+                ]
+            )
+            for row in rows:
+                writer.writerow(
+                    [
+                        row["label"],
+                        row["files_held"],
+                        row["overdue"],
+                        timezone.localtime(row["oldest_hold"]).isoformat() if row["oldest_hold"] else "",
+                        to_hours(row["longest_held"]) if row["longest_held"] is not None else "",
+                        row["approvals_actioned"],
+                        to_hours(row["avg_turnaround"]) if row["avg_turnaround"] is not None else "",
+                    ]
                 )
 
             return response
 
-        return render(request, "document_management/report_dept_performance.html", {"report_data": report_data})
+        page = Paginator(rows, self.paginate_by).get_page(request.GET.get("page"))
+        for row in page.object_list:
+            row["longest_held_hours"] = to_hours(row["longest_held"])
+            row["avg_turnaround_hours"] = to_hours(row["avg_turnaround"])
+        return render(
+            request,
+            "document_management/report_bottlenecks.html",
+            {
+                "page_obj": page,
+                "rows": page.object_list,
+                "group_by": group_by,
+                "groupings": BOTTLENECK_GROUPINGS,
+                "as_of": as_of,
+            },
+        )
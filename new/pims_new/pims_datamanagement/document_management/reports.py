@@ -1,65 +1,328 @@
-from audit_log.models import AuditLogEntry
+from datetime import timedelta
+
+from core.utils.dates import day_bounds
+from django.core.cache import cache
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import Ceil, Coalesce, RowNumber, TruncMonth, TruncWeek
 from django.utils import timezone
-from organization.models import Department
+from organization.models import Department, Staff
+from organization.snapshot import get_snapshot
 
-from .models import File
+from .models import ApprovalStep, DailyActivityRollup, Document, File, FileMovement, custody_overdue_q
 
+# Report columns: (key, rollup source, action)
+ACTIVITY_METRICS = (
+    ("created", "audit", "FILE_CREATED"),
+    ("activated", "audit", "FILE_ACTIVATED"),
+    ("moved", "movement", "sent"),
+    ("documents_added", "audit", "DOCUMENT_ADDED"),
+)
 
-def get_daily_file_movement_report(date=None):
-    """
-    Generates a report of file movements and status changes for a specific date.
-    Default date is today.
+ACTIVITY_GROUPINGS = {"day": None, "week": TruncWeek, "month": TruncMonth}
+
+
+def get_activity_report(start=None, end=None, group_by="day", department_id=None):
     """
-    if date is None:
-        date = timezone.now().date()
+    File activity for the local dates [start, end) (by default today) from
+    the daily activity rollup, grouped by ``group_by`` ("day", "week" or
+    "month"), optionally for one department.
 
-    # Files created on this date
-    created_files = File.objects.filter(created_at__date=date)
+    Returns the period rows (``period`` plus one count per ACTIVITY_METRICS
+    key), the ``totals`` and the files created in the range.
+    """
+    start = start or timezone.localdate()
+    end = end or start + timedelta(days=1)
+    rollups = DailyActivityRollup.objects.filter(date__gte=start, date__lt=end)
+    if department_id:
+        rollups = rollups.filter(department_id=department_id)
+    metric_filters = {key: Q(source=source, action=action) for key, source, action in ACTIVITY_METRICS}
+    rollups = rollups.filter(Q(*metric_filters.values(), _connector=Q.OR))
 
-    # Files activated on this date (based on AuditLog)
-    activated_logs = AuditLogEntry.objects.filter(action="FILE_ACTIVATED", timestamp__date=date)
-    activated_files_ids = activated_logs.values_list("object_id", flat=True)
-    activated_files = File.objects.filter(pk__in=activated_files_ids)
+    trunc = ACTIVITY_GROUPINGS[group_by]
+    periods = (
+        rollups.order_by()
+        .annotate(period=trunc("date") if trunc else F("date"))
+        .values("period")
+        .annotate(**{key: Coalesce(Sum("count", filter=q), 0) for key, q in metric_filters.items()})
+        .order_by("period")
+    )
+    periods = list(periods)
+    totals = {key: sum(row[key] for row in periods) for key in metric_filters}
 
-    # Files moved (sent) on this date (based on AuditLog)
-    moved_logs = AuditLogEntry.objects.filter(action="FILE_SENT", timestamp__date=date)
-    moved_files_stats = moved_logs.count()
+    since, until = day_bounds(start, end)
+    created_files = File.objects.filter(created_at__gte=since, created_at__lt=until)
+    if department_id:
+        created_files = created_files.filter(department_id=department_id)
 
     return {
-        "date": date,
-        "created_count": created_files.count(),
-        "activated_count": activated_files.count(),
-        "moved_count": moved_files_stats,
-        "created_files": created_files,
-        "activated_files": activated_files,
+        "start": start,
+        "end": end,
+        "last_day": end - timedelta(days=1),
+        "group_by": group_by,
+        "periods": periods,
+        "totals": totals,
+        "created_files": created_files.select_related("owner__user", "department").order_by("-created_at"),
     }
 
 
-def get_department_performance_report(days=30):
+def department_of(prefix=""):
     """
-    Generates performance metrics per department over the last N days.
+    Department id of the org columns under ``prefix`` (a File, or a Staff
+    reached through e.g. "owner__"): the department itself, or the one the
+    division, section or unit belongs to.
     """
-    report_data = []
-    departments = Department.objects.all()
+    return Coalesce(
+        f"{prefix}department_id",
+        f"{prefix}division__department_id",
+        f"{prefix}section__department_id",
+        f"{prefix}unit__department_id",
+    )
+
+
+def file_department(prefix=""):
+    """Department a file is reported under: its owner's for personal files, otherwise its own."""
+    return Case(
+        When(
+            **{f"{prefix}file_type": "personal"},
+            then=Coalesce(department_of(f"{prefix}owner__"), department_of(prefix)),
+        ),
+        default=department_of(prefix),
+    )
+
+
+def _grouped(queryset, department, **aggregates):
+    """{department id: {name: value}} for ``aggregates`` grouped on the ``department`` expression."""
+    rows = queryset.order_by().annotate(report_department=department).values("report_department")
+    return {row.pop("report_department"): row for row in rows.annotate(**aggregates)}
+
+
+def _custody_percentiles(since, until, now, percentiles):
+    """
+    {department id: {name: timedelta}} of how long files sent to a
+    department's staff inside the window stayed there, until the file's next
+    movement (or now, if it has not moved on).
+    """
+    next_moved_at = (
+        FileMovement.objects.filter(file=OuterRef("file"), moved_at__gt=OuterRef("moved_at"))
+        .order_by("moved_at")
+        .values("moved_at")[:1]
+    )
+    held = (
+        FileMovement.objects.filter(action="sent", moved_at__gte=since, moved_at__lt=until, sent_to__isnull=False)
+        .order_by()
+        .annotate(
+            report_department=department_of("sent_to__"),
+            held=ExpressionWrapper(
+                Coalesce(Subquery(next_moved_at), Value(now)) - F("moved_at"), output_field=DurationField()
+            ),
+        )
+        .annotate(
+            position=Window(RowNumber(), partition_by=F("report_department"), order_by=F("held").asc()),
+            sample_size=Window(Count("pk"), partition_by=F("report_department")),
+        )
+    )
+    result = {}
+    for name, fraction in percentiles.items():
+        # Nearest-rank percentile: the ceil(fraction * n)-th shortest stay
+        rank = Ceil(ExpressionWrapper(F("sample_size") * fraction, output_field=FloatField()))
+        for department_id, duration in held.filter(position=rank).values_list("report_department", "held"):
+            result.setdefault(department_id, {})[name] = duration
+    return result
+
+
+def get_department_performance_report(days=30, start=None, end=None, now=None):
+    """
+    Performance metrics for every department over the window [start, end),
+    by default the last ``days`` days:
 
-    for dept in departments:
-        # Files owned by this department (or staff in it)
-        dept_files = File.objects.filter(department=dept)
+    - ``total_files_owned``/``active_files``: files reported under the
+      department (see ``file_department``), whenever they were created
+    - ``files_currently_held``: files currently with the department's staff
+    - ``documents_added``: documents added to its files inside the window
+    - ``movements_sent``: files its staff sent on inside the window
+    - ``custody_median``/``custody_p90``: how long files sent to its staff
+      inside the window stayed with them (timedeltas, None without movements)
 
-        # Total active files
-        active_count = dept_files.filter(status="active").count()
+    Each metric is one grouped query over its table, so the cost does not
+    grow with the number of departments.
+    """
+    now = now or timezone.now()
+    end = end or now
+    start = start or end - timedelta(days=days)
 
-        # Detailed: Find files currently located in this department (bottleneck analysis)
-        # Assuming current_location (Staff) maps to this department
-        files_currently_with_dept = File.objects.filter(current_location__department=dept).count()
+    files = _grouped(
+        File.objects.all(),
+        file_department(),
+        total_files_owned=Count("pk"),
+        active_files=Count("pk", filter=Q(status="active")),
+    )
+    held = _grouped(
+        File.objects.filter(current_location__isnull=False),
+        department_of("current_location__"),
+        files_currently_held=Count("pk"),
+    )
+    documents = _grouped(
+        Document.objects.filter(uploaded_at__gte=start, uploaded_at__lt=end),
+        file_department("file__"),
+        documents_added=Count("pk"),
+    )
+    movements = _grouped(
+        FileMovement.objects.filter(action="sent", moved_at__gte=start, moved_at__lt=end),
+        department_of("sent_by__staff__"),
+        movements_sent=Count("pk"),
+    )
+    custody = _custody_percentiles(start, end, now, {"custody_median": 0.5, "custody_p90": 0.9})
 
+    report_data = []
+    for department_id, name in Department.objects.order_by("name").values_list("pk", "name"):
         report_data.append(
             {
-                "department": dept.name,
-                "total_files_owned": dept_files.count(),
-                "active_files": active_count,
-                "files_currently_pending": files_currently_with_dept,
+                "department_id": department_id,
+                "department": name,
+                "total_files_owned": 0,
+                "active_files": 0,
+                "files_currently_held": 0,
+                "documents_added": 0,
+                "movements_sent": 0,
+                "custody_median": None,
+                "custody_p90": None,
+                **files.get(department_id, {}),
+                **held.get(department_id, {}),
+                **documents.get(department_id, {}),
+                **movements.get(department_id, {}),
+                **custody.get(department_id, {}),
             }
         )
-
     return report_data
+
+
+BOTTLENECK_CACHE_MAX_AGE = 300
+
+BOTTLENECK_GROUPINGS = ("staff", "department")
+
+
+def _bottleneck_cache_key(group_by):
+    return f"document_management:bottlenecks:{group_by}"
+
+
+def _held_since():
+    """When a file reached its current holder: custody_since, else its latest movement, else its creation."""
+    latest_moved_at = FileMovement.objects.filter(file=OuterRef("pk")).order_by("-moved_at").values("moved_at")[:1]
+    return Coalesce("custody_since", Subquery(latest_moved_at), "created_at")
+
+
+def _step_turnaround():
+    """
+    How long an actioned approval step took: its stored wait_time or, for
+    steps actioned before that was recorded, the time from the previous
+    step's action (or the chain's creation, for the first step) to its own.
+    """
+    previous_actioned_at = (
+        ApprovalStep.objects.filter(chain=OuterRef("chain"), order__lt=OuterRef("order"), actioned_at__isnull=False)
+        .order_by("-order")
+        .values("actioned_at")[:1]
+    )
+    return Coalesce(
+        "wait_time",
+        ExpressionWrapper(
+            F("actioned_at") - Coalesce(Subquery(previous_actioned_at), "chain__created_at"),
+            output_field=DurationField(),
+        ),
+    )
+
+
+def get_bottleneck_report(group_by="staff", now=None):
+    """
+    Where files are stuck, one row per holder (``group_by="staff"``) or per
+    department of the holders (``group_by="department"``):
+
+    - ``files_held``/``overdue``: files currently with them, and of those the
+      ones held for longer than the overdue threshold
+    - ``oldest_hold``/``longest_held``: when the longest-held of those files
+      arrived, and how long ago that was
+    - ``approvals_actioned``/``avg_turnaround``: approval steps they have
+      approved or rejected and the average time each took
+
+    Each half is one grouped query. Holders with neither files nor actioned
+    steps are left out; rows are sorted with the most files held first.
+    """
+    now = now or timezone.now()
+    if group_by == "staff":
+        held_by, actioned_by = F("current_location_id"), F("approver_id")
+    else:
+        held_by, actioned_by = department_of("current_location__"), department_of("approver__")
+
+    held = _grouped(
+        File.objects.filter(current_location__isnull=False),
+        held_by,
+        files_held=Count("pk"),
+        overdue=Count("pk", filter=custody_overdue_q(now=now)),
+        oldest_hold=Min(_held_since()),
+    )
+    approvals = _grouped(
+        ApprovalStep.objects.filter(actioned_at__isnull=False),
+        actioned_by,
+        approvals_actioned=Count("pk"),
+        avg_turnaround=Avg(_step_turnaround()),
+    )
+
+    labels = _bottleneck_labels(group_by, held.keys() | approvals.keys())
+    report = []
+    for holder_id in held.keys() | approvals.keys():
+        row = {
+            "holder_id": holder_id,
+            "label": labels.get(holder_id, "No department"),
+            "files_held": 0,
+            "overdue": 0,
+            "oldest_hold": None,
+            "approvals_actioned": 0,
+            "avg_turnaround": None,
+            **held.get(holder_id, {}),
+            **approvals.get(holder_id, {}),
+        }
+        row["longest_held"] = now - row["oldest_hold"] if row["oldest_hold"] else None
+        report.append(row)
+    report.sort(key=lambda row: (-row["files_held"], row["oldest_hold"] or now, row["label"]))
+    return report
+
+
+def _bottleneck_labels(group_by, holder_ids):
+    """{holder id: display name} for staff members or departments."""
+    if group_by == "department":
+        return {dept.pk: dept.name for dept in get_snapshot().departments}
+    labels = {}
+    for pk, first_name, last_name, username in Staff.objects.filter(pk__in=holder_ids).values_list(
+        "pk", "user__first_name", "user__last_name", "user__username"
+    ):
+        labels[pk] = f"{first_name} {last_name}".strip() or username
+    return labels
+
+
+def get_cached_bottleneck_report(group_by="staff"):
+    """
+    ``(rows, as_of)``: the bottleneck report from the cache, recomputed when
+    it is missing or older than BOTTLENECK_CACHE_MAX_AGE seconds.
+    """
+    key = _bottleneck_cache_key(group_by)
+    cached = cache.get(key)
+    if cached is None:
+        now = timezone.now()
+        cached = (get_bottleneck_report(group_by, now=now), now)
+        cache.set(key, cached, BOTTLENECK_CACHE_MAX_AGE)
+    return cached
@@ -0,0 +1,138 @@
+"""
+Daily activity rollup behind the activity report.
+
+DailyActivityRollup holds one row per (date, department, source, action)
+with the number of audit entries (source "audit", action as logged) or file
+movements (source "movement", action "sent"/"recalled"/"closed") recorded
+that day by staff of that department. Dates are local dates; the department
+is the one the acting user's staff record resolves to (see
+reports.department_of).
+
+Rows are bumped as entries and movements are written: movements by their
+post_save signal, audit entries by the audit writer's ``entries_written``
+signal, one bump per (date, department, action) in each batch. So a report
+over any date range reads a few rows per day instead of scanning the audit
+log. The rollup is a history: deleting or archiving
+audit entries does not take them out again. ``rebuild_rollup`` recomputes a
+date range from the source tables; it backs the backfill_activity_rollup
+command.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+from core.utils.dates import day_bounds
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .counters import increment
+
+SOURCE_AUDIT = "audit"
+SOURCE_MOVEMENT = "movement"
+
+
+def department_id_for_user(user_id):
+    """Department id of the user's staff record, or None."""
+    from organization.models import Staff
+
+    from .reports import department_of
+
+    if not user_id:
+        return None
+    return (
+        Staff.objects.filter(user_id=user_id)
+        .annotate(report_department=department_of())
+        .values_list("report_department", flat=True)
+        .first()
+    )
+
+
+def record_activity(timestamp, user_id, source, action):
+    """Count one audit entry or movement in the rollup."""
+    from .models import DailyActivityRollup
+
+    lookup = {
+        "date": timezone.localdate(timestamp),
+        "department_id": department_id_for_user(user_id),
+        "source": source,
+        "action": action,
+    }
+    increment(DailyActivityRollup, lookup, 1)
+
+
+def record_audit_entries(entries):
+    """Count a batch of written audit entries, looking up their users' departments in one query."""
+    from organization.models import Staff
+
+    from .models import DailyActivityRollup
+    from .reports import department_of
+
+    user_ids = {entry.user_id for entry in entries if entry.user_id}
+    departments = dict(
+        Staff.objects.filter(user_id__in=user_ids)
+        .annotate(report_department=department_of())
+        .values_list("user_id", "report_department")
+    )
+    counts = Counter(
+        (timezone.localdate(entry.timestamp), departments.get(entry.user_id), entry.action) for entry in entries
+    )
+    for (date, department_id, action), count in counts.items():
+        lookup = {"date": date, "department_id": department_id, "source": SOURCE_AUDIT, "action": action}
+        increment(DailyActivityRollup, lookup, count)
+
+
+def _source_rows(queryset, timestamp_field, user_field, department_of):
+    return (
+        queryset.order_by()
+        .annotate(day=TruncDate(timestamp_field), report_department=department_of(f"{user_field}__staff__"))
+        .values("day", "report_department", "action")
+        .annotate(n=Count("pk"))
+        .values_list("day", "report_department", "action", "n")
+    )
+
+
+def rebuild_rollup(start=None, end=None):
+    """
+    Recompute the rollup rows for the local dates [start, end) (all of
+    history by default) from the audit log and the file movements.
+    Returns the number of rows written.
+    """
+    from audit_log.models import AuditLogEntry
+
+    from .models import DailyActivityRollup, FileMovement
+    from .reports import department_of
+
+    sources = (
+        (SOURCE_AUDIT, AuditLogEntry.objects.all(), "timestamp", "user"),
+        (SOURCE_MOVEMENT, FileMovement.objects.all(), "moved_at", "sent_by"),
+    )
+
+    rollups = DailyActivityRollup.objects.all()
+    if start or end:
+        start = start or datetime.min.date()
+        end = end or timezone.localdate() + timedelta(days=1)
+        rollups = rollups.filter(date__gte=start, date__lt=end)
+        since, until = day_bounds(start, end)
+    rollups.delete()
+
+    rows = []
+    for source, queryset, timestamp_field, user_field in sources:
+        if start or end:
+            queryset = queryset.filter(**{f"{timestamp_field}__gte": since, f"{timestamp_field}__lt": until})
+        for day, department_id, action, n in _source_rows(queryset, timestamp_field, user_field, department_of):
+            rows.append(
+                DailyActivityRollup(date=day, department_id=department_id, source=source, action=action, count=n)
+            )
+    DailyActivityRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def move_department(department_id):
+    """Fold the rows of a department that is being deleted into the "no department" rows."""
+    from .models import DailyActivityRollup
+
+    rows = DailyActivityRollup.objects.filter(department_id=department_id)
+    for day, source, action, n in rows.values_list("date", "source", "action", "count"):
+        increment(DailyActivityRollup, {"date": day, "department_id": None, "source": source, "action": action}, n)
+    rows.delete()
@@ -0,0 +1,99 @@
+"""
+Recipient routing rules for dispatching documents and forwarding from the inbox.
+
+Both rule sets work on the cached org snapshot (organization.snapshot), so
+computing the allowed recipients costs no queries beyond the sender's own
+role resolution, however many staff and org units exist.
+
+``allowed_recipient_pks`` returns a set of Staff pks, or None when the sender
+may reach anyone. Callers still exclude registry staff and the sender from
+the final queryset (see ``recipient_queryset``).
+"""
+
+from organization.snapshot import get_snapshot
+
+DISPATCH = "dispatch"
+FORWARD = "forward"
+
+
+def _chain_of_command(staff, snapshot):
+    """Unit head → section head → division head → HOD: the first one that exists."""
+    for heads, org_id in (
+        (snapshot.unit_heads, staff.unit_id),
+        (snapshot.section_heads, staff.section_id),
+        (snapshot.division_heads, staff.division_id),
+        (snapshot.department_heads, staff.department_id),
+    ):
+        if org_id and heads.get(org_id):
+            return {heads[org_id]}
+    return set()
+
+
+def _own_heads(staff, snapshot):
+    pks = {
+        snapshot.unit_heads.get(staff.unit_id),
+        snapshot.section_heads.get(staff.section_id),
+        snapshot.division_heads.get(staff.division_id),
+        snapshot.department_heads.get(staff.department_id),
+    }
+    pks.discard(None)
+    return pks
+
+
+def _dispatch_pks(staff, file, snapshot):
+    if staff.user.is_superuser or staff.is_registry or staff.is_executive or staff.is_md:
+        return None
+    if staff.is_hod or staff.is_unit_manager:
+        # Other HODs, heads of units/sections/divisions and supervisors
+        pks = snapshot.all_head_ids | (snapshot.flagged_supervisors - snapshot.registry_staff)
+        pks.discard(staff.pk)
+        return pks
+    if staff.is_effective_supervisor and (file is None or file.owner_id != staff.pk):
+        # Other supervisors plus the sender's own line heads
+        return set(snapshot.effective_supervisors - snapshot.registry_staff) | _own_heads(staff, snapshot)
+    return _chain_of_command(staff, snapshot)
+
+
+def _forward_pks(staff, snapshot):
+    if staff.is_md or staff.is_executive:
+        return None
+    if staff.is_hod or staff.is_head_of_unit:
+        # Any HOD, any head of unit, any supervisor
+        pks = snapshot.department_and_unit_head_ids | (snapshot.flagged_supervisors - snapshot.registry_staff)
+        pks.discard(staff.pk)
+        return pks
+    if staff.is_supervisor:
+        return snapshot.department_and_unit_head_ids
+    if staff.unit_id and snapshot.unit_heads.get(staff.unit_id):
+        return {snapshot.unit_heads[staff.unit_id]}
+    if staff.department_id and snapshot.department_heads.get(staff.department_id):
+        return {snapshot.department_heads[staff.department_id]}
+    return set()
+
+
+def allowed_recipient_pks(staff, mode=DISPATCH, file=None):
+    """
+    Staff pks ``staff`` may send to, or None for unrestricted senders.
+
+    ``mode`` is DISPATCH for sending a document out of a file (``file`` decides
+    whether a supervisor is handling someone else's file) or FORWARD for
+    forwarding an inbox item.
+    """
+    if staff is None:
+        return set()
+    snapshot = get_snapshot()
+    if mode == FORWARD:
+        return _forward_pks(staff, snapshot)
+    return _dispatch_pks(staff, file, snapshot)
+
+
+def recipient_queryset(user, mode=DISPATCH, file=None):
+    """Non-registry Staff, other than ``user``, whom ``user`` may send to."""
+    from organization.models import Staff
+
+    staff = getattr(user, "staff", None)
+    qs = Staff.objects.exclude(registry_role=True).exclude(user=user)
+    if staff is None:
+        return qs.none()
+    pks = allowed_recipient_pks(staff, mode=mode, file=file)
+    return qs if pks is None else qs.filter(pk__in=pks)
@@ -0,0 +1,45 @@
+from audit_log.writer import entries_written
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from notifications.badges import invalidate_pending
+
+from . import rollups
+from .counters import apply_deltas, counter_key, move_department
+from .grants import invalidate_grants
+
+
+@receiver(post_save, sender="document_management.FileAccessRequest")
+@receiver(post_delete, sender="document_management.FileAccessRequest")
+def access_request_changed(sender, instance, **kwargs):
+    invalidate_grants(instance.requested_by_id)
+    invalidate_pending()
+
+
+@receiver(post_delete, sender="document_management.File")
+def file_deleted(sender, instance, **kwargs):
+    apply_deltas({counter_key(instance): -1})
+
+
+@receiver(pre_delete, sender="organization.Department")
+def department_deleted(sender, instance, **kwargs):
+    # The department's files are about to have their department set to NULL
+    move_department(instance.pk)
+    rollups.move_department(instance.pk)
+
+
+@receiver(post_save, sender="audit_log.AuditLogEntry")
+def audit_entry_written(sender, instance, created, **kwargs):
+    # Entries saved directly; those from log_action arrive via entries_written
+    if created:
+        rollups.record_activity(instance.timestamp, instance.user_id, rollups.SOURCE_AUDIT, instance.action)
+
+
+@receiver(entries_written)
+def audit_entries_written(sender, entries, **kwargs):
+    rollups.record_audit_entries(entries)
+
+
+@receiver(post_save, sender="document_management.FileMovement")
+def movement_written(sender, instance, created, **kwargs):
+    if created:
+        rollups.record_activity(instance.moved_at, instance.sent_by_id, rollups.SOURCE_MOVEMENT, instance.action)
@@ -0,0 +1,154 @@
+"""
+Approval step SLA tracking and escalation.
+
+A step's clock starts when it becomes its chain's current step
+(``ApprovalStep.mark_current``) and stops when the approver acts on it
+(``ApprovalStep.record_action``), which stores the wait in ``wait_time``.
+
+``escalate_overdue_steps`` runs from the escalate_overdue_approval_steps
+task: it finds every current step that has waited longer than
+``settings.APPROVAL_STEP_SLA_HOURS`` in one query and sends each approver's
+head a single notification listing all of the overdue steps under them. A
+step that keeps waiting is escalated again after every further SLA period.
+
+``wait_percentiles`` summarises step waits for the approval chain lists.
+"""
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from organization.snapshot import get_snapshot
+
+SLA_PERCENTILES = {"p50": 0.5, "p90": 0.9}
+
+# Actioned steps older than this are left out of the wait percentiles
+SLA_WINDOW_DAYS = 30
+
+
+def sla_threshold():
+    return timedelta(hours=settings.APPROVAL_STEP_SLA_HOURS)
+
+
+def current_steps():
+    """Steps waiting on their approver: the current step of each active chain."""
+    from .models import ApprovalStep
+
+    return ApprovalStep.objects.filter(chain__status="active", chain__current_step=F("order"), status="pending")
+
+
+def overdue_steps(now=None):
+    """Current steps past the SLA that have not been escalated within the last SLA period."""
+    cutoff = (now or timezone.now()) - sla_threshold()
+    return current_steps().filter(Q(escalated_at__isnull=True) | Q(escalated_at__lte=cutoff), started_at__lte=cutoff)
+
+
+def escalation_head_id(staff, snapshot=None):
+    """
+    The nearest head above ``staff``: unit head → section head → division
+    head → HOD, skipping posts ``staff`` holds themselves. None at the top.
+    """
+    snapshot = snapshot or get_snapshot()
+    department_id = staff.department_id or snapshot.unit_department.get(staff.unit_id)
+    for heads, org_id in (
+        (snapshot.unit_heads, staff.unit_id),
+        (snapshot.section_heads, staff.section_id),
+        (snapshot.division_heads, staff.division_id),
+        (snapshot.department_heads, department_id),
+    ):
+        head_id = heads.get(org_id) if org_id else None
+        if head_id and head_id != staff.pk:
+            return head_id
+    return None
+
+
+def escalate_overdue_steps(now=None):
+    """
+    Notify the heads of approvers sitting on overdue steps, one notification
+    per head, and stamp the steps as escalated. Approvers with nobody above
+    them are reminded directly. Returns (steps escalated, people notified).
+    """
+    from notifications.utils import create_notification
+    from organization.models import Staff
+
+    from .models import ApprovalStep
+
+    now = now or timezone.now()
+    steps = list(
+        overdue_steps(now).select_related("approver", "chain__file", "chain__document__file").order_by("started_at")
+    )
+    if not steps:
+        return 0, 0
+
+    snapshot = get_snapshot()
+    by_recipient = {}
+    for step in steps:
+        recipient_id = escalation_head_id(step.approver, snapshot) or step.approver_id
+        by_recipient.setdefault(recipient_id, []).append(step)
+    recipients = Staff.objects.select_related("user").in_bulk(by_recipient)
+
+    for recipient_id, recipient_steps in by_recipient.items():
+        recipient = recipients.get(recipient_id)
+        if recipient is None or recipient.user is None:
+            continue
+        lines = [
+            f"{step.chain._get_file().file_number} (step {step.order}, {step.approver}, "
+            f"waiting {to_hours(now - step.started_at)}h)"
+            for step in recipient_steps
+        ]
+        file_obj = recipient_steps[0].chain._get_file()
+        create_notification(
+            user=recipient.user,
+            message=(
+                f"{len(recipient_steps)} approval step(s) have waited longer than "
+                f"{settings.APPROVAL_STEP_SLA_HOURS}h: " + "; ".join(lines)
+            ),
+            obj=file_obj if len(recipient_steps) == 1 else None,
+            link=file_obj.get_absolute_url() if len(recipient_steps) == 1 else None,
+        )
+
+    ApprovalStep.objects.filter(pk__in=[step.pk for step in steps]).update(escalated_at=now)
+    return len(steps), len(recipients)
+
+
+def wait_percentiles(steps, percentiles=SLA_PERCENTILES, now=None):
+    """
+    Nearest-rank percentiles of ``wait_time`` over the ``steps`` queryset
+    actioned in the last SLA_WINDOW_DAYS days, plus the ``sample_size``.
+    Percentiles are None when there is nothing to measure.
+    """
+    since = (now or timezone.now()) - timedelta(days=SLA_WINDOW_DAYS)
+    waits = steps.filter(wait_time__isnull=False, actioned_at__gte=since).order_by()
+    sample_size = waits.count()
+    result = {"sample_size": sample_size, **dict.fromkeys(percentiles)}
+    if not sample_size:
+        return result
+    ranks = {name: max(1, math.ceil(sample_size * fraction)) for name, fraction in percentiles.items()}
+    ranked = waits.annotate(position=Window(RowNumber(), order_by=[F("wait_time").asc(), F("pk").asc()]))
+    by_rank = dict(ranked.filter(position__in=set(ranks.values())).values_list("position", "wait_time"))
+    result.update({name: by_rank.get(rank) for name, rank in ranks.items()})
+    return result
+
+
+def sla_summary(waits, waiting, now=None):
+    """
+    Figures for an approval chain list: ``wait_percentiles`` over the
+    ``waits`` steps, the SLA in hours and how many of the ``waiting`` steps
+    are past it.
+    """
+    now = now or timezone.now()
+    percentiles = wait_percentiles(waits, now=now)
+    return {
+        "sample_size": percentiles["sample_size"],
+        **{f"{name}_hours": to_hours(percentiles[name]) for name in SLA_PERCENTILES},
+        "threshold_hours": settings.APPROVAL_STEP_SLA_HOURS,
+        "overdue": waiting.aggregate(n=Count("pk", filter=Q(started_at__lte=now - sla_threshold())))["n"],
+    }
+
+
+def to_hours(duration):
+    """A duration in hours to one decimal place, or None for no duration."""
+    return None if duration is None else round(duration.total_seconds() / 3600, 1)
@@ -0,0 +1,140 @@
+"""
+Dashboard counters computed with conditional aggregation.
+
+Every dashboard used to issue one ``count()`` per tile over the same scoped
+queryset. ``StatsService`` computes all the counters a dashboard needs from a
+table in a single ``aggregate(Count(..., filter=Q(...)))`` query, so the cost
+of a dashboard no longer grows with the number of tiles on it.
+
+The service takes the same scope the dashboards used before: a File queryset
+(``File.objects.within_org_node(...)``, ``File.objects.filter(owner=...)``,
+...) and, where relevant, a Staff queryset.
+"""
+
+from datetime import timedelta
+
+from core.constants import STATUS_CHOICES
+from core.utils.dates import day_range
+from django.db.models import Count, Q
+from django.utils import timezone
+from organization.models import Staff
+
+from .models import Document, File, custody_overdue_q
+
+
+def outgoing_q():
+    """Active files held by someone outside the registry."""
+    registry_ids = Staff.objects.filter(registry_role=True).values("pk")
+    return Q(status="active", current_location__isnull=False) & ~Q(current_location_id__in=registry_ids)
+
+
+class StatsService:
+    def __init__(self, files=None, now=None):
+        self.files = File.objects.all() if files is None else files
+        self.now = now or timezone.now()
+        self.today = timezone.localdate(self.now)
+        self.start_of_today = timezone.localtime(self.now).replace(hour=0, minute=0, second=0, microsecond=0)
+        # Half-open [midnight, next midnight) range, so the timestamp indexes apply
+        self.today_since, self.today_until = day_range(self.today)
+
+    def file_counts(self):
+        """
+        Counters over the scoped files: ``total``, one per status value,
+        ``personal``/``policy``, ``outgoing``/``overdue``,
+        ``created_this_week`` and ``owners_with_personal_file``.
+        """
+        outgoing = outgoing_q()
+        return self.files.aggregate(
+            total=Count("pk"),
+            **{status: Count("pk", filter=Q(status=status)) for status, _ in STATUS_CHOICES},
+            personal=Count("pk", filter=Q(file_type="personal")),
+            policy=Count("pk", filter=Q(file_type="policy")),
+            outgoing=Count("pk", filter=outgoing),
+            overdue=Count("pk", filter=outgoing & custody_overdue_q(now=self.now)),
+            created_this_week=Count("pk", filter=Q(created_at__gte=self.start_of_today - timedelta(days=7))),
+            owners_with_personal_file=Count("owner", filter=Q(file_type="personal"), distinct=True),
+        )
+
+    def holder_counts(self, staff):
+        """
+        Counters for one staff member's own dashboard: files they ``owned``
+        (and of those ``owned_active``/``owned_pending_activation``) and files
+        ``in_custody`` with them that they do not own.
+        """
+        not_owner = ~Q(owner=staff) | Q(owner__isnull=True)
+        return File.objects.filter(Q(owner=staff) | Q(current_location=staff)).aggregate(
+            owned=Count("pk", filter=Q(owner=staff)),
+            owned_active=Count("pk", filter=Q(owner=staff, status="active")),
+            owned_pending_activation=Count("pk", filter=Q(owner=staff, status="pending_activation")),
+            in_custody=Count("pk", filter=Q(current_location=staff) & not_owner),
+        )
+
+    def document_counts(self, documents=None):
+        """``total``, ``added_today`` and ``added_this_month`` over documents in the scoped files."""
+        if documents is None:
+            documents = Document.objects.filter(file__in=self.files)
+        start_of_month = self.now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return documents.aggregate(
+            total=Count("pk"),
+            added_today=Count("pk", filter=Q(uploaded_at__gte=self.today_since, uploaded_at__lt=self.today_until)),
+            added_this_month=Count("pk", filter=Q(uploaded_at__gte=start_of_month)),
+        )
+
+    def staff_counts(self, staff=None):
+        """``total`` staff in scope and ``without_personal_file`` among the non-registry ones."""
+        staff = Staff.objects.all() if staff is None else staff
+        with_files = File.objects.filter(file_type="personal", owner__isnull=False).values("owner_id")
+        return staff.aggregate(
+            total=Count("pk"),
+            without_personal_file=Count("pk", filter=Q(registry_role=False) & ~Q(pk__in=with_files)),
+        )
+
+    def user_counts(self):
+        from django.contrib.auth import get_user_model
+
+        return get_user_model().objects.aggregate(
+            total=Count("pk"),
+            active=Count("pk", filter=Q(is_active=True)),
+            inactive=Count("pk", filter=Q(is_active=False)),
+            locked=Count("pk", filter=Q(lockout_until__gt=self.now)),
+            must_change_password=Count("pk", filter=Q(must_change_password=True)),
+        )
+
+    def activity_today(self):
+        """Audit log counters for today: ``actions``, ``documents_added`` and ``files_created``."""
+        from audit_log.models import AuditLogEntry
+
+        today = AuditLogEntry.objects.filter(timestamp__gte=self.today_since, timestamp__lt=self.today_until)
+        return today.aggregate(
+            actions=Count("pk"),
+            documents_added=Count("pk", filter=Q(action="DOCUMENT_ADDED")),
+            files_created=Count("pk", filter=Q(action="FILE_CREATED")),
+        )
+
+
+def executive_counters(files, staff=None, now=None):
+    """
+    The executive dashboard tiles for a scope, as a JSON-serialisable dict:
+    file counters over ``files`` and, when ``staff`` is given, staff coverage
+    counters over that Staff queryset.
+    """
+    stats = StatsService(files, now=now)
+    file_counts = stats.file_counts()
+    counters = {
+        "total_files": file_counts["total"],
+        "active_files": file_counts["active"],
+        "pending_activation": file_counts["pending_activation"],
+        "closed_files": file_counts["closed"],
+        "archived_files": file_counts["archived"],
+        "personal_files_count": file_counts["personal"],
+        "policy_files_count": file_counts["policy"],
+        "outgoing_files_count": file_counts["outgoing"],
+        "outgoing_overdue_count": file_counts["overdue"],
+        "docs_added_today": stats.document_counts()["added_today"],
+        "files_created_this_week": file_counts["created_this_week"],
+    }
+    if staff is not None:
+        counters["total_staff"] = staff.count()
+        counters["staff_with_files_count"] = file_counts["owners_with_personal_file"]
+        counters["staff_without_files_count"] = counters["total_staff"] - counters["staff_with_files_count"]
+    return counters
@@ -3,7 +3,6 @@ import contextlib
 from celery import shared_task
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils import timezone
 
@@ -20,59 +19,61 @@ def send_file_retention_reminders():
     from .models import File
 
     # Find registry staff to exclude
-    registry_ids = Staff.objects.filter(
-        Q(designation__name__icontains="registry") | Q(user__groups__name__iexact="Registry")
-    ).values_list("id", flat=True)
+    registry_ids = Staff.objects.filter(registry_role=True).values_list("id", flat=True)
 
     # Files with a non-registry current custodian
-    files = File.objects.filter(
-        status__in=("active", "in_transit"),
-        current_location__isnull=False,
-    ).exclude(current_location__id__in=registry_ids)
+    files = (
+        File.objects.filter(
+            status__in=("active", "in_transit"),
+            current_location__isnull=False,
+        )
+        .exclude(current_location__id__in=registry_ids)
+        .overdue(threshold_days=2)
+        .select_related("current_location__user")
+    )
 
     reminded_count = 0
     for file_obj in files:
-        if file_obj.is_overdue(threshold_days=2):
-            custodian = file_obj.current_location
-            if not custodian or not custodian.user:
-                continue
-
-            duration = file_obj.get_custody_duration()
-            # Send in-app notification
-            create_notification(
-                user=custodian.user,
-                message=(
-                    f"REMINDER: File {file_obj.file_number} — "
-                    f"{file_obj.title} has been with you for {duration} day(s). "
-                    f"Please action and forward."
-                ),
-                obj=file_obj,
-                link=file_obj.get_absolute_url(),
+        custodian = file_obj.current_location
+        if not custodian or not custodian.user:
+            continue
+
+        duration = file_obj.get_custody_duration()
+        # Send in-app notification
+        create_notification(
+            user=custodian.user,
+            message=(
+                f"REMINDER: File {file_obj.file_number} — "
+                f"{file_obj.title} has been with you for {duration} day(s). "
+                f"Please action and forward."
+            ),
+            obj=file_obj,
+            link=file_obj.get_absolute_url(),
+        )
+
+        # Send email notification
+        subject = f"PIMS Reminder: File {file_obj.file_number} - Action Required"
+        email_context = {
+            "user": custodian.user,
+            "file": file_obj,
+            "duration_days": duration,
+            "site_name": "PIMS",
+            "file_url": f"{settings.BASE_URL}{file_obj.get_absolute_url()}",
+        }
+        html_message = render_to_string("emails/file_retention_reminder.html", email_context)
+        text_message = render_to_string("emails/file_retention_reminder.txt", email_context)
+
+        with contextlib.suppress(Exception):
+            send_mail(
+                subject=subject,
+                message=text_message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[custodian.user.email],
+                html_message=html_message,
+                fail_silently=True,
             )
 
-            # Send email notification
-            subject = f"PIMS Reminder: File {file_obj.file_number} - Action Required"
-            email_context = {
-                "user": custodian.user,
-                "file": file_obj,
-                "duration_days": duration,
-                "site_name": "PIMS",
-                "file_url": f"{settings.BASE_URL}{file_obj.get_absolute_url()}",
-            }
-            html_message = render_to_string("emails/file_retention_reminder.html", email_context)
-            text_message = render_to_string("emails/file_retention_reminder.txt", email_context)
-
-            with contextlib.suppress(Exception):
-                send_mail(
-                    subject=subject,
-                    message=text_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[custodian.user.email],
-                    html_message=html_message,
-                    fail_silently=True,
-                )
-
-            reminded_count += 1
+        reminded_count += 1
 
     return f"Sent {reminded_count} retention reminders"
 
@@ -113,3 +114,51 @@ def send_urgent_document_reminders():
             reminded += 1
 
     return f"Sent {reminded} urgent document reminders"
+
+
+@shared_task
+def refresh_dashboard_snapshots():
+    """
+    Precompute the executive dashboard counters for the whole organization
+    and for every department and unit, so dashboards render from a
+    DashboardSnapshot instead of recomputing them on every visit.
+    """
+    from organization.models import Department, Staff, Unit
+    from organization.snapshot import get_snapshot
+
+    from .models import DashboardSnapshot, File
+    from .stats import executive_counters
+
+    now = timezone.now()
+    org = get_snapshot()
+    scopes = [(DashboardSnapshot.SCOPE_ORGANIZATION, None, File.objects.all(), None)]
+    for kind, model, nodes in (
+        (DashboardSnapshot.SCOPE_DEPARTMENT, Department, org.departments),
+        (DashboardSnapshot.SCOPE_UNIT, Unit, org.units),
+    ):
+        for node in nodes:
+            key = (model._meta.model_name, node.pk)
+            scopes.append((kind, node.pk, File.objects.within_org_node(key), Staff.objects.within_org_node(key)))
+
+    DashboardSnapshot.objects.bulk_create(
+        [
+            DashboardSnapshot(scope_kind=kind, scope_id=scope_id, data=executive_counters(files, staff=staff, now=now))
+            for kind, scope_id, files, staff in scopes
+        ]
+    )
+    retention = timezone.timedelta(hours=settings.DASHBOARD_SNAPSHOT_RETENTION_HOURS)
+    DashboardSnapshot.objects.filter(created_at__lt=now - retention).delete()
+
+    return f"Wrote {len(scopes)} dashboard snapshots"
+
+
+@shared_task
+def escalate_overdue_approval_steps():
+    """
+    Escalate approval steps that have waited longer than
+    APPROVAL_STEP_SLA_HOURS to their approver's head, one notification per head.
+    """
+    from .sla import escalate_overdue_steps
+
+    steps, notified = escalate_overdue_steps()
+    return f"Escalated {steps} approval steps to {notified} recipients"
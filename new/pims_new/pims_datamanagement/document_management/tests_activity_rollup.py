@@ -0,0 +1,163 @@
+"""
+Tests for the DailyActivityRollup table and the activity report built on it.
+
+Covers:
+1. Audit entries and file movements bump the rollup row for their day, department and action
+2. backfill_activity_rollup recomputes the rollup for all of history or for a date range
+3. get_activity_report groups by day, week and month, filters by department and reads only the rollup
+4. Deleting a department folds its rows into the "no department" rows
+5. DailyFileMovementReportView takes a date range and grouping and exports CSV
+"""
+
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+
+from audit_log.models import AuditLogEntry
+from audit_log.utils import log_action
+from audit_log.writer import audit_buffer
+from core.testing import make_staff, make_user
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from organization.models import Department, Unit
+
+from document_management.models import DailyActivityRollup, File, FileMovement
+from document_management.reports import get_activity_report
+
+
+def at(day, hour=12):
+    return datetime.combine(day, time(hour), timezone.get_current_timezone())
+
+
+class ActivityRollupTest(TestCase):
+    def setUp(self):
+        self.it = Department.objects.create(name="IT", code="IT")
+        self.hr = Department.objects.create(name="HR", code="HR")
+        self.registry_user = make_user("registry", "Registry")
+        make_staff(self.registry_user, "Registry Officer", self.it)
+        # Only assigned to a unit: counted under the unit's department
+        self.hr_user = make_user("hr_officer")
+        self.hr_staff = make_staff(self.hr_user, unit=Unit.objects.create(name="Payroll", department=self.hr))
+        self.file = File.objects.create(
+            title="ROLLUP FILE", file_type="policy", department=self.it, created_by=self.registry_user
+        )
+        # Start from the rows the entries below write, not the user/staff creation noise
+        DailyActivityRollup.objects.all().delete()
+        self.today = timezone.localdate()
+
+    def _rows(self):
+        return {
+            (r.date, r.department_id, r.source, r.action): r.count
+            for r in DailyActivityRollup.objects.exclude(action__startswith="USER_")
+        }
+
+    def _backdate(self, model, field, pk, day):
+        model.objects.filter(pk=pk).update(**{field: at(day)})
+
+    def test_writes_bump_rollup(self):
+        with audit_buffer():
+            log_action(self.registry_user, "FILE_CREATED", obj=self.file)
+            log_action(self.registry_user, "FILE_CREATED", obj=self.file)
+            log_action(self.hr_user, "FILE_ACTIVATED", obj=self.file)
+        FileMovement.objects.create(file=self.file, sent_by=self.hr_user, sent_to=self.hr_staff)
+        self.assertEqual(
+            self._rows(),
+            {
+                (self.today, self.it.pk, "audit", "FILE_CREATED"): 2,
+                (self.today, self.hr.pk, "audit", "FILE_ACTIVATED"): 1,
+                (self.today, self.hr.pk, "movement", "sent"): 1,
+            },
+        )
+
+    def test_backfill_command(self):
+        day = self.today - timedelta(days=10)
+        with audit_buffer():
+            log_action(self.registry_user, "FILE_CREATED", obj=self.file)
+        old = AuditLogEntry.objects.latest("pk")
+        self._backdate(AuditLogEntry, "timestamp", old.pk, day)
+        with audit_buffer():
+            log_action(self.hr_user, "FILE_ACTIVATED", obj=self.file)
+        movement = FileMovement.objects.create(file=self.file, sent_by=self.hr_user)
+        self._backdate(FileMovement, "moved_at", movement.pk, day)
+
+        # Only the range is recomputed: the backdated rows move, today's row stays
+        call_command("backfill_activity_rollup", "--start", str(day), "--end", str(day), stdout=StringIO())
+        rows = self._rows()
+        self.assertEqual(rows[(day, self.it.pk, "audit", "FILE_CREATED")], 1)
+        self.assertEqual(rows[(day, self.hr.pk, "movement", "sent")], 1)
+        self.assertEqual(rows[(self.today, self.it.pk, "audit", "FILE_CREATED")], 1)
+
+        DailyActivityRollup.objects.all().delete()
+        out = StringIO()
+        call_command("backfill_activity_rollup", stdout=out)
+        self.assertIn("rollup row(s)", out.getvalue())
+        rows = self._rows()
+        self.assertNotIn((self.today, self.it.pk, "audit", "FILE_CREATED"), rows)
+        self.assertEqual(rows[(day, self.it.pk, "audit", "FILE_CREATED")], 1)
+        self.assertEqual(rows[(self.today, self.hr.pk, "audit", "FILE_ACTIVATED")], 1)
+
+    def test_report_grouping_and_filters(self):
+        start = date(2026, 1, 1)
+        for offset, action, department in (
+            (0, "FILE_CREATED", self.it),
+            (1, "FILE_CREATED", self.hr),
+            (40, "FILE_ACTIVATED", self.it),
+        ):
+            DailyActivityRollup.objects.create(
+                date=start + timedelta(days=offset), department=department, source="audit", action=action, count=3
+            )
+        DailyActivityRollup.objects.create(date=start, department=self.it, source="movement", action="sent", count=2)
+        DailyActivityRollup.objects.create(date=start, department=self.it, source="audit", action="LOGIN", count=9)
+
+        with self.assertNumQueries(1):
+            report = get_activity_report(start, start + timedelta(days=60), group_by="month")
+        self.assertEqual(
+            [(r["period"], r["created"], r["activated"], r["moved"]) for r in report["periods"]],
+            [(date(2026, 1, 1), 6, 0, 2), (date(2026, 2, 1), 0, 3, 0)],
+        )
+        self.assertEqual(report["totals"]["created"], 6)
+
+        report = get_activity_report(start, start + timedelta(days=2), department_id=self.hr.pk)
+        self.assertEqual([(r["period"], r["created"]) for r in report["periods"]], [(date(2026, 1, 2), 3)])
+        # The end date is exclusive
+        self.assertEqual(get_activity_report(start, start + timedelta(days=1))["totals"]["created"], 3)
+        self.assertEqual(len(get_activity_report(start, start + timedelta(days=60), group_by="week")["periods"]), 2)
+
+    def test_department_delete_folds_rows(self):
+        with audit_buffer():
+            log_action(self.hr_user, "FILE_ACTIVATED", obj=self.file)
+        DailyActivityRollup.objects.create(date=self.today, source="audit", action="FILE_ACTIVATED", count=1)
+        self.hr.delete()
+        self.assertEqual(self._rows(), {(self.today, None, "audit", "FILE_ACTIVATED"): 2})
+
+
+class ActivityReportViewTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="IT", code="IT")
+        self.admin = make_user("admin", is_superuser=True)
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse("document_management:report_daily_movement")
+        DailyActivityRollup.objects.create(
+            date=date(2026, 3, 2), department=self.dept, source="audit", action="FILE_CREATED", count=4
+        )
+
+    def test_range_and_grouping(self):
+        r = self.client.get(self.url, {"start": "2026-03-01", "end": "2026-03-31", "group": "week"})
+        self.assertEqual(r.status_code, 200)
+        report = r.context["report"]
+        self.assertEqual((report["start"], report["end"]), (date(2026, 3, 1), date(2026, 4, 1)))
+        self.assertEqual(report["group_by"], "week")
+        self.assertEqual(report["totals"]["created"], 4)
+
+    def test_csv_export(self):
+        r = self.client.get(self.url, {"start": "2026-03-01", "end": "2026-03-07", "export": "csv"})
+        lines = r.content.decode().splitlines()
+        self.assertEqual(lines[0], "Period,Files Created,Files Activated,Files Moved,Documents Added")
+        self.assertEqual(lines[1], "2026-03-02,4,0,0,0")
+        self.assertEqual(lines[2], "Total,4,0,0,0")
+
+    def test_invalid_range_falls_back_to_today(self):
+        r = self.client.get(self.url, {"start": "2026-03-07", "end": "2026-03-01"})
+        self.assertEqual(r.context["report"]["start"], timezone.localdate())
@@ -0,0 +1,144 @@
+"""
+Tests for approval step SLA tracking (document_management.sla).
+
+Covers:
+1. Starting, advancing and rejecting a chain start the current step's clock; actioning it stores the wait
+2. escalate_overdue_steps sends one notification per head and does not repeat within an SLA period
+3. Approvers with nobody above them are reminded directly
+4. wait_percentiles returns nearest-rank percentiles of recent waits
+5. The chain lists show the SLA figures and flag steps waiting past the SLA
+"""
+
+from datetime import timedelta
+
+from core.testing import make_staff, make_user
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from notifications.models import Notification
+from organization.models import Department, StaffSignature, Unit
+
+from document_management.models import ApprovalChain, ApprovalStep, File
+from document_management.sla import escalate_overdue_steps, overdue_steps, wait_percentiles
+
+
+@override_settings(APPROVAL_STEP_SLA_HOURS=24)
+class ApprovalSlaTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.dept = Department.objects.create(name="IT", code="IT")
+        self.unit = Unit.objects.create(name="Helpdesk", department=self.dept)
+        self.registry_user = make_user("registry", "Registry")
+        make_staff(self.registry_user, "Registry Officer", self.dept)
+        self.hod = make_staff(make_user("hod"), dept=self.dept)
+        self.unit_head = make_staff(make_user("unit_head"), unit=self.unit)
+        self.officer = make_staff(make_user("officer"), unit=self.unit)
+        self.dept.head = self.hod
+        self.dept.save()
+        self.unit.head = self.unit_head
+        self.unit.save()
+        self.owner = make_user("owner")
+
+    def _chain(self, *approvers, waited_hours=0):
+        """An active chain at step 1 whose clock started ``waited_hours`` ago."""
+        file_obj = File.objects.create(
+            title="SLA FILE", file_type="policy", department=self.dept, created_by=self.registry_user, status="active"
+        )
+        chain = ApprovalChain.objects.create(file=file_obj, created_by=self.owner, status="active", current_step=1)
+        steps = [
+            ApprovalStep.objects.create(chain=chain, approver=staff, order=i) for i, staff in enumerate(approvers, 1)
+        ]
+        steps[0].mark_current(self.now - timedelta(hours=waited_hours))
+        return chain, steps
+
+    def test_clock_follows_the_current_step(self):
+        chain, (first, second) = self._chain(self.officer, self.unit_head, waited_hours=5)
+        first.status = "approved"
+        first.record_action(self.now)
+        first.save()
+        self.assertEqual(first.wait_time, timedelta(hours=5))
+
+        chain.advance()
+        second.refresh_from_db()
+        self.assertIsNotNone(second.started_at)
+
+        first.refresh_from_db()
+        chain.reject_to_previous(2)
+        first.refresh_from_db()
+        self.assertGreater(first.started_at, self.now)
+
+    def test_chain_start_view_starts_the_clock(self):
+        file_obj = File.objects.create(
+            title="DRAFT", file_type="policy", department=self.dept, created_by=self.owner, status="active"
+        )
+        chain = ApprovalChain.objects.create(file=file_obj, created_by=self.owner, status="draft")
+        step = ApprovalStep.objects.create(chain=chain, approver=self.officer, order=1)
+        client = Client()
+        client.force_login(self.owner)
+        client.post(reverse("document_management:chain_start", kwargs={"file_pk": file_obj.pk}))
+        step.refresh_from_db()
+        self.assertIsNotNone(step.started_at)
+
+    def test_step_action_view_stores_wait(self):
+        _, (step,) = self._chain(self.officer, waited_hours=3)
+        StaffSignature.objects.create(
+            staff=self.officer,
+            image=SimpleUploadedFile("sig.png", b"fake-image", content_type="image/png"),
+            is_active=True,
+            is_verified=True,
+        )
+        client = Client()
+        client.force_login(self.officer.user)
+        client.post(reverse("document_management:step_action", kwargs={"step_pk": step.pk}), {"action": "approve"})
+        step.refresh_from_db()
+        self.assertGreaterEqual(step.wait_time, timedelta(hours=3))
+
+    def test_escalation_is_batched_per_head(self):
+        self._chain(self.officer, waited_hours=30)
+        self._chain(self.officer, waited_hours=40)
+        self._chain(self.unit_head, waited_hours=30)
+        self._chain(self.officer, waited_hours=2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(overdue_steps(self.now).count(), 3)
+        self.assertEqual(escalate_overdue_steps(self.now), (3, 2))
+        # The officer's two steps go to the unit head in one notification; the unit head's to the HOD
+        unit_head_notes = Notification.objects.filter(user=self.unit_head.user)
+        self.assertEqual(unit_head_notes.count(), 1)
+        self.assertIn("2 approval step(s)", unit_head_notes.get().message)
+        self.assertEqual(Notification.objects.filter(user=self.hod.user).count(), 1)
+
+        # Not again until another SLA period has passed, by which time the fourth step is overdue too
+        self.assertEqual(escalate_overdue_steps(self.now + timedelta(hours=1)), (0, 0))
+        self.assertEqual(escalate_overdue_steps(self.now + timedelta(hours=25))[0], 4)
+
+    def test_top_approver_is_reminded(self):
+        self._chain(self.hod, waited_hours=30)
+        self.assertEqual(escalate_overdue_steps(self.now), (1, 1))
+        self.assertEqual(Notification.objects.filter(user=self.hod.user).count(), 1)
+
+    def test_wait_percentiles(self):
+        for hours in (1, 2, 3, 4, 10):
+            _, (step,) = self._chain(self.officer, waited_hours=hours)
+            step.record_action(self.now)
+            step.save()
+        _, (old,) = self._chain(self.officer, waited_hours=100)
+        old.record_action(self.now - timedelta(days=40))
+        old.save()
+        result = wait_percentiles(ApprovalStep.objects.all(), now=self.now)
+        self.assertEqual(result, {"sample_size": 5, "p50": timedelta(hours=3), "p90": timedelta(hours=10)})
+        self.assertEqual(wait_percentiles(ApprovalStep.objects.none())["p50"], None)
+
+    def test_chain_lists_show_sla(self):
+        self._chain(self.officer, waited_hours=30)
+        client = Client()
+        client.force_login(self.officer.user)
+        r = client.get(reverse("document_management:my_chains"))
+        self.assertEqual(r.context["sla"]["overdue"], 1)
+        self.assertContains(r, "over SLA")
+
+        client.force_login(self.registry_user)
+        r = client.get(reverse("document_management:all_active_chains"))
+        self.assertEqual(r.context["sla"]["threshold_hours"], 24)
+        self.assertContains(r, "over SLA")
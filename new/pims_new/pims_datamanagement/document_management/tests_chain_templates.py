@@ -0,0 +1,94 @@
+"""
+Tests for chain template resolution.
+
+Covers:
+1. resolve_all() resolves every role type
+2. Resolving a template costs the same number of queries for 2 or 10 steps
+3. Applying a template bulk-creates the approval steps
+4. The preview endpoint shows resolved approvers before a chain exists
+"""
+
+from core.testing import make_staff, make_user
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from organization.models import Department, Staff, Unit
+
+from document_management.models import ApprovalChain, ChainTemplate, ChainTemplateStep, Document, File
+
+
+class ChainTemplateResolutionTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="IT Dept", code="IT")
+        self.hod = make_staff(make_user("hod"), dept=self.dept)
+        self.dept.head = self.hod
+        self.dept.save()
+        self.manager = make_staff(make_user("manager"), dept=self.dept)
+        self.unit = Unit.objects.create(name="Helpdesk", department=self.dept, head=self.manager)
+        self.sender = make_staff(make_user("sender"), dept=self.dept, unit=self.unit)
+        self.accountant = make_staff(make_user("accountant"), "Accountant", self.dept)
+        self.dg = make_staff(make_user("dg", "Executive"))
+        self.template = ChainTemplate.objects.create(name="Leave")
+
+    def _add_steps(self, template, role_types):
+        accountant_designation = self.accountant.designation
+        for order, role_type in enumerate(role_types, start=1):
+            ChainTemplateStep.objects.create(
+                template=template,
+                order=order,
+                role_type=role_type,
+                designation=accountant_designation if role_type == "designation" else None,
+                staff=self.hod if role_type == "specific_person" else None,
+            )
+
+    def _sender(self):
+        return Staff.objects.select_related("user").get(pk=self.sender.pk)
+
+    def test_resolves_each_role_type(self):
+        self._add_steps(self.template, ["unit_manager", "hod", "designation", "director_general", "specific_person"])
+        approvers = [approver for _, approver in self.template.resolve_all(self._sender())]
+        self.assertEqual(approvers, [self.manager, self.hod, self.accountant, self.dg, self.hod])
+
+    def test_unresolved_step(self):
+        self._add_steps(self.template, ["hod"])
+        self.template.steps.update(department_scope="specific")
+        self.assertEqual(self.template.resolve_all(self._sender())[0][1], None)
+
+    def test_query_count_does_not_grow_with_steps(self):
+        role_types = ["unit_manager", "hod", "designation", "director_general", "specific_person"]
+        small = ChainTemplate.objects.create(name="Small")
+        self._add_steps(small, role_types[:2] + role_types[2:4])
+        self._add_steps(self.template, role_types * 2)
+        sender = self._sender()
+        small.resolve_all(sender)  # loads the org snapshot into the cache
+
+        with CaptureQueriesContext(connection) as small_queries:
+            small.resolve_all(sender)
+        with CaptureQueriesContext(connection) as large_queries:
+            resolved = self.template.resolve_all(sender)
+        self.assertEqual(len(resolved), 10)
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_apply_and_preview(self):
+        self._add_steps(self.template, ["unit_manager", "hod", "director_general"])
+        file_obj = File.objects.create(
+            title="SENDER", file_type="personal", owner=self.sender, created_by=self.sender.user, status="active"
+        )
+        document = Document.objects.create(file=file_obj, title="Leave request", uploaded_by=self.sender.user)
+        client = Client()
+        client.force_login(self.sender.user)
+
+        preview = client.get(reverse("document_management:chain_template_preview"), {"template_id": self.template.pk})
+        self.assertContains(preview, "manager")
+        self.assertFalse(ApprovalChain.objects.exists())
+
+        client.post(
+            reverse("document_management:chain_apply_template", kwargs={"file_pk": file_obj.pk}),
+            {"template_id": self.template.pk, "document_id": document.pk},
+        )
+        chain = ApprovalChain.objects.get(document=document)
+        self.assertEqual(
+            list(chain.steps.values_list("order", "approver_id")),
+            [(1, self.manager.pk), (2, self.hod.pk), (3, self.dg.pk)],
+        )
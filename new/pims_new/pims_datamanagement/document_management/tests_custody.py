@@ -0,0 +1,172 @@
+"""
+Tests for the denormalized File.custody_since column.
+
+Covers:
+1. custody_since is stamped when current_location changes, including saves with update_fields
+2. Saves that leave current_location alone keep the custody clock running
+3. File.objects.overdue() agrees with File.is_overdue() and runs in one query
+4. The retention reminder task only notifies custodians of overdue files
+5. with_custody() annotates custody start, time held and the overdue flag
+6. The registry and executive outgoing registers sort, filter and paginate over every file
+"""
+
+from datetime import timedelta
+
+from core.testing import make_staff, make_user
+from django.contrib.auth.models import Permission
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from notifications.models import Notification
+from organization.models import Department
+
+from document_management.models import File
+from document_management.tasks import send_file_retention_reminders
+
+
+class CustodySinceTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="IT", code="IT")
+        self.registry_user = make_user("registry", "Registry")
+        make_staff(self.registry_user, "Registry Officer", self.dept)
+        self.holder = make_staff(make_user("holder"), dept=self.dept)
+        self.other = make_staff(make_user("other"), dept=self.dept)
+        self.file = self._file("CUSTODY FILE", self.holder)
+
+    def _file(self, title, holder):
+        return File.objects.create(
+            title=title,
+            file_type="policy",
+            department=self.dept,
+            current_location=holder,
+            created_by=self.registry_user,
+            status="active",
+        )
+
+    def _age(self, file_obj, days):
+        File.objects.filter(pk=file_obj.pk).update(created_at=timezone.now() - timedelta(days=days))
+
+    def test_new_file_counts_from_creation(self):
+        self.assertIsNone(self.file.custody_since)
+        self.assertEqual(self.file.custody_start, self.file.created_at)
+
+    def test_stamped_when_location_changes(self):
+        self._age(self.file, 5)
+        file_obj = File.objects.get(pk=self.file.pk)
+        self.assertEqual(file_obj.get_custody_duration(), 5)
+
+        file_obj.current_location = self.other
+        file_obj.save(update_fields=["current_location"])
+        file_obj = File.objects.get(pk=self.file.pk)
+        self.assertIsNotNone(file_obj.custody_since)
+        self.assertEqual(file_obj.get_custody_duration(), 0)
+
+    def test_unrelated_save_keeps_clock(self):
+        file_obj = File.objects.get(pk=self.file.pk)
+        file_obj.status = "closed"
+        file_obj.save(update_fields=["status"])
+        self.assertIsNone(File.objects.get(pk=self.file.pk).custody_since)
+
+        file_obj.current_location = self.other
+        file_obj.save()
+        stamped = File.objects.get(pk=self.file.pk).custody_since
+        file_obj.title = "renamed"
+        file_obj.save()
+        self.assertEqual(File.objects.get(pk=self.file.pk).custody_since, stamped)
+
+    def test_overdue_queryset_matches_is_overdue(self):
+        fresh = self._file("FRESH", self.other)
+        moved = self._file("MOVED", self.holder)
+        self._age(self.file, 3)
+        self._age(moved, 10)
+        File.objects.filter(pk=moved.pk).update(custody_since=timezone.now() - timedelta(days=1))
+
+        with self.assertNumQueries(1):
+            overdue = set(File.objects.overdue(threshold_days=2).values_list("pk", flat=True))
+        self.assertEqual(overdue, {self.file.pk})
+        for file_obj in File.objects.filter(pk__in=[self.file.pk, fresh.pk, moved.pk]):
+            with self.subTest(file=file_obj.title):
+                self.assertEqual(file_obj.pk in overdue, file_obj.is_overdue(threshold_days=2))
+
+    def test_retention_reminders_only_for_overdue(self):
+        self._file("FRESH", self.other)
+        self._age(self.file, 3)
+        self.assertEqual(send_file_retention_reminders(), "Sent 1 retention reminders")
+        self.assertTrue(Notification.objects.filter(user=self.holder.user).exists())
+        self.assertFalse(Notification.objects.filter(user=self.other.user).exists())
+
+
+class OutgoingRegisterTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="IT", code="IT")
+        self.registry_user = make_user("registry", "Registry")
+        make_staff(self.registry_user, "Registry Officer", self.dept)
+        self.executive = make_user("exec", "Executive")
+        self.executive.user_permissions.add(
+            Permission.objects.get(codename="view_file", content_type__app_label="document_management")
+        )
+        make_staff(self.executive, dept=self.dept)
+        holder = make_staff(make_user("holder"), dept=self.dept)
+
+        # 60 files out with the holder; every third one has been held for 10 days
+        files = [
+            File.objects.create(
+                title=f"OUT {i:02d}",
+                file_type="policy",
+                department=self.dept,
+                current_location=holder,
+                created_by=self.registry_user,
+                status="active",
+            )
+            for i in range(60)
+        ]
+        now = timezone.now()
+        for i, file_obj in enumerate(files):
+            held = 10 if i % 3 == 0 else 0
+            File.objects.filter(pk=file_obj.pk).update(custody_since=now - timedelta(days=held, minutes=i))
+        self.client = Client()
+
+    def test_with_custody_annotations(self):
+        file_obj = File.objects.with_custody().get(title="OUT 00")
+        self.assertEqual(file_obj.custody_held.days, 10)
+        self.assertTrue(file_obj.custody_overdue)
+        self.assertEqual(file_obj.custody_started_at, file_obj.custody_since)
+        self.assertFalse(File.objects.with_custody().get(title="OUT 01").custody_overdue)
+
+    def test_registry_register_counts_every_file(self):
+        self.client.force_login(self.registry_user)
+        r = self.client.get(reverse("document_management:registry_hub"))
+        self.assertEqual(r.context["outgoing_files_count"], 60)
+        self.assertEqual(r.context["outgoing_overdue_count"], 20)
+        self.assertEqual(r.context["outgoing_page"].paginator.num_pages, 3)
+
+    def test_registry_register_sort_and_filter(self):
+        self.client.force_login(self.registry_user)
+        r = self.client.get(
+            reverse("document_management:registry_hub"),
+            {"outgoing_sort": "longest", "outgoing_overdue": "1", "outgoing_page": "1"},
+            headers={"HX-Request": "true", "HX-Target": "outgoing-file-list"},
+        )
+        self.assertTemplateUsed(r, "document_management/partials/_registry_outgoing_list.html")
+        page = r.context["outgoing_page"]
+        self.assertEqual(page.paginator.count, 20)
+        self.assertTrue(all(f.custody_overdue for f in page))
+        # Longest held first: OUT 57 has been out a few minutes longer than OUT 00
+        self.assertEqual((page[0].title, page[-1].title), ("OUT 57", "OUT 00"))
+        self.assertNotIn("outgoing_page", r.context["outgoing_query"])
+
+    def test_executive_register_defaults_to_overdue(self):
+        self.client.force_login(self.executive)
+        r = self.client.get(reverse("document_management:executive_dashboard"))
+        self.assertEqual(r.context["outgoing_files_count"], 60)
+        self.assertEqual(r.context["outgoing_page"].paginator.count, 20)
+        held = [f.custody_held for f in r.context["outgoing_page"]]
+        self.assertEqual(held, sorted(held, reverse=True))
+
+        r = self.client.get(
+            reverse("document_management:executive_dashboard"),
+            {"outgoing_overdue": "0"},
+            headers={"HX-Request": "true", "HX-Target": "executive-outgoing-list"},
+        )
+        self.assertTemplateUsed(r, "document_management/partials/_executive_outgoing_list.html")
+        self.assertEqual(r.context["outgoing_page"].paginator.count, 60)
@@ -0,0 +1,150 @@
+"""
+Tests for the FileCounter table maintained by document_management.counters.
+
+Covers:
+1. File inserts, status/department changes (with and without update_fields) and deletes move the counters
+2. QuerySet update(), bulk_update() and bulk_create() keep the counters in step
+3. Deleting a department moves its counts to the "no department" keys
+4. A failed save leaves the counters untouched
+5. reconcile_file_counters reports drift and repairs it
+6. The registry pending-activation badge reads the counters
+"""
+
+from io import StringIO
+
+from core.testing import make_staff, make_user
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.test import RequestFactory, TestCase
+from notifications.context_processors import pending_activation_count
+from organization.models import Department
+
+from document_management.counters import counter_drift
+from document_management.models import File, FileCounter
+
+
+class FileCounterTest(TestCase):
+    def setUp(self):
+        self.it = Department.objects.create(name="IT", code="IT")
+        self.hr = Department.objects.create(name="HR", code="HR")
+        self.registry_user = make_user("registry", "Registry")
+        self.registry = make_staff(self.registry_user, "Registry Officer", self.it)
+
+    def _file(self, title, status="pending_activation", department=None):
+        return File.objects.create(
+            title=title,
+            file_type="policy",
+            department=department or self.it,
+            created_by=self.registry_user,
+            status=status,
+        )
+
+    def _count(self, **filters):
+        return FileCounter.objects.total(**filters)
+
+    def assertInStep(self):  # noqa: N802
+        self.assertEqual(counter_drift(), [])
+
+    def test_insert_status_change_and_delete(self):
+        file_obj = self._file("ONE")
+        self._file("TWO", status="active")
+        self.assertEqual(self._count(status="pending_activation"), 1)
+        self.assertEqual(self._count(department=self.it, file_type="policy"), 2)
+
+        file_obj.status = "active"
+        file_obj.save()
+        self.assertEqual(self._count(status="pending_activation"), 0)
+        self.assertEqual(self._count(status="active"), 2)
+
+        file_obj.department = self.hr
+        file_obj.save(update_fields=["department"])
+        self.assertEqual(self._count(department=self.hr, status="active"), 1)
+
+        file_obj.delete()
+        self.assertEqual(self._count(), 1)
+        self.assertInStep()
+
+    def test_update_fields_without_key_columns(self):
+        file_obj = self._file("ONE")
+        file_obj.status = "active"
+        file_obj.save(update_fields=["title"])
+        self.assertEqual(self._count(status="pending_activation"), 1)
+        # Only the columns named in update_fields reach the database
+        file_obj.department = self.hr
+        file_obj.save(update_fields=["department"])
+        self.assertEqual(self._count(department=self.hr, status="pending_activation"), 1)
+        self.assertInStep()
+
+    def test_queryset_update(self):
+        for i in range(3):
+            self._file(f"PENDING {i}")
+        self._file("ACTIVE", status="active", department=self.hr)
+        File.objects.filter(status="pending_activation").update(status="active")
+        self.assertEqual(self._count(status="active"), 4)
+        self.assertEqual(self._count(status="pending_activation"), 0)
+
+        File.objects.filter(department=self.hr).update(department=self.it)
+        self.assertEqual(self._count(department=self.it), 4)
+
+        # Values computed by the database are tallied after the update
+        File.objects.filter(department=self.it).update(department=None, title=Concat(F("title"), Value(" X")))
+        self.assertEqual(self._count(department=None), 4)
+        self.assertInStep()
+
+    def test_bulk_update_and_bulk_create(self):
+        files = File.objects.bulk_create(
+            [
+                File(title=f"BULK {i}", file_number=f"B/{i}", file_type="policy", department=self.it, status="active")
+                for i in range(4)
+            ]
+        )
+        self.assertEqual(self._count(status="active"), 4)
+        for file_obj in files[:2]:
+            file_obj.status = "archived"
+        File.objects.bulk_update(files, ["status"])
+        self.assertEqual(self._count(status="archived"), 2)
+        self.assertInStep()
+
+    def test_department_delete(self):
+        self._file("ONE", department=self.hr)
+        self._file("TWO", status="active", department=self.hr)
+        hr_id = self.hr.pk
+        self.hr.delete()
+        self.assertEqual(self._count(department=None), 2)
+        self.assertFalse(FileCounter.objects.filter(department_id=hr_id).exists())
+        self.assertInStep()
+
+    def test_failed_save_leaves_counters(self):
+        file_obj = self._file("ONE")
+        file_obj.status = "active"
+        file_obj.department = None
+        with self.assertRaises(ValidationError):
+            file_obj.save()
+        self.assertEqual(self._count(status="pending_activation"), 1)
+        self.assertInStep()
+
+    def test_reconcile_command(self):
+        self._file("ONE")
+        self._file("TWO", status="active")
+        FileCounter.objects.filter(status="active").update(count=5)
+        FileCounter.objects.filter(status="pending_activation").delete()
+
+        out = StringIO()
+        call_command("reconcile_file_counters", "--dry-run", stdout=out)
+        self.assertIn("2 counter(s) drifted", out.getvalue())
+        self.assertEqual(len(counter_drift()), 2)
+
+        out = StringIO()
+        call_command("reconcile_file_counters", stdout=out)
+        self.assertIn("Repaired 2 counter(s)", out.getvalue())
+        self.assertInStep()
+
+    def test_pending_activation_badge(self):
+        self._file("ONE")
+        self._file("TWO")
+        request = RequestFactory().get("/")
+        request.user = self.registry_user
+        context = pending_activation_count(request)
+        self.assertEqual(context["pending_activation_count"], 2)
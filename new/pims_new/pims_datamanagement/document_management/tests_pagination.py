@@ -0,0 +1,185 @@
+"""
+Tests for keyset pagination and estimated counts (core.pagination).
+
+Covers:
+1. KeysetPaginator walks a list forwards and back by cursor, ties on the timestamp broken by id
+2. A stale or garbled cursor gives the first page; paging back to the start refills it
+3. estimated_count counts exactly up to its limit and reports "more than" past it
+4. Notifications, the inbox and the outbox page by cursor, keeping their filters, over HTMX
+5. The audit log list pages by cursor, and by page number for ranked search results
+6. The audit and notification admin changelists use the estimated count, and still reach
+   every row when the count is only an estimate
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from audit_log.models import AuditLogEntry
+from audit_log.views import AuditLogListView
+from core.pagination import EstimatedCountPaginator, KeysetPaginator, count_label, estimated_count
+from django.core.paginator import EmptyPage
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from notifications.models import Notification
+from notifications.views import NotificationListView
+from organization.models import Department, Designation, Staff
+from user_management.models import CustomUser
+
+from document_management.models import File, FileMovement
+from document_management.views import InboxView, OutboxView
+
+
+class KeysetPaginatorTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="reader", password="Test1234!")
+        now = timezone.now()
+        for i in range(7):
+            Notification.objects.create(user=self.user, message=f"n{i}")
+        # Pairs of notifications share a timestamp, so the id has to break ties
+        for notification in Notification.objects.all():
+            Notification.objects.filter(pk=notification.pk).update(
+                timestamp=now - timedelta(minutes=int(notification.message[1:]) // 2)
+            )
+        self.expected = list(Notification.objects.order_by("-timestamp", "-pk"))
+        self.paginator = KeysetPaginator(Notification.objects.all(), 3)
+
+    def test_forwards_and_back(self):
+        first = self.paginator.page()
+        second = self.paginator.page(after=first.next_cursor)
+        third = self.paginator.page(after=second.next_cursor)
+        self.assertEqual(list(first) + list(second) + list(third), self.expected)
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+        self.assertEqual(len(third), 1)
+
+        self.assertEqual(list(self.paginator.page(before=third.previous_cursor)), list(second))
+        self.assertEqual(list(self.paginator.page(before=second.previous_cursor)), list(first))
+
+    def test_back_to_a_shrunk_start(self):
+        second = self.paginator.page(after=self.paginator.page().next_cursor)
+        self.expected[0].delete()
+        back = self.paginator.page(before=second.previous_cursor)
+        self.assertEqual(list(back), self.expected[1:4])
+        self.assertFalse(back.has_previous())
+
+    def test_bad_cursor_gives_first_page(self):
+        for cursor in ("garbage", "WyJub3QtYS1kYXRlIiwgMV0", "W10"):
+            self.assertEqual(list(self.paginator.page(after=cursor)), self.expected[:3])
+
+    def test_estimated_count(self):
+        queryset = Notification.objects.all()
+        self.assertEqual(estimated_count(queryset), (7, True))
+        self.assertEqual(estimated_count(queryset, limit=5), (5, False))
+        self.assertEqual(count_label(5, False, limit=5), "5+")
+        self.assertEqual(count_label(1234567, False, limit=5), "about 1,234,567")
+        self.assertEqual(self.paginator.count_label, "7")
+
+    def test_estimated_count_paginator(self):
+        queryset = Notification.objects.order_by("-timestamp", "-pk")
+        exact = EstimatedCountPaginator(queryset, 2)
+        self.assertEqual((exact.count, exact.num_pages, exact.template_name), (7, 4, None))
+
+        with patch.object(EstimatedCountPaginator, "count_limit", 3):
+            capped = EstimatedCountPaginator(queryset, 2)
+            self.assertEqual((capped.count, capped.num_pages), (3, 2))
+            self.assertIsNotNone(capped.template_name)
+            # Pages past the capped count are still served
+            self.assertEqual(list(capped.page(4)), self.expected[6:])
+            with self.assertRaises(EmptyPage):
+                capped.page(5)
+
+
+class KeysetListViewTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username="clerk", password="Test1234!", is_staff=True, is_superuser=True
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def walk(self, url, params, name):
+        """Every object listed by following the Next links from the first page."""
+        seen, params = [], dict(params)
+        while True:
+            response = self.client.get(url, params)
+            seen.extend(response.context[name])
+            page = response.context["page_obj"]
+            if not page.has_next():
+                return response, seen
+            params["after"] = page.next_cursor
+
+    def test_notifications(self):
+        for i in range(5):
+            Notification.objects.create(user=self.user, message=f"n{i}", is_read=i % 2 == 0)
+        url = reverse("notifications:notification_list")
+        with patch.object(NotificationListView, "paginate_by", 2):
+            response, seen = self.walk(url, {"filter": "unread"}, "notifications")
+            self.assertEqual([n.message for n in seen], ["n3", "n1"])
+            response = self.client.get(url, {"filter": "all"})
+        self.assertTrue(response.context["paginator"].keyset)
+        self.assertEqual(response.context["pagination_query"], "filter=all")
+        self.assertContains(response, 'hx-target="#notification-list"')
+        self.assertContains(response, f"filter=all&after={response.context['page_obj'].next_cursor}")
+        self.assertEqual(response.context["paginator"].count_label, "5")
+
+    def test_inbox_and_outbox(self):
+        dept = Department.objects.create(name="IT", code="IT")
+        designation = Designation.objects.create(name="Officer", level=5)
+        me = Staff.objects.create(user=self.user, designation=designation, department=dept)
+        other = Staff.objects.create(
+            user=CustomUser.objects.create_user(username="other", password="Test1234!"),
+            designation=designation,
+            department=dept,
+        )
+        file_obj = File.objects.create(
+            title="Budget", file_type="policy", department=dept, current_location=me, created_by=self.user
+        )
+        for _ in range(4):
+            FileMovement.objects.create(file=file_obj, sent_by=other.user, sent_to=me)
+            FileMovement.objects.create(file=file_obj, sent_by=self.user, sent_to=other)
+        inbox = list(FileMovement.objects.filter(sent_to=me).order_by("-moved_at", "-pk"))
+        outbox = list(FileMovement.objects.filter(sent_by=self.user).order_by("-moved_at", "-pk"))
+
+        with patch.object(InboxView, "paginate_by", 3):
+            _, seen = self.walk(reverse("document_management:inbox"), {}, "movements")
+        self.assertEqual(seen, inbox)
+        with patch.object(OutboxView, "paginate_by", 3):
+            response, seen = self.walk(reverse("document_management:outbox"), {"q": "budg"}, "movements")
+        self.assertEqual(seen, outbox)
+        self.assertContains(response, 'hx-target="#outbox-movements"')
+        response = self.client.get(reverse("document_management:outbox"), {"q": "nothing like it"})
+        self.assertEqual(list(response.context["movements"]), [])
+
+    def test_audit_log_list(self):
+        for action in ("LOGIN", "FILE_CREATED", "FILE_SENT", "LOGOUT"):
+            AuditLogEntry.objects.create(action=action, user=self.user)
+        url = reverse("audit_log:audit_log_list")
+        with patch.object(AuditLogListView, "paginate_by", 3):
+            _, seen = self.walk(url, {}, "log_entries")
+            self.assertEqual(seen, list(AuditLogEntry.objects.order_by("-timestamp", "-pk")))
+            # Ranked search results keep page numbers
+            response = self.client.get(url, {"q": "file", "page": 1})
+        self.assertFalse(getattr(response.context["paginator"], "keyset", False))
+        self.assertEqual(response.context["paginator"].count, 2)
+
+    def test_admin_changelists(self):
+        AuditLogEntry.objects.create(action="LOGIN", user=self.user)
+        Notification.objects.create(user=self.user, message="hello")
+        for name in ("admin:audit_log_auditlogentry_changelist", "admin:notifications_notification_changelist"):
+            response = self.client.get(reverse(name))
+            self.assertIsInstance(response.context["cl"].paginator, EstimatedCountPaginator)
+            self.assertEqual(response.context["cl"].result_count, 1)
+
+    def test_admin_changelist_past_the_count_limit(self):
+        for i in range(5):
+            Notification.objects.create(user=self.user, message=f"n{i}")
+        url = reverse("admin:notifications_notification_changelist")
+        with (
+            patch.object(EstimatedCountPaginator, "count_limit", 3),
+            patch("notifications.admin.NotificationAdmin.list_per_page", 2),
+        ):
+            response = self.client.get(url, {"p": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["cl"].result_list), 1)
+        self.assertContains(response, "Previous")
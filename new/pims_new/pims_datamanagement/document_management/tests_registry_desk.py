@@ -0,0 +1,60 @@
+"""
+Tests for the registry desk resolver.
+
+Covers:
+1. Least-loaded assignment picks the officer holding the fewest active files
+2. Round-robin assignment cycles through the registry pool
+3. Completing an approval chain returns the file to a registry officer
+"""
+
+from core.testing import make_staff, make_user
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from organization.models import Department, Staff
+
+from document_management.models import ApprovalChain, ApprovalStep, File
+from document_management.registry_desk import next_registry_officer_id
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class RegistryDeskTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dept = Department.objects.create(name="IT Dept", code="IT")
+        self.first = make_staff(make_user("registry1", "Registry"), dept=self.dept)
+        self.second = make_staff(make_user("registry2", "Registry"), dept=self.dept)
+        self.officer = make_staff(make_user("officer"), dept=self.dept)
+
+    def _file(self, title, holder):
+        return File.objects.create(
+            title=title,
+            file_type="policy",
+            department=self.dept,
+            created_by=self.officer.user,
+            status="active",
+            current_location=holder,
+        )
+
+    def test_least_loaded(self):
+        self._file("BUSY ONE", self.first)
+        self._file("BUSY TWO", self.first)
+        picks = [next_registry_officer_id() for _ in range(3)]
+        self.assertEqual(picks, [self.second.pk, self.second.pk, self.first.pk])
+
+    @override_settings(REGISTRY_DESK_STRATEGY="round_robin")
+    def test_round_robin(self):
+        picks = [next_registry_officer_id() for _ in range(4)]
+        self.assertEqual(picks, [self.first.pk, self.second.pk, self.first.pk, self.second.pk])
+
+    def test_no_registry_staff(self):
+        Staff.objects.filter(registry_role=True).delete()
+        self.assertIsNone(next_registry_officer_id())
+
+    def test_chain_completion_returns_to_registry(self):
+        self._file("BUSY", self.first)
+        file_obj = self._file("CHAIN", self.officer)
+        chain = ApprovalChain.objects.create(file=file_obj, created_by=self.officer.user, status="active")
+        ApprovalStep.objects.create(chain=chain, approver=self.officer, order=1, status="approved")
+        chain.advance()
+        file_obj.refresh_from_db()
+        self.assertEqual(file_obj.current_location, self.second)
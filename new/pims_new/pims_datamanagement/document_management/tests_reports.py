@@ -0,0 +1,256 @@
+"""
+Tests for document_management.reports.get_department_performance_report and get_bottleneck_report.
+
+Covers:
+1. Files, held files, documents and movements are counted per department, inside the date window
+2. Custody median and p90 are nearest-rank percentiles of how long sent files stayed with a department
+3. The report runs a fixed number of queries however many departments there are
+4. DepartmentPerformanceReportView renders the report and exports it as CSV for the chosen window
+5. The bottleneck report counts held and overdue files, the oldest hold and approval turnaround per staff/department
+6. BottleneckReportView is cached, paginated and exports CSV
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from core.testing import make_staff, make_user
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from organization.models import Department, Staff, Unit
+
+from document_management.models import ApprovalChain, ApprovalStep, Document, File, FileMovement
+from document_management.report_views import BottleneckReportView
+from document_management.reports import get_bottleneck_report, get_department_performance_report
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class DepartmentPerformanceReportTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.it = Department.objects.create(name="IT", code="IT")
+        self.hr = Department.objects.create(name="HR", code="HR")
+        self.helpdesk = Unit.objects.create(name="Helpdesk", department=self.it)
+        self.registry_user = make_user("registry", "Registry")
+        self.registry = make_staff(self.registry_user, "Registry Officer")
+        # Only assigned to a unit: reported under the unit's department
+        self.it_officer = make_staff(make_user("it_officer"), unit=self.helpdesk)
+        self.hr_officer = make_staff(make_user("hr_officer"), dept=self.hr)
+
+        self.personal = File.objects.create(
+            title="IT PERSONAL",
+            file_type="personal",
+            owner=self.it_officer,
+            department=self.hr,
+            created_by=self.registry_user,
+            status="active",
+        )
+        self.policy = File.objects.create(
+            title="HR POLICY",
+            file_type="policy",
+            department=self.hr,
+            current_location=self.it_officer,
+            created_by=self.registry_user,
+            status="pending_activation",
+        )
+
+    def _document(self, file_obj, days_ago):
+        doc = Document.objects.create(file=file_obj, title="MEMO", uploaded_by=self.registry_user)
+        Document.objects.filter(pk=doc.pk).update(uploaded_at=self.now - timedelta(days=days_ago))
+
+    def _movement(self, file_obj, sent_by, sent_to, moved_at, action="sent"):
+        movement = FileMovement.objects.create(file=file_obj, sent_by=sent_by, sent_to=sent_to, action=action)
+        FileMovement.objects.filter(pk=movement.pk).update(moved_at=moved_at)
+
+    def _rows(self, **kwargs):
+        return {row["department"]: row for row in get_department_performance_report(now=self.now, **kwargs)}
+
+    def test_counts_per_department(self):
+        self._document(self.personal, 2)
+        self._document(self.policy, 2)
+        self._document(self.policy, 40)
+        self._movement(self.policy, self.hr_officer.user, self.it_officer, self.now - timedelta(days=1))
+        self._movement(self.policy, self.hr_officer.user, self.it_officer, self.now - timedelta(days=45))
+
+        rows = self._rows(days=30)
+        self.assertEqual(
+            {name: (r["total_files_owned"], r["active_files"], r["files_currently_held"]) for name, r in rows.items()},
+            {"IT": (1, 1, 1), "HR": (1, 0, 0)},
+        )
+        self.assertEqual((rows["IT"]["documents_added"], rows["HR"]["documents_added"]), (1, 1))
+        self.assertEqual((rows["IT"]["movements_sent"], rows["HR"]["movements_sent"]), (0, 1))
+        self.assertEqual(self._rows(days=60)["HR"]["movements_sent"], 2)
+        self.assertEqual(self._rows(days=60)["HR"]["documents_added"], 2)
+
+    def test_custody_percentiles(self):
+        # Ten files each sent to IT; file i stays (i + 1) hours before moving on
+        for i in range(10):
+            file_obj = File.objects.create(
+                title=f"MOVED {i}", file_type="policy", department=self.hr, created_by=self.registry_user
+            )
+            sent_at = self.now - timedelta(days=3)
+            self._movement(file_obj, self.hr_officer.user, self.it_officer, sent_at)
+            self._movement(file_obj, self.it_officer.user, self.hr_officer, sent_at + timedelta(hours=i + 1))
+
+        rows = self._rows(days=30)
+        self.assertEqual(rows["IT"]["custody_median"], timedelta(hours=5))
+        self.assertEqual(rows["IT"]["custody_p90"], timedelta(hours=9))
+        # Files sent back to HR have not moved since: held until now
+        self.assertEqual(rows["HR"]["custody_median"], timedelta(days=3) - timedelta(hours=6))
+        self.assertIsNone(self._rows(days=1)["IT"]["custody_median"])
+
+    def test_query_count_independent_of_departments(self):
+        with self.assertNumQueries(7):
+            get_department_performance_report()
+        for i in range(20):
+            Department.objects.create(name=f"Dept {i}", code=f"D{i}")
+        with self.assertNumQueries(7):
+            self.assertEqual(len(get_department_performance_report()), 22)
+
+
+class DepartmentPerformanceReportViewTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="IT", code="IT")
+        self.admin = make_user("admin", is_superuser=True)
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_page_and_csv_export(self):
+        url = reverse("document_management:report_dept_performance")
+        r = self.client.get(url, {"days": "7"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context["days"], 7)
+        self.assertEqual(r.context["report_data"][0]["department"], "IT")
+
+        r = self.client.get(url, {"days": "7", "export": "csv"})
+        lines = r.content.decode().splitlines()
+        self.assertIn("Median Custody (hours)", lines[0])
+        self.assertTrue(lines[1].startswith("IT,"))
+
+    def test_invalid_window_falls_back_to_default(self):
+        r = self.client.get(reverse("document_management:report_dept_performance"), {"days": "abc"})
+        self.assertEqual(r.context["days"], 30)
+
+
+class BottleneckReportTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.it = Department.objects.create(name="IT", code="IT")
+        self.hr = Department.objects.create(name="HR", code="HR")
+        self.registry_user = make_user("registry", "Registry")
+        self.it_officer = make_staff(
+            make_user("it_officer"), unit=Unit.objects.create(name="Helpdesk", department=self.it)
+        )
+        self.hr_officer = make_staff(make_user("hr_officer"), dept=self.hr)
+        self.it_officer.user.first_name, self.it_officer.user.last_name = "Ada", "Obi"
+        self.it_officer.user.save()
+        for days_ago in (1, 6):
+            self._held(self.it_officer, days_ago)
+        self._held(self.hr_officer, 2)
+
+    def _held(self, staff, days_ago):
+        file_obj = File.objects.create(
+            title=f"HELD {days_ago}",
+            file_type="policy",
+            department=self.it,
+            current_location=staff,
+            created_by=self.registry_user,
+            status="active",
+        )
+        File.objects.filter(pk=file_obj.pk).update(custody_since=self.now - timedelta(days=days_ago))
+        return file_obj
+
+    def _chain(self, hours):
+        """A two-step chain actioned ``hours[0]`` and ``hours[0] + hours[1]`` hours after it was created."""
+        chain = ApprovalChain.objects.create(created_by=self.registry_user, status="closed")
+        created = self.now - timedelta(days=3)
+        ApprovalChain.objects.filter(pk=chain.pk).update(created_at=created)
+        first, second = hours
+        ApprovalStep.objects.create(
+            chain=chain,
+            approver=self.it_officer,
+            order=1,
+            status="approved",
+            actioned_at=created + timedelta(hours=first),
+        )
+        ApprovalStep.objects.create(
+            chain=chain,
+            approver=self.hr_officer,
+            order=2,
+            status="approved",
+            actioned_at=created + timedelta(hours=first + second),
+        )
+
+    def test_per_staff(self):
+        self._chain((2, 10))
+        self._chain((4, 20))
+        with self.assertNumQueries(3):
+            rows = get_bottleneck_report("staff", now=self.now)
+        self.assertEqual([row["label"] for row in rows], ["Ada Obi", "hr_officer"])
+        ada, hr = rows
+        self.assertEqual((ada["files_held"], ada["overdue"]), (2, 1))
+        self.assertEqual(ada["longest_held"], timedelta(days=6))
+        self.assertEqual(ada["approvals_actioned"], 2)
+        self.assertEqual(ada["avg_turnaround"], timedelta(hours=3))
+        self.assertEqual(hr["avg_turnaround"], timedelta(hours=15))
+
+    def test_per_department(self):
+        self._chain((2, 10))
+        rows = {row["label"]: row for row in get_bottleneck_report("department", now=self.now)}
+        self.assertEqual(set(rows), {"IT", "HR"})
+        self.assertEqual(rows["IT"]["files_held"], 2)
+        self.assertEqual(rows["HR"]["longest_held"], timedelta(days=2))
+        self.assertEqual(rows["HR"]["avg_turnaround"], timedelta(hours=10))
+
+    def test_falls_back_to_latest_movement(self):
+        file_obj = self._held(self.hr_officer, 0)
+        File.objects.filter(pk=file_obj.pk).update(custody_since=None)
+        movement = FileMovement.objects.create(file=file_obj, sent_by=self.registry_user, sent_to=self.hr_officer)
+        FileMovement.objects.filter(pk=movement.pk).update(moved_at=self.now - timedelta(days=9))
+        hr = next(row for row in get_bottleneck_report(now=self.now) if row["holder_id"] == self.hr_officer.pk)
+        self.assertEqual(hr["longest_held"], timedelta(days=9))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BottleneckReportViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = make_user("admin", is_superuser=True)
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse("document_management:report_bottlenecks")
+        dept = Department.objects.create(name="IT", code="IT")
+        for i in range(3):
+            File.objects.create(
+                title=f"HELD {i}",
+                file_type="policy",
+                department=dept,
+                current_location=make_staff(make_user(f"holder{i}"), dept=dept),
+                created_by=self.admin,
+                status="active",
+            )
+
+    def test_cached_and_paginated(self):
+        with patch.object(BottleneckReportView, "paginate_by", 2):
+            r = self.client.get(self.url, {"page": 2})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual((r.context["page_obj"].paginator.count, len(r.context["rows"])), (3, 1))
+
+        # Served from the cache until it expires
+        File.objects.create(
+            title="LATE",
+            file_type="policy",
+            department=Department.objects.get(),
+            current_location=Staff.objects.first(),
+            created_by=self.admin,
+        )
+        r = self.client.get(self.url)
+        self.assertEqual(sum(row["files_held"] for row in r.context["rows"]), 3)
+
+    def test_csv_export(self):
+        r = self.client.get(self.url, {"group": "department", "export": "csv"})
+        lines = r.content.decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["Department", "Files Held", "Overdue"])
+        self.assertEqual(lines[1].split(",")[:2], ["IT", "3"])
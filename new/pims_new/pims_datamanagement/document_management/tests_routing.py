@@ -0,0 +1,75 @@
+"""
+Tests for recipient routing (document_management.routing).
+
+Covers:
+1. Chain-of-command, HOD and executive rules for dispatch
+2. Forward rules for inbox items
+3. Recipient sets come from the cached org snapshot in a fixed number of queries
+4. Head changes refresh the snapshot
+"""
+
+from core.testing import make_staff, make_user
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from organization.models import Department, Staff, Unit
+
+from document_management.routing import DISPATCH, FORWARD, allowed_recipient_pks, recipient_queryset
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class RoutingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dept = Department.objects.create(name="IT Dept", code="IT")
+        self.other_dept = Department.objects.create(name="Finance", code="FIN")
+
+        self.hod = make_staff(make_user("hod"), dept=self.dept)
+        self.dept.head = self.hod
+        self.dept.save()
+        self.other_hod = make_staff(make_user("otherhod"), dept=self.other_dept)
+        self.other_dept.head = self.other_hod
+        self.other_dept.save()
+
+        self.unit_head = make_staff(make_user("unithead"), dept=self.dept)
+        self.unit = Unit.objects.create(name="Helpdesk", department=self.dept, head=self.unit_head)
+        self.officer = make_staff(make_user("officer"), dept=self.dept, unit=self.unit)
+        self.loner = make_staff(make_user("loner"), dept=self.other_dept)
+        self.registry = make_staff(make_user("registry", "Registry"), dept=self.dept)
+        self.executive = make_staff(make_user("exec", "Executive"), dept=self.dept)
+
+    def _staff(self, staff):
+        return Staff.objects.select_related("user").get(pk=staff.pk)
+
+    def _recipients(self, staff, mode=DISPATCH):
+        return set(recipient_queryset(self._staff(staff).user, mode).values_list("pk", flat=True))
+
+    def test_dispatch_chain_of_command(self):
+        self.assertEqual(self._recipients(self.officer), {self.unit_head.pk})
+        self.assertEqual(self._recipients(self.loner), {self.other_hod.pk})
+
+    def test_dispatch_heads_reach_other_heads(self):
+        self.assertEqual(self._recipients(self.hod), {self.other_hod.pk, self.unit_head.pk})
+
+    def test_dispatch_unrestricted_roles(self):
+        everyone = set(Staff.objects.exclude(registry_role=True).values_list("pk", flat=True))
+        self.assertEqual(self._recipients(self.executive), everyone - {self.executive.pk})
+        self.assertEqual(self._recipients(self.registry), everyone)
+
+    def test_forward_rules(self):
+        self.assertEqual(self._recipients(self.officer, FORWARD), {self.unit_head.pk})
+        self.assertEqual(self._recipients(self.loner, FORWARD), {self.other_hod.pk})
+        self.assertEqual(self._recipients(self.unit_head, FORWARD), {self.hod.pk, self.other_hod.pk})
+
+    def test_snapshot_queries_are_fixed(self):
+        staff = self._staff(self.hod)
+        staff.roles  # noqa: B018
+        allowed_recipient_pks(staff)
+        with self.assertNumQueries(0):
+            allowed_recipient_pks(staff)
+            allowed_recipient_pks(staff, FORWARD)
+
+    def test_head_change_refreshes_snapshot(self):
+        self.assertEqual(self._recipients(self.officer), {self.unit_head.pk})
+        self.unit.head = self.hod
+        self.unit.save()
+        self.assertEqual(self._recipients(self.officer), {self.hod.pk})
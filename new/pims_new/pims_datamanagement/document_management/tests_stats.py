@@ -0,0 +1,199 @@
+"""
+Tests for document_management.stats.StatsService and the dashboards built on it.
+
+Covers:
+1. file_counts() agrees with the per-tile count() queries it replaces
+2. holder_counts() and staff_counts() agree with the querysets they replace
+3. The executive, registry, admin health and home dashboards stay within a fixed query budget
+4. The budget does not grow with the number of files on the dashboards
+5. refresh_dashboard_snapshots writes one snapshot per org scope matching the live counters
+6. The executive dashboard renders from a recent snapshot and falls back to live counters
+"""
+
+from datetime import timedelta
+
+from audit_log.models import AuditLogEntry
+from core.testing import make_staff, make_user
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from organization.models import Department, Staff, Unit
+
+from document_management.models import DashboardSnapshot, Document, File
+from document_management.stats import StatsService, executive_counters
+from document_management.tasks import refresh_dashboard_snapshots
+
+# Queries each dashboard may issue, including session, user, role and context processor
+# lookups, and the org snapshot and badge loads (the cache is empty at the start of each test).
+# The executive budget includes the dashboard snapshot lookup that misses before falling back.
+DASHBOARD_QUERY_BUDGETS = {
+    "document_management:executive_dashboard": 14,
+    "document_management:registry": 19,
+    "user_management:admin_dashboard_health": 15,
+    "home": 17,
+}
+
+
+class StatsFixture(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="IT", code="IT")
+        self.registry_user = make_user("registry", "Registry")
+        self.registry = make_staff(self.registry_user, "Registry Officer", self.dept)
+        self.executive = make_user("exec", "Executive")
+        self.executive.user_permissions.add(
+            Permission.objects.get(codename="view_file", content_type__app_label="document_management")
+        )
+        make_staff(self.executive, dept=self.dept)
+        self.admin = make_user("admin", is_superuser=True)
+        self.officer = make_staff(make_user("officer"), dept=self.dept)
+        self.colleague = make_staff(make_user("colleague"), dept=self.dept)
+        make_staff(make_user("nofile"), dept=self.dept)
+        self.add_files()
+
+    def add_files(self, prefix="F"):
+        officer = self.officer if prefix == "F" else make_staff(make_user(f"{prefix}-owner"), dept=self.dept)
+        common = {"created_by": self.registry_user, "department": self.dept}
+        personal = File.objects.create(
+            title=f"{prefix} PERSONAL", file_type="personal", owner=officer, status="active", **common
+        )
+        held = File.objects.create(
+            title=f"{prefix} HELD", file_type="policy", current_location=officer, status="active", **common
+        )
+        File.objects.create(
+            title=f"{prefix} AT REGISTRY", file_type="policy", current_location=self.registry, status="active", **common
+        )
+        File.objects.create(title=f"{prefix} PENDING", file_type="policy", status="pending_activation", **common)
+        File.objects.create(title=f"{prefix} ARCHIVED", file_type="policy", status="archived", **common)
+        File.objects.filter(pk=held.pk).update(custody_since=timezone.now() - timedelta(days=5))
+        Document.objects.create(file=personal, title=f"{prefix} MEMO", uploaded_by=self.registry_user)
+        AuditLogEntry.objects.create(user=self.registry_user, action="FILE_CREATED")
+
+
+class StatsServiceTest(StatsFixture):
+    def test_file_counts_match_individual_counts(self):
+        files = File.objects.all()
+        with self.assertNumQueries(1):
+            counts = StatsService(files).file_counts()
+        self.assertEqual(counts["total"], files.count())
+        self.assertEqual(counts["active"], files.filter(status="active").count())
+        self.assertEqual(counts["pending_activation"], 1)
+        self.assertEqual(counts["archived"], 1)
+        self.assertEqual(counts["personal"], 1)
+        self.assertEqual(counts["policy"], 4)
+        self.assertEqual(counts["outgoing"], 1)
+        self.assertEqual(counts["overdue"], 1)
+        self.assertEqual(counts["owners_with_personal_file"], 1)
+
+    def test_scope_is_respected(self):
+        counts = StatsService(File.objects.filter(owner=self.officer)).file_counts()
+        self.assertEqual((counts["total"], counts["outgoing"]), (1, 0))
+
+    def test_holder_counts(self):
+        File.objects.create(
+            title="OWNED AND HELD",
+            file_type="personal",
+            owner=self.colleague,
+            current_location=self.colleague,
+            created_by=self.registry_user,
+            status="pending_activation",
+        )
+        self.assertEqual(
+            StatsService().holder_counts(self.officer),
+            {"owned": 1, "owned_active": 1, "owned_pending_activation": 0, "in_custody": 1},
+        )
+        self.assertEqual(StatsService().holder_counts(self.colleague)["in_custody"], 0)
+
+    def test_staff_counts(self):
+        counts = StatsService().staff_counts()
+        self.assertEqual(counts["total"], Staff.objects.count())
+        # exec, colleague and nofile have no personal file; the registry officer is not counted
+        self.assertEqual(counts["without_personal_file"], 3)
+
+
+class DashboardQueryBudgetTest(StatsFixture):
+    def _queries(self, user, url_name):
+        client = Client()
+        client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def _users(self):
+        return {
+            "document_management:executive_dashboard": self.executive,
+            "document_management:registry": self.registry_user,
+            "user_management:admin_dashboard_health": self.admin,
+            "home": self.officer.user,
+        }
+
+    def test_dashboards_within_budget(self):
+        for url_name, user in self._users().items():
+            with self.subTest(dashboard=url_name):
+                n = self._queries(user, url_name)
+                self.assertLessEqual(n, DASHBOARD_QUERY_BUDGETS[url_name])
+
+    def _warm_queries(self, user, url_name):
+        # Adding files and staff invalidates cached counts, so compare requests on a warm cache
+        self._queries(user, url_name)
+        return self._queries(user, url_name)
+
+    def test_budget_independent_of_file_count(self):
+        before = {url_name: self._warm_queries(user, url_name) for url_name, user in self._users().items()}
+        for prefix in ("G", "H", "I"):
+            self.add_files(prefix)
+        for url_name, user in self._users().items():
+            with self.subTest(dashboard=url_name):
+                self.assertEqual(self._warm_queries(user, url_name), before[url_name])
+
+
+class DashboardSnapshotTest(StatsFixture):
+    def test_refresh_writes_every_scope(self):
+        unit = Unit.objects.create(name="Helpdesk", department=self.dept)
+        refresh_dashboard_snapshots()
+        scopes = set(DashboardSnapshot.objects.values_list("scope_kind", "scope_id"))
+        self.assertEqual(scopes, {("organization", None), ("department", self.dept.pk), ("unit", unit.pk)})
+
+        org = DashboardSnapshot.objects.latest_for("organization")
+        self.assertEqual(org.data, executive_counters(File.objects.all()))
+        dept = DashboardSnapshot.objects.latest_for("department", self.dept.pk)
+        self.assertEqual(
+            dept.data,
+            executive_counters(File.objects.within_org_node(self.dept), Staff.objects.within_org_node(self.dept)),
+        )
+
+    def test_refresh_prunes_old_snapshots(self):
+        old = DashboardSnapshot.objects.create(scope_kind="organization", data={})
+        DashboardSnapshot.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=2))
+        refresh_dashboard_snapshots()
+        self.assertFalse(DashboardSnapshot.objects.filter(pk=old.pk).exists())
+
+    def _dashboard(self):
+        client = Client()
+        client.force_login(self.executive)
+        return client.get(reverse("document_management:executive_dashboard"))
+
+    def test_dashboard_renders_from_snapshot(self):
+        data = executive_counters(File.objects.all())
+        data["total_files"] = 999
+        snapshot = DashboardSnapshot.objects.create(scope_kind="organization", data=data)
+        r = self._dashboard()
+        self.assertEqual(r.context["total_files"], 999)
+        self.assertEqual(r.context["stats_as_of"], snapshot.created_at)
+        self.assertContains(r, "Figures as of")
+
+    @override_settings(DASHBOARD_SNAPSHOT_MAX_AGE=60)
+    def test_stale_or_missing_snapshot_falls_back_to_live(self):
+        r = self._dashboard()
+        self.assertIsNone(r.context["stats_as_of"])
+        self.assertEqual(r.context["total_files"], File.objects.count())
+
+        stale = DashboardSnapshot.objects.create(scope_kind="organization", data={"total_files": 999})
+        DashboardSnapshot.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        r = self._dashboard()
+        self.assertIsNone(r.context["stats_as_of"])
+        self.assertEqual(r.context["total_files"], File.objects.count())
+        self.assertContains(r, "Live figures")
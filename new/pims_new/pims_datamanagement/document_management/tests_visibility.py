@@ -0,0 +1,265 @@
+"""
+Tests for File.objects.visible_to() and permissions.capabilities_for().
+
+Covers:
+1. visible_to() agrees with permissions.can_view_file for every user/file pair
+2. visible_to() filters in a single query
+3. capabilities_for() agrees with the single-object permission functions
+4. capabilities_for() uses the same number of queries for one or many objects
+5. File and document detail pages are gated by the capability flags
+6. Active grants are cached per user and invalidated when access requests change
+7. File.objects.within_org_node() rolls up a whole subtree in one query
+"""
+
+from datetime import timedelta
+
+from core.testing import make_staff, make_user
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from organization.models import Department, Division, Staff, Unit
+from user_management.models import CustomUser
+
+from document_management.grants import get_active_grants, has_active_grant
+from document_management.models import Document, File, FileAccessRequest, FileMovement
+from document_management.permissions import (
+    can_add_document,
+    can_dispatch_document,
+    can_view_file,
+    capabilities_for,
+)
+
+
+class VisibilityFixture(TestCase):
+    def setUp(self):
+        self.dept_a = Department.objects.create(name="IT Dept", code="IT")
+        self.dept_b = Department.objects.create(name="Finance", code="FIN")
+
+        registry_user = make_user("registry", "Registry")
+        self.registry = make_staff(registry_user, "Registry Officer", self.dept_a)
+
+        self.hod = make_staff(make_user("hod"), dept=self.dept_a)
+        self.dept_a.head = self.hod
+        self.dept_a.save()
+
+        self.manager = make_staff(make_user("manager"), dept=self.dept_a)
+        Unit.objects.create(name="Helpdesk", department=self.dept_a, head=self.manager)
+
+        self.owner = make_staff(make_user("owner"), dept=self.dept_a)
+        self.custodian = make_staff(make_user("custodian"), dept=self.dept_b)
+        self.outsider = make_staff(make_user("outsider"), dept=self.dept_b)
+        self.granted = make_staff(make_user("granted"), dept=self.dept_b)
+        self.expired = make_staff(make_user("expired"), dept=self.dept_b)
+        self.no_dept_hod = make_staff(make_user("nodepthod"), "Head of Department")
+        self.executive = make_staff(make_user("exec", "Executive"), dept=self.dept_b)
+        self.md = make_staff(make_user("md", "MD"))
+
+        common = {"created_by": registry_user, "status": "active"}
+        self.files = [
+            File.objects.create(
+                title="POLICY A", file_type="policy", department=self.dept_a, current_location=self.custodian, **common
+            ),
+            File.objects.create(title="POLICY B", file_type="policy", department=self.dept_b, **common),
+            File.objects.create(title="POLICY EXT", file_type="policy", external_party="Vendor", **common),
+            File.objects.create(title="OWNER PERSONAL", file_type="personal", owner=self.owner, **common),
+            File.objects.create(
+                title="OUTSIDER PERSONAL", file_type="personal", owner=self.outsider, department=self.dept_a, **common
+            ),
+            File.objects.create(title="GRANTED PERSONAL", file_type="personal", owner=self.granted, **common),
+        ]
+
+        now = timezone.now()
+        FileAccessRequest.objects.create(
+            file=self.files[1],
+            requested_by=self.granted.user,
+            reason="Audit",
+            status="approved",
+            expires_at=now + timedelta(hours=5),
+        )
+        FileAccessRequest.objects.create(
+            file=self.files[1], requested_by=self.expired.user, reason="Audit", status="approved", expires_at=now
+        )
+        FileAccessRequest.objects.create(file=self.files[2], requested_by=self.outsider.user, reason="Audit")
+
+        self.users = [
+            make_user("admin", is_superuser=True),
+            make_user("nostaff"),
+            *(
+                s.user
+                for s in (
+                    self.registry,
+                    self.hod,
+                    self.manager,
+                    self.owner,
+                    self.custodian,
+                    self.outsider,
+                    self.granted,
+                    self.expired,
+                    self.no_dept_hod,
+                    self.executive,
+                    self.md,
+                )
+            ),
+        ]
+
+    def _fresh_user(self, user):
+        return CustomUser.objects.get(pk=user.pk)
+
+
+class FileVisibilityTest(VisibilityFixture):
+    def test_matches_can_view_file(self):
+        for user in self.users:
+            user = self._fresh_user(user)
+            visible = set(File.objects.visible_to(user).values_list("pk", flat=True))
+            for f in self.files:
+                with self.subTest(user=user.username, file=f.title):
+                    self.assertEqual(f.pk in visible, can_view_file(user, f))
+
+    def test_single_query(self):
+        user = self._fresh_user(self.hod.user)
+        user.staff.roles  # noqa: B018 - resolve roles up front; they are cached per request
+        with self.assertNumQueries(1):
+            list(File.objects.visible_to(user))
+
+
+class CapabilitiesTest(VisibilityFixture):
+    def test_file_capabilities_match_permission_functions(self):
+        for user in self.users:
+            user = self._fresh_user(user)
+            caps = capabilities_for(user, self.files)
+            for f in self.files:
+                with self.subTest(user=user.username, file=f.title):
+                    self.assertEqual(caps[f.pk]["view"], can_view_file(user, f))
+                    self.assertEqual(caps[f.pk]["add_document"], can_add_document(user, f))
+                    self.assertEqual(caps[f.pk]["dispatch"], can_dispatch_document(user, f))
+
+    def test_read_write_grant(self):
+        FileAccessRequest.objects.create(
+            file=self.files[0],
+            requested_by=self.custodian.user,
+            reason="Edit",
+            status="approved",
+            access_type="read_write",
+        )
+        caps = capabilities_for(self._fresh_user(self.custodian.user), self.files)[self.files[0].pk]
+        self.assertTrue(caps["custodian"])
+        self.assertTrue(caps["read_write"])
+        self.assertTrue(caps["add_document"])
+
+    def test_query_count_is_fixed(self):
+        user = self._fresh_user(self.hod.user)
+        user.staff.roles  # noqa: B018
+        user.has_perm("user_management.can_share_documents")
+        get_active_grants(user)  # cached from here on
+        with self.assertNumQueries(2):
+            capabilities_for(user, self.files[:1])
+        with self.assertNumQueries(2):
+            capabilities_for(user, self.files)
+
+    def test_document_capabilities(self):
+        doc = Document.objects.create(file=self.files[1], title="Memo", uploaded_by=self.outsider.user)
+        other = Document.objects.create(file=self.files[1], title="Other", uploaded_by=self.outsider.user)
+        FileMovement.objects.create(
+            file=self.files[1], document=doc, sent_by=self.outsider.user, sent_to=self.manager, action="sent"
+        )
+        user = self._fresh_user(self.manager.user)
+        caps = capabilities_for(user, Document.objects.filter(pk__in=[doc.pk, other.pk]))
+        self.assertTrue(caps[doc.pk]["view"])
+        self.assertFalse(caps[other.pk]["view"])
+
+        registry_caps = capabilities_for(self._fresh_user(self.registry.user), [doc])[doc.pk]
+        self.assertFalse(registry_caps["view"])
+        self.assertTrue(registry_caps["dispatch"])
+
+    def test_detail_pages(self):
+        client = Client()
+        doc = Document.objects.create(file=self.files[1], title="Memo", uploaded_by=self.outsider.user)
+        file_url = reverse("document_management:file_detail", kwargs={"pk": self.files[1].pk})
+        doc_url = reverse("document_management:document_detail", kwargs={"pk": doc.pk})
+
+        client.force_login(self.granted.user)
+        r = client.get(file_url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context["access_type"], "read_only")
+        self.assertFalse(r.context["can_add_minute"])
+
+        client.force_login(self.custodian.user)
+        self.assertNotEqual(client.get(file_url).status_code, 200)
+        self.assertNotEqual(client.get(doc_url).status_code, 200)
+
+        client.force_login(self.executive.user)
+        self.assertEqual(client.get(doc_url).status_code, 200)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class GrantCacheTest(VisibilityFixture):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = self.granted.user
+
+    def test_grants_served_from_cache(self):
+        self.assertTrue(has_active_grant(self.user, self.files[1]))
+        with self.assertNumQueries(0):
+            self.assertTrue(has_active_grant(self.user, self.files[1]))
+            self.assertFalse(has_active_grant(self.user, self.files[1], "read_write"))
+            self.assertFalse(has_active_grant(self.user, self.files[0]))
+
+    def test_expired_grants_ignored(self):
+        self.assertEqual(get_active_grants(self.expired.user), {})
+
+    def test_approve_and_reject_invalidate(self):
+        self.assertFalse(has_active_grant(self.user, self.files[0]))
+        request = FileAccessRequest.objects.create(file=self.files[0], requested_by=self.user, reason="Review")
+        request.status = "approved"
+        request.access_type = "read_write"
+        request.save()
+        self.assertTrue(has_active_grant(self.user, self.files[0], "read_write"))
+
+        request.status = "rejected"
+        request.save()
+        self.assertFalse(has_active_grant(self.user, self.files[0]))
+
+    def test_recall_invalidates(self):
+        self.assertTrue(has_active_grant(self.user, self.files[1]))
+        registry_user = self.registry.user
+        registry_user.user_permissions.add(
+            Permission.objects.get(codename="view_file", content_type__app_label="document_management")
+        )
+        client = Client()
+        client.force_login(registry_user)
+        client.post(reverse("document_management:file_recall", kwargs={"pk": self.files[1].pk}))
+        self.assertFalse(FileAccessRequest.objects.filter(file=self.files[1], status="approved").exists())
+        self.assertFalse(has_active_grant(self.user, self.files[1]))
+
+
+class OrgScopeTest(TestCase):
+    def setUp(self):
+        registry_user = make_user("registry", "Registry")
+        self.dept = Department.objects.create(name="IT Dept", code="IT")
+        self.division = Division.objects.create(name="Infrastructure", department=self.dept)
+        self.unit = Unit.objects.create(name="Helpdesk", department=self.dept, division=self.division)
+        member = Staff.objects.create(user=make_user("member"), department=self.dept, unit=self.unit)
+        outsider = make_staff(make_user("outsider"), dept=Department.objects.create(name="Finance", code="FIN"))
+
+        common = {"created_by": registry_user, "status": "active"}
+        self.unit_file = File.objects.create(
+            title="UNIT POLICY", file_type="policy", department=self.dept, unit=self.unit, **common
+        )
+        self.dept_file = File.objects.create(title="DEPT POLICY", file_type="policy", department=self.dept, **common)
+        self.personal = File.objects.create(title="MEMBER", file_type="personal", owner=member, **common)
+        self.other = File.objects.create(title="OTHER", file_type="personal", owner=outsider, **common)
+
+    def _titles(self, node):
+        return set(File.objects.within_org_node(node).values_list("title", flat=True))
+
+    def test_subtree_rollup(self):
+        self.assertEqual(self._titles(self.dept), {"UNIT POLICY", "DEPT POLICY", "MEMBER"})
+        self.assertEqual(self._titles(self.division), {"UNIT POLICY", "MEMBER"})
+        self.assertEqual(self._titles(self.unit), {"UNIT POLICY", "MEMBER"})
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            list(File.objects.within_org_node(self.dept))
@@ -45,6 +45,7 @@ urlpatterns = [
         report_views.DepartmentPerformanceReportView.as_view(),
         name="report_dept_performance",
     ),
+    path("reports/bottlenecks/", report_views.BottleneckReportView.as_view(), name="report_bottlenecks"),
     path("recipient-search/", views.RecipientSearchView.as_view(), name="recipient_search"),
     path("staff-without-files/", views.StaffWithoutFilesView.as_view(), name="staff_without_files"),
     path("access-requests/", views.FileAccessRequestListView.as_view(), name="access_request_list"),
@@ -68,6 +69,7 @@ urlpatterns = [
     path("chains/templates/create/", views.ChainTemplateBuilderView.as_view(), name="chain_template_create"),
     path("chains/templates/<int:pk>/edit/", views.ChainTemplateBuilderView.as_view(), name="chain_template_edit"),
     path("chains/templates/<int:pk>/delete/", views.ChainTemplateDeleteView.as_view(), name="chain_template_delete"),
+    path("chains/templates/preview/", views.ChainTemplatePreviewView.as_view(), name="chain_template_preview"),
     path("file/<int:file_pk>/chain/create/", views.ApprovalChainCreateView.as_view(), name="chain_create"),
     path(
         "file/<int:file_pk>/chain/apply-template/", views.ApplyChainTemplateView.as_view(), name="chain_apply_template"
@@ -15,6 +15,7 @@ from .approval_views import (  # noqa: F401
     ChainTemplateBuilderView,
     ChainTemplateDeleteView,
     ChainTemplateListView,
+    ChainTemplatePreviewView,
     MyApprovalChainsView,
 )
 from .base import HTMXLoginRequiredMixin  # noqa: F401
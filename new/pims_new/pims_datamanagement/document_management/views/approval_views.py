@@ -2,13 +2,16 @@ import json
 
 from audit_log.utils import log_action
 from django.contrib import messages
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.views.generic import ListView, View
 from notifications.utils import create_notification
 
+from ..grants import has_active_grant
 from ..models import ApprovalChain, ApprovalStep, ChainTemplate, ChainTemplateStep, File
+from ..sla import current_steps, sla_summary, sla_threshold
 from .base import HTMXLoginRequiredMixin, RegistryRequiredMixin
 
 
@@ -104,6 +107,20 @@ class ApprovalReviewView(HTMXLoginRequiredMixin, View):
         )
 
 
+def _mark_overdue_steps(chains, now):
+    """Flag each chain's current step with ``sla_overdue`` when it has waited past the SLA."""
+    cutoff = now - sla_threshold()
+    for chain in chains:
+        for step in chain.steps.all():
+            step.sla_overdue = (
+                chain.status == "active"
+                and step.order == chain.current_step
+                and step.status == "pending"
+                and step.started_at is not None
+                and step.started_at <= cutoff
+            )
+
+
 class AllActiveChainsView(RegistryRequiredMixin, ListView):
     template_name = "document_management/all_chains.html"
     context_object_name = "chains"
@@ -116,6 +133,13 @@ class AllActiveChainsView(RegistryRequiredMixin, ListView):
             .order_by("-created_at")
         )
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        now = timezone.now()
+        context["sla"] = sla_summary(ApprovalStep.objects.all(), current_steps(), now=now)
+        _mark_overdue_steps(context["chains"], now)
+        return context
+
 
 class MyApprovalChainsView(HTMXLoginRequiredMixin, ListView):
     template_name = "document_management/my_chains.html"
@@ -142,6 +166,12 @@ class MyApprovalChainsView(HTMXLoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         staff = getattr(self.request.user, "staff", None)
         context["staff"] = staff
+        now = timezone.now()
+        if staff:
+            context["sla"] = sla_summary(
+                ApprovalStep.objects.filter(approver=staff), current_steps().filter(approver=staff), now=now
+            )
+        _mark_overdue_steps(context["chains"], now)
         # Annotate each current step with its review URL
         from django.urls import reverse
 
@@ -277,6 +307,7 @@ class ApprovalChainStartView(HTMXLoginRequiredMixin, View):
         chain.status = "active"
         chain.current_step = first_step.order
         chain.save()
+        first_step.mark_current()
 
         # Mark document as in_transit
         if chain.document:
@@ -336,7 +367,7 @@ class ApprovalStepActionView(HTMXLoginRequiredMixin, View):
         note = request.POST.get("note", "").strip()
         step.note = note
         step.signature = active_sig
-        step.actioned_at = timezone.now()
+        step.record_action()
 
         if action == "approve":
             step.status = "approved"
@@ -420,12 +451,13 @@ class ChainTemplateBuilderView(RegistryRequiredMixin, View):
     """Canvas-based chain template builder for admin/registry."""
 
     def get(self, request, pk=None):
-        from organization.models import Department, Designation
         from organization.models import Staff as StaffModel
+        from organization.snapshot import get_snapshot
 
         template = get_object_or_404(ChainTemplate, pk=pk) if pk else None
-        departments = Department.objects.all().order_by("name")
-        designations = Designation.objects.all().order_by("level")
+        snapshot = get_snapshot()
+        departments = snapshot.departments
+        designations = snapshot.designations
         staff_list = StaffModel.objects.select_related("user", "designation", "department").order_by("user__last_name")
 
         existing_steps = []
@@ -482,16 +514,20 @@ class ChainTemplateBuilderView(RegistryRequiredMixin, View):
         except json.JSONDecodeError:
             steps = []
 
-        for i, step in enumerate(steps, start=1):
-            ChainTemplateStep.objects.create(
-                template=tmpl,
-                order=i,
-                role_type=step.get("role_type", "specific_person"),
-                department_scope=step.get("department_scope", "sender"),
-                specific_department_id=step.get("specific_department_id") or None,
-                designation_id=step.get("designation_id") or None,
-                staff_id=step.get("staff_id") or None,
-            )
+        ChainTemplateStep.objects.bulk_create(
+            [
+                ChainTemplateStep(
+                    template=tmpl,
+                    order=i,
+                    role_type=step.get("role_type", "specific_person"),
+                    department_scope=step.get("department_scope", "sender"),
+                    specific_department_id=step.get("specific_department_id") or None,
+                    designation_id=step.get("designation_id") or None,
+                    staff_id=step.get("staff_id") or None,
+                )
+                for i, step in enumerate(steps, start=1)
+            ]
+        )
 
         messages.success(request, f"Chain template '{tmpl.name}' saved.")
         log_action(
@@ -512,13 +548,27 @@ class ChainTemplateDeleteView(RegistryRequiredMixin, View):
         return redirect(reverse_lazy("document_management:chain_template_list"))
 
 
+class ChainTemplatePreviewView(HTMXLoginRequiredMixin, View):
+    """HTMX: show who each step of a chain template resolves to for the current user."""
+
+    def get(self, request):
+        staff = getattr(request.user, "staff", None)
+        template_id = request.GET.get("template_id", "")
+        if not staff or not template_id.isdigit():
+            return HttpResponse("")
+        tmpl = get_object_or_404(ChainTemplate, pk=template_id, is_active=True)
+        return render(
+            request,
+            "document_management/partials/_chain_template_preview.html",
+            {"template": tmpl, "resolved_steps": tmpl.resolve_all(staff)},
+        )
+
+
 class ApplyChainTemplateView(HTMXLoginRequiredMixin, View):
     """Staff applies a chain template to a specific document when dispatching."""
 
     def post(self, request, file_pk):
-        from django.db.models import Q
-
-        from document_management.models import Document, FileAccessRequest
+        from document_management.models import Document
 
         file_obj = get_object_or_404(File, pk=file_pk)
         staff = getattr(request.user, "staff", None)
@@ -542,11 +592,7 @@ class ApplyChainTemplateView(HTMXLoginRequiredMixin, View):
             file_obj.owner == staff
             or file_obj.current_location == staff
             or is_hod_of_policy
-            or FileAccessRequest.objects.filter(
-                file=file_obj, requested_by=request.user, status="approved", access_type="read_write"
-            )
-            .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-            .exists()
+            or has_active_grant(request.user, file_obj, "read_write")
         )
         if not has_rw:
             messages.error(request, "You need read & write access to dispatch a chain.")
@@ -558,7 +604,8 @@ class ApplyChainTemplateView(HTMXLoginRequiredMixin, View):
         tmpl = get_object_or_404(ChainTemplate, pk=template_id, is_active=True)
         document = get_object_or_404(Document, pk=document_id, file=file_obj)
 
-        if not tmpl.steps.exists():
+        resolved = tmpl.resolve_all(staff)
+        if not resolved:
             messages.error(request, f"Chain template '{tmpl.name}' has no steps defined.")
             return redirect(file_obj.get_absolute_url())
 
@@ -566,6 +613,16 @@ class ApplyChainTemplateView(HTMXLoginRequiredMixin, View):
             messages.error(request, "This document already has an active approval chain.")
             return redirect(file_obj.get_absolute_url())
 
+        unresolved = [str(step) for step, approver in resolved if not approver]
+        if len(unresolved) == len(resolved):
+            messages.error(
+                request,
+                "No approvers could be resolved for this chain template. "
+                "Check that the required staff (HOD, unit manager, etc.) "
+                "are assigned.",
+            )
+            return redirect(file_obj.get_absolute_url())
+
         dispatch_message = request.POST.get("dispatch_message", "").strip()
         reference_doc_ids = request.POST.getlist("reference_documents")
 
@@ -580,23 +637,9 @@ class ApplyChainTemplateView(HTMXLoginRequiredMixin, View):
             from document_management.models import Document as Doc
 
             chain.reference_documents.set(Doc.objects.filter(pk__in=reference_doc_ids, file=file_obj))
-        unresolved = []
-        for step in tmpl.steps.all():
-            approver = step.resolve(staff)
-            if not approver:
-                unresolved.append(str(step))
-                continue
-            ApprovalStep.objects.create(chain=chain, approver=approver, order=step.order)
-
-        if chain.steps.count() == 0:
-            chain.delete()
-            messages.error(
-                request,
-                "No approvers could be resolved for this chain template. "
-                "Check that the required staff (HOD, unit manager, etc.) "
-                "are assigned.",
-            )
-            return redirect(file_obj.get_absolute_url())
+        ApprovalStep.objects.bulk_create(
+            [ApprovalStep(chain=chain, approver=approver, order=step.order) for step, approver in resolved if approver]
+        )
 
         if unresolved:
             messages.warning(request, f"Chain applied. Could not resolve: {', '.join(unresolved)}")
@@ -1,12 +1,13 @@
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.paginator import Paginator
 from django.db.models import Q
 from django.http import HttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 
 # Reusable Q filter to exclude registry staff
-EXCLUDE_REGISTRY_Q = Q(designation__name__icontains="registry") | Q(user__groups__name__iexact="Registry")
+EXCLUDE_REGISTRY_Q = Q(registry_role=True)
 
 
 class HTMXLoginRequiredMixin(LoginRequiredMixin):
@@ -40,3 +41,60 @@ class RegistryRequiredMixin(HTMXLoginRequiredMixin, UserPassesTestMixin):
             return super().handle_no_permission()
         messages.error(self.request, "Only registry staff can access this page.")
         return redirect("document_management:my_files")
+
+
+class OutgoingRegisterMixin:
+    """
+    Sortable, paginated register of files held outside the registry.
+
+    Custody start, time held and the overdue flag come from
+    File.objects.with_custody(), so sorting by time held, the overdue filter
+    and the counts all run in SQL over the whole register, not a slice of it.
+    Reads ``outgoing_sort``, ``outgoing_overdue`` ("1"/"0") and
+    ``outgoing_page`` from the query string.
+    """
+
+    OUTGOING_SORTS = {
+        "newest": ("Newest files", ("-created_at", "-pk")),
+        "longest": ("Held longest", ("custody_started_at", "pk")),
+        "shortest": ("Held shortest", ("-custody_started_at", "-pk")),
+    }
+    outgoing_paginate_by = 20
+    outgoing_default_sort = "newest"
+    outgoing_default_overdue = False
+
+    def get_outgoing_context(self, queryset, total=None, overdue=None):
+        """
+        Register context for ``queryset``. ``total`` and ``overdue`` may be
+        passed in when the caller already has them from StatsService.
+        """
+        params = self.request.GET
+        sort = params.get("outgoing_sort")
+        if sort not in self.OUTGOING_SORTS:
+            sort = self.outgoing_default_sort
+        overdue_param = params.get("outgoing_overdue")
+        overdue_only = self.outgoing_default_overdue if overdue_param is None else overdue_param == "1"
+
+        register = queryset.with_custody()
+        if overdue_only:
+            register = register.filter(custody_overdue=True)
+        register = register.order_by(*self.OUTGOING_SORTS[sort][1])
+        page = Paginator(register, self.outgoing_paginate_by).get_page(params.get("outgoing_page"))
+
+        if total is None:
+            total = queryset.count()
+        if overdue is None:
+            overdue = page.paginator.count if overdue_only else queryset.overdue().count()
+
+        query = params.copy()
+        query.pop("outgoing_page", None)
+        return {
+            "outgoing_page": page,
+            "outgoing_files": page.object_list,
+            "outgoing_files_count": total,
+            "outgoing_overdue_count": overdue,
+            "outgoing_sort": sort,
+            "outgoing_sort_choices": [(key, label) for key, (label, _) in self.OUTGOING_SORTS.items()],
+            "outgoing_overdue_only": overdue_only,
+            "outgoing_query": query.urlencode(),
+        }
@@ -1,9 +1,6 @@
-import contextlib
-
 from audit_log.utils import log_action
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
@@ -12,9 +9,10 @@ from notifications.utils import create_notification
 from organization.models import Staff
 
 from ..forms import DocumentForm, DocumentUploadForm, SendFileForm
+from ..grants import has_active_grant
 from ..models import Document, File, FileAccessRequest, FileMovement
 from .base import HTMXLoginRequiredMixin
-from ..permissions import can_share_document
+from ..permissions import can_share_document, capabilities_for
 
 
 class DocumentUploadView(LoginRequiredMixin, CreateView):
@@ -62,14 +60,7 @@ class DocumentUploadView(LoginRequiredMixin, CreateView):
 
         is_registry = staff and staff.is_registry
         is_custodian = staff and file_obj.current_location == staff
-        has_rw = (
-            is_custodian
-            and FileAccessRequest.objects.filter(
-                file=file_obj, requested_by=user, status="approved", access_type="read_write"
-            )
-            .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-            .exists()
-        )
+        has_rw = is_custodian and has_active_grant(user, file_obj, "read_write")
 
         if not (is_registry or has_rw):
             messages.error(self.request, "You do not have permission to add documents to this file.")
@@ -98,11 +89,7 @@ class DocumentDeleteView(LoginRequiredMixin, UserPassesTestMixin, View):
         file_obj = document.file
         user = self.request.user
 
-        active_access = FileAccessRequest.objects.filter(
-            file=file_obj, requested_by=user, status="approved", access_type="read_write"
-        ).first()
-
-        if active_access and active_access.is_active:
+        if has_active_grant(user, file_obj, "read_write"):
             return True
 
         return document.uploaded_by == user
@@ -135,55 +122,24 @@ class DocumentDetailView(HTMXLoginRequiredMixin, DetailView):
     template_name = "document_management/document_detail.html"
     context_object_name = "document"
 
-    def has_permission(self):
-        if not self.request.user.is_authenticated:
-            return False
-        document = self.get_object()
-        file_obj = document.file
-        user = self.request.user
-
-        try:
-            staff_user = Staff.objects.get(user=user)
-        except Staff.DoesNotExist:
-            return False
+    def get_object(self, queryset=None):
+        if not hasattr(self, "_document"):
+            self._document = super().get_object(queryset)
+        return self._document
 
-        # Only HODs, Supervisors, Executives, and MD can view document contents
-        # Registry and general staff cannot view document contents
-        from ..permissions import can_view_document_content, can_view_document
+    def get_capabilities(self):
+        """Permission flags for the current user on this document, evaluated once per request."""
+        if not hasattr(self, "_capabilities"):
+            document = self.get_object()
+            self._capabilities = capabilities_for(self.request.user, [document])[document.pk]
+        return self._capabilities
 
-        if not can_view_document_content(user):
+    def has_permission(self):
+        if not self.request.user.is_authenticated:
             return False
-
-        if can_view_document(user, document):
-            return True
-
-        if staff_user == file_obj.current_location:
-            return True
-
-        # Registry content restriction is already enforced above
-
-        active_request = (
-            FileAccessRequest.objects.filter(
-                file=file_obj,
-                requested_by=user,
-                status="approved",
-            )
-            .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-            .exists()
-        )
-        if active_request:
-            return True
-
-        if document.shared_with.filter(id=user.id).exists():
-            return True
-
-        # Allow recipient of a pending movement to view the document
-        if FileMovement.objects.filter(document=document, sent_to=staff_user, status="pending").exists():
-            return True
-
-        # Allow current approver on the chain to view the document
-        active_chain = document.approval_chains.filter(status="active").first()
-        return bool(active_chain and active_chain.steps.filter(approver=staff_user).exists())
+        # Only HODs, Supervisors, Executives, and MD can view document contents;
+        # registry and general staff cannot (see permissions.capabilities_for)
+        return self.get_capabilities()["view"]
 
     def dispatch(self, request, *args, **kwargs):
         if not self.has_permission():
@@ -195,45 +151,10 @@ class DocumentDetailView(HTMXLoginRequiredMixin, DetailView):
         document = self.object
         file_obj = document.file
 
-        is_registry = False
-        with contextlib.suppress(AttributeError):
-            is_registry = self.request.user.staff.is_registry
-
-        is_custodian = hasattr(self.request.user, "staff") and file_obj.current_location == self.request.user.staff
-        is_owner = hasattr(self.request.user, "staff") and file_obj.owner == self.request.user.staff
-
-        has_approved_access = (
-            FileAccessRequest.objects.filter(file=file_obj, requested_by=self.request.user, status="approved")
-            .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-            .exists()
-        )
-
-        access_type = None
-        if has_approved_access:
-            active_access = (
-                FileAccessRequest.objects.filter(file=file_obj, requested_by=self.request.user, status="approved")
-                .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-                .first()
-            )
-            if active_access:
-                access_type = active_access.access_type
-
-        context["can_add_minute"] = (
-            is_registry or (is_custodian and access_type == "read_write")
-        ) and file_obj.status == "active"
-
-        can_send_file = False
-        # Can only dispatch if: active file, no active chain, AND not already approved
-        if (
-            file_obj.status == "active"
-            and not file_obj.is_in_active_chain
-            and document.status != "approved"
-            and (is_owner or is_custodian or is_registry)
-        ):
-            can_send_file = True
-
-        context["can_send_file"] = can_send_file
-        context["has_active_chain"] = file_obj.is_in_active_chain
+        caps = self.get_capabilities()
+        context["can_add_minute"] = caps["add_document"]
+        context["can_send_file"] = caps["dispatch"]
+        context["has_active_chain"] = caps["in_active_chain"]
         context["document_is_approved"] = document.status == "approved"
 
         # Document chronicle
@@ -614,11 +535,7 @@ class DocumentDownloadView(LoginRequiredMixin, View):
             allowed = True
 
         if not allowed:
-            allowed = (
-                FileAccessRequest.objects.filter(file=file_obj, requested_by=user, status="approved")
-                .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-                .exists()
-            )
+            allowed = has_active_grant(user, file_obj)
 
         if not allowed:
             allowed = document.shared_with.filter(pk=user.pk).exists()
@@ -665,13 +582,7 @@ class DocumentCreateView(LoginRequiredMixin, CreateView):
 
         staff_user = getattr(request.user, "staff", None)
 
-        has_approved_access = (
-            FileAccessRequest.objects.filter(
-                file=self.file_obj, requested_by=request.user, status="approved", access_type="read_write"
-            )
-            .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-            .exists()
-        )
+        has_approved_access = has_active_grant(request.user, self.file_obj, "read_write")
 
         if has_approved_access:
             if self.file_obj.status != "active":
@@ -865,9 +776,7 @@ class StandaloneUrgentDocumentCreateView(LoginRequiredMixin, CreateView):
             recipients = (
                 Staff.objects.exclude(EXCLUDE_REGISTRY_Q)
                 .exclude(user=self.request.user)
-                .filter(
-                    Q(is_hod=True) | Q(is_effective_supervisor=True) | Q(is_executive=True) | Q(is_md=True)
-                )
+                .filter(supervisor_role=True)
                 .select_related("user")
             )
             for recipient in recipients:
@@ -1,14 +1,17 @@
-from datetime import timedelta
 import logging
 
 from audit_log.models import AuditLogEntry
 from audit_log.utils import log_action
+from core.pagination import KeysetPaginationMixin
+from core.utils.dates import day_range
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import (
     LoginRequiredMixin,
     PermissionRequiredMixin,
     UserPassesTestMixin,
 )
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import PermissionDenied
 from django.db.models import Prefetch, Q
 from django.http import Http404, HttpResponse
@@ -25,15 +28,30 @@ from django.views.generic import (
 )
 from notifications.utils import create_notification
 from organization.models import Department, Staff
+from organization.snapshot import get_snapshot
 
 from ..forms import FileAccessRequestForm, FileForm, FileUpdateForm, SendFileForm
-from ..models import Document, DocumentSignature, EmailLog, File, FileAccessRequest, FileMovement
-from .base import EXCLUDE_REGISTRY_Q, HTMXLoginRequiredMixin
+from ..models import (
+    DashboardSnapshot,
+    Document,
+    DocumentSignature,
+    EmailLog,
+    File,
+    FileAccessRequest,
+    FileCounter,
+    FileMovement,
+)
+from ..grants import has_active_grant, invalidate_grants
+from ..permissions import capabilities_for
+from ..registry_desk import next_registry_officer_id
+from ..routing import FORWARD, allowed_recipient_pks
+from ..stats import executive_counters, outgoing_q
+from .base import EXCLUDE_REGISTRY_Q, HTMXLoginRequiredMixin, OutgoingRegisterMixin
 
 logger = logging.getLogger("document_management")
 
 
-class ExecutiveDashboardView(HTMXLoginRequiredMixin, PermissionRequiredMixin, TemplateView):
+class ExecutiveDashboardView(HTMXLoginRequiredMixin, PermissionRequiredMixin, OutgoingRegisterMixin, TemplateView):
     """
     Comprehensive dashboard for executives, HODs, and unit managers.
     Shows department/unit-specific metrics based on role.
@@ -41,6 +59,14 @@ class ExecutiveDashboardView(HTMXLoginRequiredMixin, PermissionRequiredMixin, Te
 
     template_name = "document_management/executive_dashboard.html"
     permission_required = "document_management.view_file"
+    outgoing_paginate_by = 10
+    outgoing_default_sort = "longest"
+    outgoing_default_overdue = True
+
+    def get_template_names(self):
+        if self.request.headers.get("HX-Target") == "executive-outgoing-list":
+            return ["document_management/partials/_executive_outgoing_list.html"]
+        return [self.template_name]
 
     def test_func(self):
         staff_user = self.get_staff_user()
@@ -58,87 +84,70 @@ class ExecutiveDashboardView(HTMXLoginRequiredMixin, PermissionRequiredMixin, Te
         if not (staff_user.is_hod or staff_user.is_unit_manager or staff_user.is_executive):
             raise PermissionDenied("Only executives, HODs, and unit managers can access this dashboard.")
 
-        today = timezone.now().date()
-
-        if self.request.user.is_superuser or staff_user.is_executive or staff_user.is_md:
-            scope_filter = Q()
+        scope_kind, node = self.get_scope(staff_user)
+        if scope_kind == DashboardSnapshot.SCOPE_ORGANIZATION:
+            scoped_files = File.objects.all()
             context["scope_title"] = "Organization-Wide"
-        elif staff_user.is_hod:
-            scope_filter = Q(department=staff_user.department)
-            context["scope_title"] = f"{staff_user.department.name} Department"
-        elif staff_user.is_unit_manager:
-            scope_filter = Q(owner__unit=staff_user.unit)
-            context["scope_title"] = f"{staff_user.unit.name} Unit"
+        elif scope_kind == DashboardSnapshot.SCOPE_DEPARTMENT:
+            scoped_files = File.objects.within_org_node(node)
+            context["scope_title"] = f"{node.name} Department"
+        elif scope_kind == DashboardSnapshot.SCOPE_UNIT:
+            scoped_files = File.objects.within_org_node(node)
+            context["scope_title"] = f"{node.name} Unit"
         else:
-            scope_filter = Q(owner=staff_user)
+            scoped_files = File.objects.filter(owner=staff_user)
             context["scope_title"] = "Personal"
 
-        context["total_files"] = File.objects.filter(scope_filter).count()
-        context["active_files"] = File.objects.filter(scope_filter, status="active").count()
-        context["pending_activation"] = File.objects.filter(scope_filter, status="pending_activation").count()
-        context["closed_files"] = File.objects.filter(scope_filter, status="closed").count()
-        context["archived_files"] = File.objects.filter(scope_filter, status="archived").count()
-
-        context["personal_files_count"] = File.objects.filter(scope_filter, file_type="personal").count()
-        context["policy_files_count"] = File.objects.filter(scope_filter, file_type="policy").count()
-
-        registry_staff_ids = Staff.objects.filter(
-            Q(designation__name__icontains="registry") | Q(user__groups__name__iexact="Registry")
-        ).values_list("id", flat=True)
-
-        outgoing_files = (
-            File.objects.filter(scope_filter, status="active")
-            .exclude(Q(current_location__isnull=True) | Q(current_location__id__in=registry_staff_ids))
-            .select_related("current_location", "owner", "department")
+        outgoing_files = scoped_files.filter(outgoing_q()).select_related("current_location__user")
+        if self.request.headers.get("HX-Target") == "executive-outgoing-list":
+            # Paging or re-sorting the register only needs the register itself
+            context.update(self.get_outgoing_context(outgoing_files))
+            return context
+
+        counters, as_of = self.get_counters(scope_kind, node, scoped_files)
+        context.update(counters)
+        context["stats_as_of"] = as_of
+        context.update(
+            self.get_outgoing_context(
+                outgoing_files, total=counters["outgoing_files_count"], overdue=counters["outgoing_overdue_count"]
+            )
         )
 
-        overdue_list = []
-        for f in outgoing_files:
-            if f.is_overdue():
-                overdue_list.append({"file": f, "custody_duration": f.get_custody_duration()})
-
-        context["overdue_files"] = overdue_list[:10]
-        context["overdue_count"] = len(overdue_list)
-        context["outgoing_files_count"] = outgoing_files.count()
-
-        context["recent_files"] = File.objects.filter(scope_filter).order_by("-created_at")[:10]
+        context["recent_files"] = scoped_files.order_by("-created_at")[:10]
 
-        context["docs_added_today"] = Document.objects.filter(
-            file__in=File.objects.filter(scope_filter), uploaded_at__date=today
-        ).count()
+        context["pending_access_requests"] = FileAccessRequest.objects.filter(
+            file__in=scoped_files, status="pending"
+        ).order_by("-created_at")[:5]
 
-        context["files_created_this_week"] = File.objects.filter(
-            scope_filter, created_at__gte=today - timedelta(days=7)
-        ).count()
+        return context
 
+    def get_scope(self, staff_user):
+        """(DashboardSnapshot scope kind, department or unit) the dashboard is scoped to; (None, None) if personal."""
+        if self.request.user.is_superuser or staff_user.is_executive or staff_user.is_md:
+            return DashboardSnapshot.SCOPE_ORGANIZATION, None
         if staff_user.is_hod:
-            context["total_staff"] = Staff.objects.filter(department=staff_user.department).count()
-            staff_with_files = (
-                File.objects.filter(scope_filter, file_type="personal").values_list("owner_id", flat=True).distinct()
-            )
-            context["staff_with_files_count"] = len(staff_with_files)
-            context["staff_without_files_count"] = context["total_staff"] - context["staff_with_files_count"]
+            return DashboardSnapshot.SCOPE_DEPARTMENT, staff_user.department
+        if staff_user.is_unit_manager:
+            return DashboardSnapshot.SCOPE_UNIT, staff_user.unit
+        return None, None
 
-        elif staff_user.is_unit_manager:
-            context["total_staff"] = Staff.objects.filter(unit=staff_user.unit).count()
-            staff_with_files = (
-                File.objects.filter(scope_filter, file_type="personal").values_list("owner_id", flat=True).distinct()
+    def get_counters(self, scope_kind, node, scoped_files):
+        """
+        Tile counters and the time they were computed: from the newest
+        DashboardSnapshot for the scope, or live (as of None) when there is no
+        recent one.
+        """
+        if scope_kind:
+            snapshot = DashboardSnapshot.objects.latest_for(
+                scope_kind, node.pk if node else None, max_age=settings.DASHBOARD_SNAPSHOT_MAX_AGE
             )
-            context["staff_with_files_count"] = len(staff_with_files)
-            context["staff_without_files_count"] = context["total_staff"] - context["staff_with_files_count"]
-
-        context["pending_access_requests"] = FileAccessRequest.objects.filter(
-            file__in=File.objects.filter(scope_filter), status="pending"
-        ).order_by("-created_at")[:5]
-
-        return context
+            if snapshot is not None:
+                return snapshot.data, snapshot.created_at
+        scoped_staff = Staff.objects.within_org_node(node) if node else None
+        return executive_counters(scoped_files, staff=scoped_staff), None
 
     def get_staff_user(self):
-        user = self.request.user
-        try:
-            return Staff.objects.get(user=user)
-        except Staff.DoesNotExist:
-            return None
+        return getattr(self.request.user, "staff", None)
 
     def handle_no_permission(self):
         if not self.request.user.is_authenticated:
@@ -238,11 +247,7 @@ class FileCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
         return redirect(self.get_success_url())
 
     def get_staff_user(self):
-        user = self.request.user
-        try:
-            return Staff.objects.get(user=user)
-        except Staff.DoesNotExist:
-            return None
+        return getattr(self.request.user, "staff", None)
 
 def handle_no_permission(self):
         if not self.request.user.is_authenticated:
@@ -306,11 +311,7 @@ class MyFilesView(HTMXLoginRequiredMixin, ListView):
         return context
 
     def get_staff_user(self):
-        user = self.request.user
-        try:
-            return Staff.objects.get(user=user)
-        except Staff.DoesNotExist:
-            return None
+        return getattr(self.request.user, "staff", None)
 
 
 class MessagesView(HTMXLoginRequiredMixin, View):
@@ -322,11 +323,7 @@ class MessagesView(HTMXLoginRequiredMixin, View):
 
 class FileRequestActivationView(LoginRequiredMixin, View):
     def get_staff_user(self):
-        user = self.request.user
-        try:
-            return Staff.objects.get(user=user)
-        except Staff.DoesNotExist:
-            return None
+        return getattr(self.request.user, "staff", None)
 
     def post(self, request, pk):
         file_obj = get_object_or_404(File, pk=pk)
@@ -384,7 +381,9 @@ class FileRecallView(HTMXLoginRequiredMixin, PermissionRequiredMixin, View):
         )
 
         # Revoke all approved read & write access on recall
-        revoked_count = FileAccessRequest.objects.filter(file=file_obj, status="approved").update(status="expired")
+        revoked = FileAccessRequest.objects.filter(file=file_obj, status="approved")
+        invalidate_grants(*revoked.values_list("requested_by_id", flat=True))
+        revoked_count = revoked.update(status="expired")
 
         log_action(
             request.user,
@@ -403,11 +402,7 @@ class FileRecallView(HTMXLoginRequiredMixin, PermissionRequiredMixin, View):
         return redirect(file_obj.get_absolute_url())
 
     def get_staff_user(self):
-        user = self.request.user
-        try:
-            return Staff.objects.get(user=user)
-        except Staff.DoesNotExist:
-            return None
+        return getattr(self.request.user, "staff", None)
 
 
 class FileDetailView(HTMXLoginRequiredMixin, PermissionRequiredMixin, DetailView):
@@ -416,89 +411,40 @@ class FileDetailView(HTMXLoginRequiredMixin, PermissionRequiredMixin, DetailView
     context_object_name = "file"
     permission_required = "document_management.view_file"
 
-    def has_permission(self):
-        file_obj = self.get_object()
-        user = self.request.user
-
-        if user.is_superuser:
-            return True
-
-        staff_user = getattr(user, "staff", None)
-        if not staff_user:
-            return False
-
-        if staff_user.is_registry:
-            return True
-
-        if staff_user.is_md:
-            return True  # MD sees all files org-wide
-
-        if file_obj.file_type == "policy":
-            if staff_user.is_hod and file_obj.department == staff_user.department:
-                return True
-            if staff_user.is_unit_manager and file_obj.department == staff_user.department:
-                return True
-
-        if (
-            file_obj.file_type == "personal"
-            and staff_user.is_hod
-            and (
-                (file_obj.owner and file_obj.owner.department == staff_user.department)
-                or file_obj.department == staff_user.department
-            )
-        ):
-            return True
-
-        if file_obj.owner == staff_user:
-            # Owner can see the file page but needs an access request to view content
-            return True
+    def get_object(self, queryset=None):
+        if not hasattr(self, "_file_obj"):
+            self._file_obj = super().get_object(queryset)
+        return self._file_obj
 
-        if file_obj.current_location == staff_user:
-            return True
-
-        has_approved_access = (
-            FileAccessRequest.objects.filter(file=file_obj, requested_by=user, status="approved")
-            .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-            .exists()
-        )
+    def get_capabilities(self, refresh=False):
+        """Permission flags for the current user on this file, evaluated once per request."""
+        if refresh or not hasattr(self, "_capabilities"):
+            file_obj = self.get_object()
+            self._capabilities = capabilities_for(self.request.user, [file_obj])[file_obj.pk]
+        return self._capabilities
 
-        return bool(has_approved_access)
+    def has_permission(self):
+        return self.get_capabilities()["view"]
 
     def _reclaim_expired_custody(self, file_obj):
-        """If current custodian holds the file via an expired access request, return it to registry."""
+        """
+        If current custodian holds the file via an expired access request, return it to registry.
+        Returns True when custody was moved.
+        """
         holder = file_obj.current_location
         if not holder or holder.is_registry:
-            return
+            return False
         # Check if holder is the file owner — owners always keep custody
-        if file_obj.owner == holder:
-            return
+        if file_obj.owner_id == holder.pk:
+            return False
         # Check if holder has any active (non-expired) approved access
-        active_access = (
-            FileAccessRequest.objects.filter(file=file_obj, requested_by=holder.user, status="approved")
-            .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-            .exists()
-        )
-        if not active_access:
-            # Find any registry staff to return to
-            from organization.models import Staff as StaffModel
-
-            registry_staff = StaffModel.objects.filter(
-                Q(designation__name__icontains="registry") | Q(user__groups__name__iexact="Registry")
-            ).first()
-            if registry_staff:
-                file_obj.current_location = registry_staff
+        if not has_active_grant(holder.user, file_obj):
+            registry_officer_id = next_registry_officer_id()
+            if registry_officer_id:
+                file_obj.current_location_id = registry_officer_id
                 file_obj.save(update_fields=["current_location"])
-
-    def can_view_original(self, file, user):
-        """
-        Who can view actual document contents (minute_content, attachments).
-        Only HODs, Supervisors, Executives, and MD.
-        Registry staff and general staff cannot view document contents.
-        Sensitive files enforce the same restriction regardless.
-        """
-        from document_management.permissions import can_view_document_content
-
-        return can_view_document_content(user, file=file)
+                return True
+        return False
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -506,54 +452,27 @@ class FileDetailView(HTMXLoginRequiredMixin, PermissionRequiredMixin, DetailView
         user = self.request.user
 
         # Return custody to registry if current holder's access has expired
-        self._reclaim_expired_custody(file_obj)
-
-        is_custodian = hasattr(user, "staff") and file_obj.current_location == user.staff
-
-        has_approved_access = (
-            FileAccessRequest.objects.filter(file=file_obj, requested_by=user, status="approved")
-            .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-            .exists()
-        )
-
-        has_rw_access = (
-            FileAccessRequest.objects.filter(
-                file=file_obj,
-                requested_by=user,
-                status="approved",
-                access_type="read_write",
-            )
-            .filter(Q(expires_at__gt=timezone.now()) | Q(expires_at__isnull=True))
-            .exists()
-        )
-
-        is_registry = hasattr(user, "staff") and user.staff.is_registry
+        caps = self.get_capabilities(refresh=self._reclaim_expired_custody(file_obj))
+        sender_staff = getattr(user, "staff", None)
+        is_registry = sender_staff is not None and sender_staff.is_registry
 
-        hasattr(user, "staff") and file_obj.owner == user.staff
-        context["can_add_minute"] = (
-            is_registry or (is_custodian and has_rw_access)
-        ) and not file_obj.is_in_active_chain
+        context["can_add_minute"] = caps["add_document"]
         context["can_add_minutes"] = context["can_add_minute"]
-        context["can_send_file"] = (
-            (is_custodian or is_registry) and not file_obj.is_in_active_chain and file_obj.status == "active"
-        )
-        context["is_custodian"] = is_custodian
-        context["has_approved_access"] = has_approved_access
-        context["has_rw_access"] = has_rw_access
-        context["access_type"] = "read_write" if has_rw_access else ("read_only" if has_approved_access else None)
+        context["can_send_file"] = caps["dispatch"]
+        context["is_custodian"] = caps["custodian"]
+        context["has_approved_access"] = caps["access_type"] is not None
+        context["has_rw_access"] = caps["read_write"]
+        context["access_type"] = caps["access_type"]
         context["is_registry"] = is_registry
-        context["can_view_original"] = self.can_view_original(file_obj, user)
+        context["can_view_original"] = caps["content"]
         context["is_limited_view"] = not context["can_view_original"]
-        sender_staff = getattr(user, "staff", None)
         context["send_file_form"] = SendFileForm(user=user, staff=sender_staff, file_obj=file_obj)
         context["access_request_form"] = FileAccessRequestForm()
         context["pending_access_request"] = FileAccessRequest.objects.filter(
             file=file_obj, requested_by=user, status="pending"
         ).exists()
         context["movements"] = file_obj.movements.select_related("sent_by", "from_location__user", "sent_to__user")[:20]
-        # Share document permission
-        from document_management.permissions import can_share_document
-        context["can_share_document"] = can_share_document(user)
+        context["can_share_document"] = caps["share"]
 
         # Build recipient list using central permission function
         from document_management.permissions import get_dispatch_recipients
@@ -581,7 +500,7 @@ class FileDetailView(HTMXLoginRequiredMixin, PermissionRequiredMixin, DetailView
         )
 
         # Active document chain (if any)
-        context["is_in_active_chain"] = file_obj.is_in_active_chain
+        context["is_in_active_chain"] = caps["in_active_chain"]
         context["active_document_chain"] = (
             ApprovalChain.objects.filter(file=file_obj, status__in=["draft", "active"])
             .select_related("document")
@@ -593,7 +512,7 @@ class FileDetailView(HTMXLoginRequiredMixin, PermissionRequiredMixin, DetailView
         documents = list(file_obj.documents.select_related("uploaded_by").all())
         context["documents"] = documents
         audit_entries = list(
-            AuditLogEntry.objects.filter(object_id=file_obj.pk, content_type__model="file")
+            AuditLogEntry.objects.filter(content_type=ContentType.objects.get_for_model(File), object_id=file_obj.pk)
             .select_related("user")
             .order_by("timestamp")
         )
@@ -738,6 +657,7 @@ class FileDetailView(HTMXLoginRequiredMixin, PermissionRequiredMixin, DetailView
                 FileAccessRequest.objects.filter(file=file_obj, requested_by=request.user, status="approved").update(
                     status="expired"
                 )
+                invalidate_grants(request.user.pk)
                 messages.success(request, f"File sent to {recipient.user.get_full_name()}.")
                 return redirect("document_management:my_files")
 
@@ -1114,26 +1034,24 @@ class DirectorAdminDashboardView(HTMXLoginRequiredMixin, UserPassesTestMixin, Li
         return self.request.user.is_superuser
 
     def get_staff_user(self):
-        try:
-            return Staff.objects.get(user=self.request.user)
-        except Staff.DoesNotExist:
-            return None
+        return getattr(self.request.user, "staff", None)
 
     def get_queryset(self):
         return File.objects.all().order_by("-created_at")[:10]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["total_files_count"] = File.objects.count()
-        context["active_files_count"] = File.objects.filter(status="active").count()
-        context["pending_activation_count"] = File.objects.filter(status="pending_activation").count()
-        context["archived_files_count"] = File.objects.filter(status="archived").count()
+        status_counts = FileCounter.objects.by_status()
+        context["total_files_count"] = sum(status_counts.values())
+        context["active_files_count"] = status_counts["active"]
+        context["pending_activation_count"] = status_counts["pending_activation"]
+        context["archived_files_count"] = status_counts["archived"]
 
         context["total_staff_count"] = Staff.objects.count()
         context["total_departments_count"] = Department.objects.count()
 
-        today = timezone.now().date()
-        context["actions_today"] = AuditLogEntry.objects.filter(timestamp__date=today).count()
+        since, until = day_range(timezone.localdate())
+        context["actions_today"] = AuditLogEntry.objects.filter(timestamp__gte=since, timestamp__lt=until).count()
         context["recent_activities"] = AuditLogEntry.objects.select_related("user").all()[:10]
 
         return context
@@ -1197,12 +1115,7 @@ class RecordExplorerView(HTMXLoginRequiredMixin, UserPassesTestMixin, ListView):
         # HODs see only their department's files (policy + personal), excluding their own
         # MD sees everything
         if staff and staff.is_hod and not staff.is_md and not staff.is_registry and not self.request.user.is_superuser:
-            dept = staff.department
-            queryset = (
-                queryset.filter(Q(department=dept) | Q(file_type="personal", owner__department=dept))
-                .exclude(file_type="personal", owner=staff)
-                .distinct()
-            )
+            queryset = queryset.within_org_node(staff.department).exclude(file_type="personal", owner=staff)
 
         q = self.request.GET.get("q")
         if q:
@@ -1230,7 +1143,7 @@ class RecordExplorerView(HTMXLoginRequiredMixin, UserPassesTestMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["departments"] = Department.objects.all().order_by("name")
+        context["departments"] = get_snapshot().departments
         context["selected_dept"] = self.request.GET.get("department", "")
         context["selected_file_type"] = self.request.GET.get("file_type", "")
         context["selected_search_query"] = self.request.GET.get("q", "")
@@ -1251,51 +1164,16 @@ class RecordExplorerView(HTMXLoginRequiredMixin, UserPassesTestMixin, ListView):
         return context
 
     def get_staff_user(self):
-        try:
-            return Staff.objects.get(user=self.request.user)
-        except Staff.DoesNotExist:
-            return None
+        return getattr(self.request.user, "staff", None)
 
 
 def _get_allowed_forward_pks(staff):
     """Return set of allowed recipient PKs for forwarding, mirroring send-file routing rules.
     Returns None for MD/Executive (unrestricted)."""
-    from organization.models import Department as Dept
-    from organization.models import Unit
-
-    base_qs = Staff.objects.exclude(
-        Q(designation__name__icontains="registry") | Q(user__groups__name__iexact="Registry")
-    )
-    if staff.is_md or staff.is_executive:
-        return None  # unrestricted
-    if staff.is_hod or staff.is_head_of_unit:
-        # Any HOD, any head of unit, any supervisor
-        pks = set()
-        for d in Dept.objects.filter(head__isnull=False):
-            pks.add(d.head.pk)
-        for u in Unit.objects.filter(head__isnull=False):
-            pks.add(u.head.pk)
-        for s in base_qs.filter(is_supervisor=True):
-            pks.add(s.pk)
-        pks.discard(staff.pk)
-        return pks
-    if staff.is_supervisor:
-        pks = set()
-        for d in Dept.objects.filter(head__isnull=False):
-            pks.add(d.head.pk)
-        for u in Unit.objects.filter(head__isnull=False):
-            pks.add(u.head.pk)
-        return pks
-    # Regular staff
-    pks = set()
-    if staff.unit and staff.unit.head:
-        pks.add(staff.unit.head.pk)
-    elif staff.department and staff.department.head:
-        pks.add(staff.department.head.pk)
-    return pks
-
-
-class InboxView(HTMXLoginRequiredMixin, ListView):
+    return allowed_recipient_pks(staff, FORWARD)
+
+
+class InboxView(HTMXLoginRequiredMixin, KeysetPaginationMixin, ListView):
     """Shows all pending FileMovements sent to the current staff member.
     Supports 'urgent' mode to show urgent/high priority documents needing attention.
     """
@@ -1304,6 +1182,7 @@ class InboxView(HTMXLoginRequiredMixin, ListView):
     template_name = "document_management/inbox.html"
     context_object_name = "movements"
     paginate_by = 15
+    keyset_ordering = ("-moved_at", "-pk")
 
     def get_queryset(self):
         staff = getattr(self.request.user, "staff", None)
@@ -1313,31 +1192,7 @@ class InboxView(HTMXLoginRequiredMixin, ListView):
         mode = self.request.GET.get("mode", "inbox")
 
         if mode == "urgent":
-            # Show urgent/high priority documents in active files that need attention
-            # These are documents with priority != normal that are in active files
-            # and the user has permission to view (custodian, approver, HOD, etc.)
-            from ..models import Document
-            from ..permissions import can_view_document_content
-
-            # Get active files where user has access
-            user_files = File.objects.filter(
-                Q(current_location=staff) |
-                Q(owner=staff) |
-                Q(department=staff.department) if staff.department else Q(),
-                status="active"
-            ).distinct()
-
-            # Get urgent/high priority documents in those files
-            urgent_docs = Document.objects.filter(
-                file__in=user_files,
-                priority__in=["urgent", "high"],
-                status__in=["pending", "in_transit"]
-            ).select_related("file", "uploaded_by").order_by(
-                "-priority", "-uploaded_at"
-            )
-
-            # Convert to a pseudo-movement queryset for template compatibility
-            # We'll handle this in the template with a different context variable
+            # Urgent documents are listed via get_context_data; there are no movements to page through
             return FileMovement.objects.none()
 
         # Default inbox: movements sent to this user
@@ -1364,12 +1219,8 @@ class InboxView(HTMXLoginRequiredMixin, ListView):
         # Urgent mode: fetch urgent documents
         if context["current_mode"] == "urgent" and staff:
             from ..models import Document
-            user_files = File.objects.filter(
-                Q(current_location=staff) |
-                Q(owner=staff) |
-                (Q(department=staff.department) if staff.department else Q()),
-                status="active"
-            ).distinct()
+
+            user_files = File.objects.visible_to(self.request.user).filter(status="active")
 
             # Include standalone urgent documents (file=None) that user can see
             # Plus urgent documents in accessible files
@@ -1382,13 +1233,14 @@ class InboxView(HTMXLoginRequiredMixin, ListView):
         return context
 
 
-class OutboxView(HTMXLoginRequiredMixin, ListView):
+class OutboxView(HTMXLoginRequiredMixin, KeysetPaginationMixin, ListView):
     """Shows all FileMovements sent by the current staff member."""
 
     model = FileMovement
     template_name = "document_management/outbox.html"
     context_object_name = "movements"
     paginate_by = 15
+    keyset_ordering = ("-moved_at", "-pk")
 
     def get_queryset(self):
         staff = getattr(self.request.user, "staff", None)
@@ -1423,25 +1275,6 @@ class OutboxView(HTMXLoginRequiredMixin, ListView):
         return context
 
 
-class OutboxView(HTMXLoginRequiredMixin, ListView):
-    """Shows all FileMovements sent by the current staff member."""
-
-    model = FileMovement
-    template_name = "document_management/outbox.html"
-    context_object_name = "movements"
-    paginate_by = 15
-
-    def get_queryset(self):
-        staff = getattr(self.request.user, "staff", None)
-        if not staff:
-            return FileMovement.objects.none()
-        return (
-            FileMovement.objects.filter(sent_by=self.request.user, action="sent")
-            .select_related("file", "document", "sent_to__user", "from_location__user")
-            .order_by("-moved_at")
-        )
-
-
 class InboxRefDocView(HTMXLoginRequiredMixin, View):
     """Read-only view of a single reference document shared with the inbox recipient."""
 
@@ -1629,13 +1462,7 @@ class DocumentActionView(HTMXLoginRequiredMixin, View):
                     movement.document.status = "approved"
                     movement.document.save(update_fields=["status"])
                 # Transfer custody back to registry and mark file active
-                from django.db.models import Q as DQ
-                from organization.models import Staff as StaffModel
-
-                registry = StaffModel.objects.filter(
-                    DQ(designation__name__icontains="registry") | DQ(user__groups__name__iexact="Registry")
-                ).first()
-                movement.file.current_location = registry
+                movement.file.current_location_id = next_registry_officer_id()
                 movement.file.status = "active"
                 movement.file.save(update_fields=["current_location", "status"])
                 sender_name = request.user.get_full_name() or request.user.username
@@ -1663,12 +1490,8 @@ class DocumentActionView(HTMXLoginRequiredMixin, View):
             elif staff.is_unit_manager and not (staff.is_hod or staff.is_effective_supervisor):
                 # Unit Manager: "Approve" = forward to HOD (note optional)
                 from organization.models import Staff as StaffModel
-                from django.db.models import Q as DQ
 
-                hod = StaffModel.objects.filter(
-                    department=staff.department,
-                    is_hod=True
-                ).first()
+                hod = StaffModel.objects.filter(department=staff.department, hod_role=True).first()
 
                 if not hod:
                     messages.error(request, "No HOD found for your department.")
@@ -1988,9 +1811,7 @@ class FileCreationApprovalView(LoginRequiredMixin, UserPassesTestMixin, DetailVi
             )
             
             # Notify registry staff
-            registry_staff = Staff.objects.filter(
-                Q(designation__name__icontains="registry") | Q(user__groups__name__iexact="Registry")
-            ).select_related("user")
+            registry_staff = Staff.objects.filter(registry_role=True).select_related("user")
             
             for reg_staff in registry_staff:
                 if reg_staff.user:
@@ -2159,13 +1980,7 @@ class DocumentDispatchApprovalView(LoginRequiredMixin, UserPassesTestMixin, Deta
             )
 
             # Return file to registry
-            from django.db.models import Q as DQ
-            from organization.models import Staff as StaffModel
-
-            registry = StaffModel.objects.filter(
-                DQ(designation__name__icontains="registry") | DQ(user__groups__name__iexact="Registry")
-            ).first()
-            file_obj.current_location = registry
+            file_obj.current_location_id = next_registry_officer_id()
             file_obj.status = "active"
             file_obj.save(update_fields=["current_location", "status"])
 
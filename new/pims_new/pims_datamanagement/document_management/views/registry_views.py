@@ -8,13 +8,15 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.views.generic import DetailView, ListView, View
 from notifications.utils import create_notification
-from organization.models import Department, Staff, Unit
+from organization.models import Staff
+from organization.snapshot import get_snapshot
 
-from ..models import ApprovalChain, Document, DocumentType, File, FileAccessRequest, FileMovement
-from .base import EXCLUDE_REGISTRY_Q, RegistryRequiredMixin
+from ..models import ApprovalChain, Document, DocumentType, File, FileAccessRequest, FileCounter, FileMovement
+from ..stats import StatsService, outgoing_q
+from .base import EXCLUDE_REGISTRY_Q, OutgoingRegisterMixin, RegistryRequiredMixin
 
 
-class RegistryHubView(RegistryRequiredMixin, ListView):
+class RegistryHubView(RegistryRequiredMixin, OutgoingRegisterMixin, ListView):
     model = File
     template_name = "document_management/registry_hub.html"
     context_object_name = "files"
@@ -77,8 +79,9 @@ class RegistryHubView(RegistryRequiredMixin, ListView):
         context["selected_file_type"] = self.request.GET.get("file_type", "")
         context["selected_status"] = self.request.GET.get("status", "")
 
-        context["all_departments"] = Department.objects.all().order_by("name")
-        context["all_units"] = Unit.objects.all().order_by("name")
+        snapshot = get_snapshot()
+        context["all_departments"] = snapshot.departments
+        context["all_units"] = snapshot.units
         context["selected_department"] = self.request.GET.get("department") and int(self.request.GET.get("department"))
         context["selected_unit"] = self.request.GET.get("unit") and int(self.request.GET.get("unit"))
 
@@ -87,14 +90,8 @@ class RegistryHubView(RegistryRequiredMixin, ListView):
                 "-created_at"
             )
 
-            registry_staff_ids = Staff.objects.filter(
-                Q(designation__name__icontains="registry") | Q(user__groups__name__iexact="Registry")
-            ).values_list("id", flat=True)
-
-            outgoing_qs = (
-                File.objects.filter(status="active")
-                .exclude(Q(current_location__isnull=True) | Q(current_location__id__in=registry_staff_ids))
-                .select_related("current_location", "owner", "department")
+            outgoing_qs = File.objects.filter(outgoing_q()).select_related(
+                "current_location__user", "current_location__department", "department"
             )
 
             q_outgoing = self.request.GET.get("q_outgoing")
@@ -117,51 +114,27 @@ class RegistryHubView(RegistryRequiredMixin, ListView):
             context["selected_outgoing_file_type"] = outgoing_file_type or ""
             context["selected_outgoing_department"] = outgoing_department and int(outgoing_department)
 
-            outgoing_files_subset = outgoing_qs.order_by("-created_at")[:50]
-
-            outgoing_list = []
-            overdue_count = 0
-            for file in outgoing_files_subset:
-                custody_duration = file.get_custody_duration()
-                is_overdue = file.is_overdue()
-                outgoing_list.append({"file": file, "custody_duration": custody_duration, "is_overdue": is_overdue})
-                if is_overdue:
-                    overdue_count += 1
+            context.update(self.get_outgoing_context(outgoing_qs))
 
-            context["outgoing_files"] = outgoing_list
-            context["outgoing_files_count"] = len(outgoing_list)
-            context["outgoing_overdue_count"] = overdue_count
+            stats = StatsService()
+            context["total_files_count"] = FileCounter.objects.total(status="active")
 
-            context["total_files_count"] = File.objects.filter(status="active").count()
-
-            today = timezone.now().date()
-            context["docs_added_today"] = AuditLogEntry.objects.filter(
-                action="DOCUMENT_ADDED", timestamp__date=today
-            ).count()
-            context["files_created_today"] = AuditLogEntry.objects.filter(
-                action="FILE_CREATED", timestamp__date=today
-            ).count()
-            context["actions_today"] = AuditLogEntry.objects.filter(timestamp__date=today).count()
+            activity = stats.activity_today()
+            context["docs_added_today"] = activity["documents_added"]
+            context["files_created_today"] = activity["files_created"]
+            context["actions_today"] = activity["actions"]
 
             context["recent_activities"] = AuditLogEntry.objects.select_related("user").all()[:15]
 
-            context["total_staff_count"] = Staff.objects.count()
-            context["total_departments_count"] = Department.objects.count()
-
-            staff_with_files = File.objects.filter(file_type="personal").values_list("owner_id", flat=True).distinct()
-
-            context["staff_without_files_count"] = (
-                Staff.objects.exclude(id__in=staff_with_files).exclude(EXCLUDE_REGISTRY_Q).count()
-            )
+            staff_counts = stats.staff_counts()
+            context["total_staff_count"] = staff_counts["total"]
+            context["total_departments_count"] = len(snapshot.departments)
+            context["staff_without_files_count"] = staff_counts["without_personal_file"]
 
         return context
 
     def get_staff_user(self):
-        user = self.request.user
-        try:
-            return Staff.objects.get(user=user)
-        except Staff.DoesNotExist:
-            return None
+        return getattr(self.request.user, "staff", None)
 
 
 class RegistryDashboardView(RegistryRequiredMixin, ListView):
@@ -178,51 +151,28 @@ class RegistryDashboardView(RegistryRequiredMixin, ListView):
         if not staff_user:
             raise Http404("Staff user not found or doesn't exist.")
 
-        today = timezone.now().date()
-
-        context["total_files_count"] = File.objects.filter(status="active").count()
-        context["pending_activation_count"] = File.objects.filter(status="pending_activation").count()
-        context["archived_files_count"] = File.objects.filter(status="archived").count()
+        stats = StatsService()
+        file_counts = stats.file_counts()
+        context["total_files_count"] = file_counts["active"]
+        context["pending_activation_count"] = file_counts["pending_activation"]
+        context["archived_files_count"] = file_counts["archived"]
+        context["outgoing_files_count"] = file_counts["outgoing"]
+        context["outgoing_overdue_count"] = file_counts["overdue"]
 
-        registry_staff_ids = Staff.objects.filter(
-            Q(designation__name__icontains="registry") | Q(user__groups__name__iexact="Registry")
-        ).values_list("id", flat=True)
+        activity = stats.activity_today()
+        context["docs_added_today"] = activity["documents_added"]
+        context["files_created_today"] = activity["files_created"]
+        context["actions_today"] = activity["actions"]
 
-        outgoing_files = File.objects.filter(status="active").exclude(
-            Q(current_location__isnull=True) | Q(current_location__id__in=registry_staff_ids)
-        )
-        context["outgoing_files_count"] = outgoing_files.count()
-
-        overdue_count = 0
-        for f in outgoing_files:
-            if f.is_overdue():
-                overdue_count += 1
-        context["outgoing_overdue_count"] = overdue_count
-
-        context["docs_added_today"] = AuditLogEntry.objects.filter(
-            action="DOCUMENT_ADDED", timestamp__date=today
-        ).count()
-        context["files_created_today"] = AuditLogEntry.objects.filter(
-            action="FILE_CREATED", timestamp__date=today
-        ).count()
-        context["actions_today"] = AuditLogEntry.objects.filter(timestamp__date=today).count()
-
-        context["total_staff_count"] = Staff.objects.count()
-        context["total_departments_count"] = Department.objects.count()
-
-        staff_with_files = File.objects.filter(file_type="personal").values_list("owner_id", flat=True).distinct()
-        context["staff_without_files_count"] = (
-            Staff.objects.exclude(id__in=staff_with_files).exclude(EXCLUDE_REGISTRY_Q).count()
-        )
+        staff_counts = stats.staff_counts()
+        context["total_staff_count"] = staff_counts["total"]
+        context["total_departments_count"] = len(get_snapshot().departments)
+        context["staff_without_files_count"] = staff_counts["without_personal_file"]
 
         return context
 
     def get_staff_user(self):
-        user = self.request.user
-        try:
-            return Staff.objects.get(user=user)
-        except Staff.DoesNotExist:
-            return None
+        return getattr(self.request.user, "staff", None)
 
 
 class StaffWithoutFilesView(RegistryRequiredMixin, ListView):
@@ -376,7 +326,7 @@ class StaffFolderListView(RegistryRequiredMixin, ListView):
         context["selected_file_type"] = self.request.GET.get("file_type", "")
         context["selected_department"] = self.request.GET.get("department", "")
         context["selected_status"] = self.request.GET.get("status", "")
-        context["all_departments"] = Department.objects.all().order_by("name")
+        context["all_departments"] = get_snapshot().departments
         return context
 
 
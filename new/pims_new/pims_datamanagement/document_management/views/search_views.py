@@ -3,59 +3,29 @@ from django.db.models import Q
 from django.http import HttpResponse
 from django.shortcuts import render
 from django.views.generic import View
-from organization.models import Staff, Unit
+from organization.models import Staff
+from organization.snapshot import get_snapshot
 
+from ..routing import FORWARD, allowed_recipient_pks
 from .base import EXCLUDE_REGISTRY_Q
 
 
+def _eligible_recipients(user):
+    """Staff the user may forward to; users without a staff profile are unrestricted."""
+    staff = getattr(user, "staff", None)
+    qs = Staff.objects.exclude(EXCLUDE_REGISTRY_Q).exclude(user=user)
+    pks = allowed_recipient_pks(staff, FORWARD) if staff else None
+    return qs if pks is None else qs.filter(pk__in=pks)
+
+
 class RecipientSearchView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
         query = request.GET.get("q", "").strip()
         if not query or len(query) < 2:
             return HttpResponse("")
 
-        sender_staff = getattr(request.user, "staff", None)
-        base_qs = (
-            Staff.objects.exclude(EXCLUDE_REGISTRY_Q)
-            .exclude(user=request.user)
-            .select_related("user", "designation", "department", "unit", "headed_unit", "headed_department")
-        )
-
-        if sender_staff:
-            if sender_staff.is_md or sender_staff.is_executive:
-                eligible_qs = base_qs
-            elif sender_staff.is_hod or sender_staff.is_head_of_unit:
-                from organization.models import Department as Dept
-                from organization.models import Unit
-
-                pks = set()
-                for d in Dept.objects.filter(head__isnull=False):
-                    pks.add(d.head.pk)
-                for u in Unit.objects.filter(head__isnull=False):
-                    pks.add(u.head.pk)
-                for s in base_qs.filter(is_supervisor=True):
-                    pks.add(s.pk)
-                pks.discard(sender_staff.pk)
-                eligible_qs = base_qs.filter(pk__in=pks)
-            elif sender_staff.is_supervisor:
-                from organization.models import Department as Dept
-                from organization.models import Unit
-
-                pks = set()
-                for d in Dept.objects.filter(head__isnull=False):
-                    pks.add(d.head.pk)
-                for u in Unit.objects.filter(head__isnull=False):
-                    pks.add(u.head.pk)
-                eligible_qs = base_qs.filter(pk__in=pks)
-            else:
-                allowed_pks = []
-                if sender_staff.unit and sender_staff.unit.head:
-                    allowed_pks.append(sender_staff.unit.head.pk)
-                elif sender_staff.department and sender_staff.department.head:
-                    allowed_pks.append(sender_staff.department.head.pk)
-                eligible_qs = base_qs.filter(pk__in=allowed_pks)
-        else:
-            eligible_qs = base_qs
+        eligible_qs = _eligible_recipients(request.user).select_related("user", "designation", "department", "unit")
+        unit_head_ids = set(get_snapshot().unit_heads.values())
 
         recipients = eligible_qs.filter(
             Q(user__username__icontains=query)
@@ -77,17 +47,17 @@ class RecipientSearchView(LoginRequiredMixin, View):
                 dept = staff.department.name if staff.department else ""
                 unit = staff.unit.name if staff.unit else ""
                 role_badge = ""
-                if staff.is_md:
+                if staff.md_role:
                     role_badge = (
                         '<span class="text-[8px] bg-red-100 text-red-700 '
                         'px-1.5 py-0.5 rounded font-bold uppercase">MD</span>'
                     )
-                elif staff.is_hod:
+                elif staff.hod_role:
                     role_badge = (
                         '<span class="text-[8px] bg-purple-100 text-purple-700 '
                         'px-1.5 py-0.5 rounded font-bold uppercase">HOD</span>'
                     )
-                elif staff.is_head_of_unit:
+                elif staff.pk in unit_head_ids:
                     role_badge = (
                         '<span class="text-[8px] bg-blue-100 text-blue-700 '
                         'px-1.5 py-0.5 rounded font-bold uppercase">Unit Mgr</span>'
@@ -172,50 +142,9 @@ class InboxRecipientSearchView(LoginRequiredMixin, View):
         if not query or len(query) < 2:
             return HttpResponse("")
 
-        sender_staff = getattr(request.user, "staff", None)
-        base_qs = (
-            Staff.objects.exclude(EXCLUDE_REGISTRY_Q)
-            .exclude(user=request.user)
-            .select_related("user", "designation", "department", "unit")
-        )
-
         # Same routing rules as send handler
-        if sender_staff:
-            if sender_staff.is_md or sender_staff.is_executive:
-                eligible_qs = base_qs
-            elif sender_staff.is_hod or sender_staff.is_head_of_unit:
-                # Any HOD, any head of unit, any supervisor
-                from organization.models import Department as Dept
-                from organization.models import Unit
-
-                pks = set()
-                for d in Dept.objects.filter(head__isnull=False):
-                    pks.add(d.head.pk)
-                for u in Unit.objects.filter(head__isnull=False):
-                    pks.add(u.head.pk)
-                for s in base_qs.filter(is_supervisor=True):
-                    pks.add(s.pk)
-                pks.discard(sender_staff.pk)
-                eligible_qs = base_qs.filter(pk__in=pks)
-            elif sender_staff.is_supervisor:
-                from organization.models import Department as Dept
-                from organization.models import Unit
-
-                pks = set()
-                for d in Dept.objects.filter(head__isnull=False):
-                    pks.add(d.head.pk)
-                for u in Unit.objects.filter(head__isnull=False):
-                    pks.add(u.head.pk)
-                eligible_qs = base_qs.filter(pk__in=pks)
-            else:
-                allowed_pks = []
-                if sender_staff.unit and sender_staff.unit.head:
-                    allowed_pks.append(sender_staff.unit.head.pk)
-                elif sender_staff.department and sender_staff.department.head:
-                    allowed_pks.append(sender_staff.department.head.pk)
-                eligible_qs = base_qs.filter(pk__in=allowed_pks)
-        else:
-            eligible_qs = base_qs
+        eligible_qs = _eligible_recipients(request.user).select_related("user", "designation", "department", "unit")
+        unit_head_ids = set(get_snapshot().unit_heads.values())
 
         recipients = eligible_qs.filter(
             Q(user__first_name__icontains=query)
@@ -238,12 +167,12 @@ class InboxRecipientSearchView(LoginRequiredMixin, View):
                 dept = staff.department.name if staff.department else ""
                 location = " · ".join(p for p in [unit, dept] if p)
                 role_badge = ""
-                if staff.is_hod:
+                if staff.hod_role:
                     role_badge = (
                         '<span class="text-[8px] bg-purple-100 text-purple-700 '
                         'px-1.5 py-0.5 rounded font-bold uppercase">HOD</span>'
                     )
-                elif staff.is_head_of_unit:
+                elif staff.pk in unit_head_ids:
                     role_badge = (
                         '<span class="text-[8px] bg-blue-100 text-blue-700 '
                         'px-1.5 py-0.5 rounded font-bold uppercase">Unit Mgr</span>'
@@ -314,8 +243,8 @@ class UnitsForDepartmentView(LoginRequiredMixin, View):
     """HTMX: return <option> elements for units belonging to a department."""
 
     def get(self, request, *args, **kwargs):
-        dept_id = request.GET.get("department")
-        units = Unit.objects.filter(department_id=dept_id).order_by("name") if dept_id else Unit.objects.none()
+        dept_id = request.GET.get("department", "")
+        units = get_snapshot().units_in(int(dept_id)) if dept_id.isdigit() else ()
         html = '<option value="">— No specific unit —</option>'
         for unit in units:
             html += f'<option value="{unit.pk}">{unit.name}</option>'
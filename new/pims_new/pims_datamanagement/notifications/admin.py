@@ -1,3 +1,4 @@
+from core.pagination import EstimatedCountPaginator
 from django.contrib import admin
 from unfold.admin import ModelAdmin
 
@@ -6,6 +7,9 @@ from .models import Notification
 
 @admin.register(Notification)
 class NotificationAdmin(ModelAdmin):
+    # No exact COUNT(*) over the whole table on every changelist page
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("user", "message", "is_read", "timestamp")
     list_filter = ("is_read",)
     search_fields = ("user__username", "message")
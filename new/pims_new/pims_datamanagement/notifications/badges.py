@@ -0,0 +1,66 @@
+"""
+Cached counters behind the badges in the base template.
+
+Every full page render shows the user's unread notification count, and
+registry staff also see the number of files pending activation and access
+requests pending review. The unread count is cached per user and the two
+pending counts are cached once for everybody; each entry is dropped whenever
+the rows it counts change (see ``invalidate_unread`` and
+``invalidate_pending``) and reloaded by the next page that shows it.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+BADGE_CACHE_MAX_AGE = 600
+
+PENDING_CACHE_KEY = "notifications:pending"
+
+
+def _unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def _invalidate(keys):
+    # Again once the current transaction commits, so a reader that reloaded
+    # the count before the commit cannot leave an old value behind
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_unread_count(user_id):
+    """Number of unread notifications for the user."""
+    key = _unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        from .models import Notification
+
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, BADGE_CACHE_MAX_AGE)
+    return count
+
+
+def get_pending_counts():
+    """``{"pending_activation": n, "pending_access": n}`` across the whole registry."""
+    counts = cache.get(PENDING_CACHE_KEY)
+    if counts is None:
+        from document_management.models import FileAccessRequest, FileCounter
+
+        counts = {
+            "pending_activation": FileCounter.objects.total(status="pending_activation"),
+            "pending_access": FileAccessRequest.objects.filter(status="pending").count(),
+        }
+        cache.set(PENDING_CACHE_KEY, counts, BADGE_CACHE_MAX_AGE)
+    return counts
+
+
+def invalidate_unread(*user_ids):
+    """Drop the cached unread counts of these users."""
+    keys = [_unread_key(user_id) for user_id in user_ids if user_id]
+    if keys:
+        _invalidate(keys)
+
+
+def invalidate_pending():
+    """Drop the cached pending activation/access counts."""
+    _invalidate([PENDING_CACHE_KEY])
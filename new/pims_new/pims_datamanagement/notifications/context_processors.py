@@ -1,19 +1,33 @@
-from .models import Notification
+"""
+Badge counts for the base template. The values are lazy: they are only
+loaded (from the cache in notifications.badges) when a template reads them,
+so fragments that never show the badges don't pay for them.
+"""
+
+from django.utils.functional import SimpleLazyObject
+
+from .badges import get_pending_counts, get_unread_count
+
+NO_PENDING = {"pending_activation": 0, "pending_access": 0}
 
 
 def unread_notifications(request):
-    if request.user.is_authenticated:
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return {"unread_notifications_count": count}
-    return {"unread_notifications_count": 0}
+    def count():
+        if request.user.is_authenticated:
+            return get_unread_count(request.user.pk)
+        return 0
+
+    return {"unread_notifications_count": SimpleLazyObject(count)}
 
 
 def pending_activation_count(request):
-    if request.user.is_authenticated and hasattr(request.user, "staff") and request.user.staff.is_registry:
-        from document_management.models import File, FileAccessRequest
-
-        return {
-            "pending_activation_count": File.objects.filter(status="pending_activation").count(),
-            "pending_access_count": FileAccessRequest.objects.filter(status="pending").count(),
-        }
-    return {"pending_activation_count": 0, "pending_access_count": 0}
+    def counts():
+        if request.user.is_authenticated and hasattr(request.user, "staff") and request.user.staff.is_registry:
+            return get_pending_counts()
+        return NO_PENDING
+
+    counts = SimpleLazyObject(counts)
+    return {
+        "pending_activation_count": SimpleLazyObject(lambda: counts["pending_activation"]),
+        "pending_access_count": SimpleLazyObject(lambda: counts["pending_access"]),
+    }
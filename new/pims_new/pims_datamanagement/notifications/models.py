@@ -5,7 +5,10 @@ from django.db import models
 
 
 class Notification(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
+    # No index of its own: it leads notification_user_time_idx
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications", db_index=False
+    )
     message = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
@@ -21,13 +24,18 @@ class Notification(models.Model):
     class Meta:
         ordering = ["-timestamp"]
         verbose_name_plural = "Notifications"
+        # A user's notifications newest first, paged by (timestamp, id)
+        indexes = [models.Index(fields=["user", "timestamp"], name="notification_user_time_idx")]
 
     def __str__(self):
         return f"Notification for {self.user.username}: {self.message[:50]}..."
 
     def mark_as_read(self):
+        from .badges import invalidate_unread
+
         self.is_read = True
         self.save()
+        invalidate_unread(self.user_id)
 
     def get_link(self):
         # Fallback to generic object link if a specific link is not provided
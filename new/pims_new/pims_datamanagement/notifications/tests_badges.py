@@ -0,0 +1,97 @@
+"""
+Tests for the cached badge counters in notifications.badges.
+
+Covers:
+1. The unread count is cached per user and dropped by create_notification, mark_as_read and mark-all-as-read
+2. The pending activation/access counts are cached and dropped by file and access request status changes
+3. The context processors are lazy: nothing is loaded until a template reads the value
+"""
+
+from core.testing import make_staff, make_user
+from django.template import Context, Template
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from document_management.models import File, FileAccessRequest
+from notifications.badges import get_pending_counts, get_unread_count
+from notifications.context_processors import pending_activation_count, unread_notifications
+from notifications.models import Notification
+from notifications.utils import create_notification
+from organization.models import Department
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "badges"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BadgeCountTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.dept = Department.objects.create(name="IT", code="IT")
+        self.registry_user = make_user("registry", "Registry")
+        make_staff(self.registry_user, "Registry Officer", self.dept)
+        self.user = make_user("officer")
+        self.staff = make_staff(self.user, dept=self.dept)
+
+    def _file(self, title, status="pending_activation"):
+        return File.objects.create(
+            title=title, file_type="policy", department=self.dept, created_by=self.registry_user, status=status
+        )
+
+    def assertCachedUnread(self, expected):  # noqa: N802
+        self.assertEqual(get_unread_count(self.user.pk), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user.pk), expected)
+
+    def test_unread_count_follows_notifications(self):
+        self.assertCachedUnread(0)
+        create_notification(self.user, "First")
+        create_notification(self.registry_user, "Second", recipient_list=[self.user])
+        self.assertCachedUnread(2)
+
+        Notification.objects.filter(user=self.user).first().mark_as_read()
+        self.assertCachedUnread(1)
+
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse("notifications:mark_all_as_read"))
+        self.assertCachedUnread(0)
+
+    def test_pending_counts_follow_status_changes(self):
+        file_obj = self._file("ONE")
+        self.assertEqual(get_pending_counts(), {"pending_activation": 1, "pending_access": 0})
+        with self.assertNumQueries(0):
+            get_pending_counts()
+
+        file_obj.status = "active"
+        file_obj.save()
+        self.assertEqual(get_pending_counts()["pending_activation"], 0)
+
+        File.objects.filter(pk=file_obj.pk).update(status="pending_activation")
+        self.assertEqual(get_pending_counts()["pending_activation"], 1)
+
+        access = FileAccessRequest.objects.create(file=file_obj, requested_by=self.user, reason="Review")
+        self.assertEqual(get_pending_counts()["pending_access"], 1)
+        access.status = "rejected"
+        access.save()
+        self.assertEqual(get_pending_counts()["pending_access"], 0)
+
+    def test_context_processors_are_lazy(self):
+        self._file("ONE")
+        create_notification(self.registry_user, "Hello")
+        request = RequestFactory().get("/")
+        request.user = self.registry_user
+        with self.assertNumQueries(0):
+            context = {**unread_notifications(request), **pending_activation_count(request)}
+        rendered = Template(
+            "{% if unread_notifications_count > 0 %}{{ unread_notifications_count }}{% endif %}/"
+            "{{ pending_activation_count }}/{{ pending_access_count }}"
+        ).render(Context(context))
+        self.assertEqual(rendered, "1/1/0")
+
+    def test_non_registry_staff_see_no_pending_counts(self):
+        self._file("ONE")
+        request = RequestFactory().get("/")
+        request.user = self.user
+        context = pending_activation_count(request)
+        self.assertEqual(context["pending_activation_count"], 0)
@@ -4,6 +4,7 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from user_management.models import CustomUser
 
+from .badges import invalidate_unread
 from .models import Notification
 
 
@@ -31,6 +32,7 @@ def create_notification(user, message, obj=None, link=None, recipient_list=None,
 
     # Create notification for the primary user
     Notification.objects.create(user=user, message=message, content_type=content_type, object_id=object_id, link=link)
+    invalidate_unread(user.pk)
 
     # Send email if requested
     if send_email and user.email:
@@ -48,6 +50,7 @@ def create_notification(user, message, obj=None, link=None, recipient_list=None,
                 Notification.objects.create(
                     user=recipient, message=message, content_type=content_type, object_id=object_id, link=link
                 )
+                invalidate_unread(recipient.pk)
                 if send_email and recipient.email:
                     _send_notification_email(
                         recipient, message, link,
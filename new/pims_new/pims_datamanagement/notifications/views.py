@@ -1,12 +1,14 @@
+from core.pagination import KeysetPaginationMixin
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect
 from django.views.generic import ListView, View
 
+from .badges import invalidate_unread
 from .models import Notification
 
 
-class NotificationListView(LoginRequiredMixin, ListView):
+class NotificationListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Notification
     template_name = "notifications/notification_list.html"
     context_object_name = "notifications"
@@ -51,5 +53,6 @@ class NotificationMarkAsReadView(LoginRequiredMixin, View):
 class NotificationMarkAllAsReadView(LoginRequiredMixin, View):
     def post(self, request):
         Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        invalidate_unread(request.user.pk)
         messages.success(request, "All notifications marked as read.")
         return redirect("notifications:notification_list")
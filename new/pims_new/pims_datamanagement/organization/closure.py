@@ -0,0 +1,163 @@
+"""
+Closure table for the Department → Division → Section → Unit hierarchy.
+
+Every org node has one OrgClosure row per ancestor (itself included, at
+depth 0), so "everything under this node" is a single indexed lookup on
+(ancestor_kind, ancestor_id) however deep the hierarchy goes.
+
+Parent edges follow the foreign keys that exist: divisions and sections
+hang off a department; a unit hangs off its section and/or division, or
+directly off its department when it has neither. ``depth`` is the shortest
+path between the two nodes.
+
+The rows are kept up to date by the organization signals (``sync_node`` on
+save, ``remove_node`` on delete). ``rebuild_closure`` recomputes the whole
+table.
+"""
+
+from django.db.models import Q
+
+LEVELS = ("department", "division", "section", "unit")
+
+
+def node_key(node):
+    """(kind, pk) for a Department/Division/Section/Unit instance or an existing (kind, pk) pair."""
+    if isinstance(node, tuple):
+        return node
+    return node._meta.model_name, node.pk
+
+
+def _parent_keys(kind, department_id=None, division_id=None, section_id=None):
+    if kind == "unit":
+        parents = [(k, pk) for k, pk in (("section", section_id), ("division", division_id)) if pk]
+        if parents:
+            return parents
+    if kind != "department" and department_id:
+        return [("department", department_id)]
+    return []
+
+
+def _ancestor_rows(key, parents, ancestors_of, department_id=None):
+    """{ancestor key: depth} for ``key`` given its parents and a lookup for their own ancestors."""
+    rows = {key: 0}
+    for parent in parents:
+        for ancestor, depth in ancestors_of(parent).items():
+            if depth + 1 < rows.get(ancestor, depth + 2):
+                rows[ancestor] = depth + 1
+    # A unit filed under a section or division of another department still belongs to its own one
+    if department_id and key[0] != "department":
+        rows.setdefault(("department", department_id), 1)
+    return rows
+
+
+def _closure_objects(closure_model, key, rows):
+    return [
+        closure_model(
+            ancestor_kind=ancestor[0],
+            ancestor_id=ancestor[1],
+            descendant_kind=key[0],
+            descendant_id=key[1],
+            depth=depth,
+        )
+        for ancestor, depth in rows.items()
+    ]
+
+
+def _parent_fields(model):
+    names = {f.name for f in model._meta.concrete_fields if f.is_relation}
+    return [f"{name}_id" for name in ("department", "division", "section") if name in names]
+
+
+def _sync_one(key):
+    from .models import Department, Division, OrgClosure, Section, Unit
+
+    model = {"department": Department, "division": Division, "section": Section, "unit": Unit}[key[0]]
+    OrgClosure.objects.filter(descendant_kind=key[0], descendant_id=key[1]).delete()
+    fields = _parent_fields(model)
+    row = model.objects.filter(pk=key[1]).values_list("pk", *fields).first()
+    if row is None:
+        return
+    values = dict(zip(fields, row[1:], strict=True))
+
+    def ancestors_of(parent):
+        return {
+            (kind, pk): depth
+            for kind, pk, depth in OrgClosure.objects.filter(
+                descendant_kind=parent[0], descendant_id=parent[1]
+            ).values_list("ancestor_kind", "ancestor_id", "depth")
+        }
+
+    rows = _ancestor_rows(key, _parent_keys(key[0], **values), ancestors_of, values.get("department_id"))
+    OrgClosure.objects.bulk_create(_closure_objects(OrgClosure, key, rows))
+
+
+def descendant_keys(node):
+    """(kind, pk) of every node below ``node``, shallowest first."""
+    from .models import OrgClosure
+
+    kind, pk = node_key(node)
+    return list(
+        OrgClosure.objects.filter(ancestor_kind=kind, ancestor_id=pk, depth__gt=0)
+        .order_by("depth")
+        .values_list("descendant_kind", "descendant_id")
+    )
+
+
+def sync_node(node):
+    """Recompute the ancestor rows of ``node`` and of every node below it."""
+    key = node_key(node)
+    # Descendants are re-synced top-down so each one sees its parent's new rows
+    for subtree_key in [key, *descendant_keys(key)]:
+        _sync_one(subtree_key)
+
+
+def remove_node(node, descendants=()):
+    """Drop the rows of a deleted node and re-sync the nodes that were under it."""
+    from .models import OrgClosure
+
+    kind, pk = node_key(node)
+    OrgClosure.objects.filter(
+        Q(ancestor_kind=kind, ancestor_id=pk) | Q(descendant_kind=kind, descendant_id=pk)
+    ).delete()
+    for key in descendants:
+        _sync_one(key)
+
+
+def rebuild_closure():
+    """Recompute the whole closure table from the org foreign keys."""
+    from .models import Department, Division, OrgClosure, Section, Unit
+
+    models = {"department": Department, "division": Division, "section": Section, "unit": Unit}
+    ancestors = {}
+    for kind in LEVELS:
+        model = models[kind]
+        fields = _parent_fields(model)
+        for pk, *fks in model.objects.order_by("pk").values_list("pk", *fields):
+            key = (kind, pk)
+            values = dict(zip(fields, fks, strict=True))
+            ancestors[key] = _ancestor_rows(
+                key, _parent_keys(kind, **values), lambda parent: ancestors.get(parent, {}), values.get("department_id")
+            )
+
+    OrgClosure.objects.all().delete()
+    OrgClosure.objects.bulk_create(
+        [obj for key, rows in ancestors.items() for obj in _closure_objects(OrgClosure, key, rows)], batch_size=1000
+    )
+
+
+def subtree_q(node, prefix=""):
+    """
+    Q matching rows whose department/division/section/unit columns (under
+    ``prefix``, e.g. "owner__") fall anywhere in the subtree of ``node``.
+
+    Each level is an IN-subquery on the closure index, so the cost does not
+    depend on how deep the hierarchy is.
+    """
+    from .models import OrgClosure
+
+    kind, pk = node_key(node)
+    q = Q(**{f"{prefix}{kind}_id": pk})
+    for level in LEVELS[LEVELS.index(kind) + 1 :]:
+        descendants = OrgClosure.objects.filter(ancestor_kind=kind, ancestor_id=pk, descendant_kind=level)
+        q |= Q(**{f"{prefix}{level}_id__in": descendants.values("descendant_id")})
+    return q
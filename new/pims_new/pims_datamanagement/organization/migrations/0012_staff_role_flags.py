@@ -0,0 +1,93 @@
+# Generated by Django 6.0 on 2026-10-18 05:45
+
+from django.db import migrations, models
+
+# Frozen copy of the role rules in organization.roles at the time of this migration
+HOD_DESIGNATION_KEYWORDS = ("head of department", "hod", "director")
+
+
+def backfill_role_flags(apps, schema_editor):
+    Staff = apps.get_model("organization", "Staff")
+    roles = {}
+    rows = Staff.objects.values_list(
+        "pk",
+        "is_supervisor",
+        "designation__name",
+        "user__groups__name",
+        "headed_department__id",
+        "headed_division__id",
+        "headed_section__id",
+        "headed_unit__id",
+    )
+    for pk, is_supervisor, designation, group, dept_id, div_id, sec_id, unit_id in rows:
+        staff = roles.setdefault(
+            pk,
+            {
+                "is_supervisor": is_supervisor,
+                "designation": (designation or "").lower(),
+                "groups": set(),
+                "heads": (dept_id, div_id, sec_id, unit_id),
+            },
+        )
+        if group:
+            staff["groups"].add(group.lower())
+
+    for pk, staff in roles.items():
+        designation, groups = staff["designation"], staff["groups"]
+        dept_id, div_id, sec_id, unit_id = staff["heads"]
+        registry = "registry" in designation or "registry" in groups
+        hod = any(keyword in designation for keyword in HOD_DESIGNATION_KEYWORDS) or dept_id is not None
+        executive = "executive" in groups
+        md = "md" in groups
+        supervisor = (
+            staff["is_supervisor"]
+            or hod
+            or executive
+            or md
+            or unit_id is not None
+            or sec_id is not None
+            or div_id is not None
+        )
+        Staff.objects.filter(pk=pk).update(
+            registry_role=registry,
+            hod_role=hod,
+            executive_role=executive,
+            md_role=md,
+            supervisor_role=supervisor,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0011_alter_section_department'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='staff',
+            name='executive_role',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='staff',
+            name='hod_role',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='staff',
+            name='md_role',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='staff',
+            name='registry_role',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='staff',
+            name='supervisor_role',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_role_flags, migrations.RunPython.noop),
+    ]
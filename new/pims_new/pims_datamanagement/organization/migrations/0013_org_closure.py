@@ -0,0 +1,76 @@
+# Generated by Django 6.0 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+# Frozen copy of organization.closure.rebuild_closure at the time of this migration
+LEVELS = ("department", "division", "section", "unit")
+
+
+def backfill_closure(apps, schema_editor):
+    OrgClosure = apps.get_model("organization", "OrgClosure")
+
+    ancestors = {}
+    for kind in LEVELS:
+        model = apps.get_model("organization", kind.capitalize())
+        relations = {f.name for f in model._meta.concrete_fields if f.is_relation}
+        fields = [f"{name}_id" for name in ("department", "division", "section") if name in relations]
+        for pk, *fks in model.objects.order_by("pk").values_list("pk", *fields):
+            key = (kind, pk)
+            values = dict(zip(fields, fks))
+            department_id = values.get("department_id")
+            parents = []
+            if kind == "unit":
+                parents = [(k, values.get(f"{k}_id")) for k in ("section", "division") if values.get(f"{k}_id")]
+            if not parents and kind != "department" and department_id:
+                parents = [("department", department_id)]
+
+            rows = {key: 0}
+            for parent in parents:
+                for ancestor, depth in ancestors.get(parent, {}).items():
+                    if depth + 1 < rows.get(ancestor, depth + 2):
+                        rows[ancestor] = depth + 1
+            if department_id and kind != "department":
+                rows.setdefault(("department", department_id), 1)
+            ancestors[key] = rows
+
+    OrgClosure.objects.all().delete()
+    OrgClosure.objects.bulk_create(
+        [
+            OrgClosure(
+                ancestor_kind=ancestor[0],
+                ancestor_id=ancestor[1],
+                descendant_kind=key[0],
+                descendant_id=key[1],
+                depth=depth,
+            )
+            for key, rows in ancestors.items()
+            for ancestor, depth in rows.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0012_staff_role_flags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrgClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancestor_kind', models.CharField(choices=[('department', 'Department'), ('division', 'Division'), ('section', 'Section'), ('unit', 'Unit')], max_length=10)),
+                ('ancestor_id', models.PositiveIntegerField()),
+                ('descendant_kind', models.CharField(choices=[('department', 'Department'), ('division', 'Division'), ('section', 'Section'), ('unit', 'Unit')], max_length=10)),
+                ('descendant_id', models.PositiveIntegerField()),
+                ('depth', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant_kind', 'descendant_id'], name='org_closure_descendant_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor_kind', 'ancestor_id', 'descendant_kind', 'descendant_id'), name='org_closure_unique_pair')],
+            },
+        ),
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+    ]
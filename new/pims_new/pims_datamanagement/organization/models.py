@@ -2,6 +2,9 @@ from core.constants import STAFF_TYPE_CHOICES
 from django.conf import settings
 from django.db import models
 
+from .closure import subtree_q
+from .roles import HOD_DESIGNATION_KEYWORDS, StaffRoles
+
 
 class Department(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -59,6 +62,41 @@ class Designation(models.Model):
         return self.name
 
 
+class OrgClosure(models.Model):
+    """One row per (ancestor, descendant) pair in the org hierarchy; maintained by organization.closure."""
+
+    KIND_CHOICES = [
+        ("department", "Department"),
+        ("division", "Division"),
+        ("section", "Section"),
+        ("unit", "Unit"),
+    ]
+
+    ancestor_kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    ancestor_id = models.PositiveIntegerField()
+    descendant_kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    descendant_id = models.PositiveIntegerField()
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor_kind", "ancestor_id", "descendant_kind", "descendant_id"],
+                name="org_closure_unique_pair",
+            )
+        ]
+        indexes = [models.Index(fields=["descendant_kind", "descendant_id"], name="org_closure_descendant_idx")]
+
+    def __str__(self):
+        return f"{self.ancestor_kind}:{self.ancestor_id} > {self.descendant_kind}:{self.descendant_id} ({self.depth})"
+
+
+class StaffQuerySet(models.QuerySet):
+    def within_org_node(self, node):
+        """Staff assigned anywhere under ``node`` (a Department, Division, Section or Unit)."""
+        return self.filter(subtree_q(node))
+
+
 class Staff(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     designation = models.ForeignKey(Designation, on_delete=models.SET_NULL, null=True)
@@ -74,6 +112,15 @@ class Staff(models.Model):
     signature = models.ImageField(upload_to="signatures/", blank=True, null=True)
     is_supervisor = models.BooleanField(default=False, help_text="Designates this staff member as a supervisor.")
 
+    # Materialized from designation, groups and head assignments; see sync_role_flags().
+    registry_role = models.BooleanField(default=False, db_index=True, editable=False)
+    hod_role = models.BooleanField(default=False, db_index=True, editable=False)
+    executive_role = models.BooleanField(default=False, db_index=True, editable=False)
+    md_role = models.BooleanField(default=False, db_index=True, editable=False)
+    supervisor_role = models.BooleanField(default=False, db_index=True, editable=False)
+
+    objects = StaffQuerySet.as_manager()
+
     def __str__(self):
         try:
             return self.user.get_full_name() or self.user.username
@@ -83,43 +130,50 @@ class Staff(models.Model):
     def get_active_signature(self):
         return self.signatures.filter(is_active=True).first()
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.sync_role_flags()
+
+    def sync_role_flags(self):
+        """Recompute the materialized role columns and persist them."""
+        self.clear_role_cache()
+        flags = self.roles.flags(is_supervisor=self.is_supervisor)
+        Staff.objects.filter(pk=self.pk).update(**flags)
+        for name, value in flags.items():
+            setattr(self, name, value)
+
+    @property
+    def roles(self):
+        """Designation, groups and headed org units, resolved once per instance."""
+        roles = self.__dict__.get("_roles")
+        if roles is None or roles.is_stale:
+            roles = self.__dict__["_roles"] = StaffRoles.load(self)
+        return roles
+
+    def clear_role_cache(self):
+        self.__dict__.pop("_roles", None)
+
     @property
     def is_registry(self):
-        if self.designation and "registry" in self.designation.name.lower():
-            return True
-        return self.user.groups.filter(name__iexact="Registry").exists()
+        return self.roles.designation_contains("registry") or self.roles.in_group("Registry")
 
     @property
     def is_hod(self):
-        if self.designation and any(
-            role in self.designation.name.lower() for role in ["head of department", "hod", "director"]
-        ):
+        if self.roles.designation_contains(*HOD_DESIGNATION_KEYWORDS):
             return True
-        try:
-            return self.headed_department is not None
-        except Exception:
-            return False
+        return self.roles.headed_department_id is not None
 
     @property
     def is_head_of_unit(self):
-        try:
-            return self.headed_unit is not None
-        except Exception:
-            return False
+        return self.roles.headed_unit_id is not None
 
     @property
     def is_head_of_division(self):
-        try:
-            return self.headed_division is not None
-        except Exception:
-            return False
+        return self.roles.headed_division_id is not None
 
     @property
     def is_head_of_section(self):
-        try:
-            return self.headed_section is not None
-        except Exception:
-            return False
+        return self.roles.headed_section_id is not None
 
     # Keep backwards-compat alias
     @property
@@ -141,11 +195,11 @@ class Staff(models.Model):
 
     @property
     def is_executive(self):
-        return self.user.groups.filter(name__iexact="Executive").exists()
+        return self.roles.in_group("Executive")
 
     @property
     def is_md(self):
-        return self.user.groups.filter(name__iexact="MD").exists()
+        return self.roles.in_group("MD")
 
 
 class StaffSignature(models.Model):
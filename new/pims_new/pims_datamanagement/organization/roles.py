@@ -0,0 +1,123 @@
+"""
+Resolved role set for a Staff member.
+
+The role properties on ``Staff`` used to hit ``user.groups`` and the
+``headed_*`` reverse one-to-ones on every read. ``StaffRoles.load`` fetches
+the designation, group names and headed org units in a single query; the
+result is cached on the Staff instance (see ``Staff.roles``), so a request
+that reuses ``request.user.staff`` resolves roles once.
+
+Group membership and head assignment signals call ``invalidate_roles()``,
+which bumps a process-wide generation so every cached role set is reloaded
+on its next read, including ones held by other Staff instances.
+
+``StaffRoles.flags`` derives the indexed ``*_role`` columns on Staff, which
+let querysets filter by role with a plain boolean predicate instead of a
+designation LIKE and a join on groups.
+"""
+
+HOD_DESIGNATION_KEYWORDS = ("head of department", "hod", "director")
+
+ROLE_LOOKUPS = (
+    "designation__name",
+    "user__groups__name",
+    "headed_department__id",
+    "headed_division__id",
+    "headed_section__id",
+    "headed_unit__id",
+)
+
+_generation = 0
+
+
+def invalidate_roles():
+    global _generation
+    _generation += 1
+
+
+class StaffRoles:
+    __slots__ = (
+        "designation_name",
+        "generation",
+        "groups",
+        "headed_department_id",
+        "headed_division_id",
+        "headed_section_id",
+        "headed_unit_id",
+    )
+
+    def __init__(
+        self,
+        designation_name="",
+        groups=(),
+        headed_department_id=None,
+        headed_division_id=None,
+        headed_section_id=None,
+        headed_unit_id=None,
+    ):
+        self.generation = _generation
+        self.designation_name = (designation_name or "").lower()
+        self.groups = frozenset(name.lower() for name in groups if name)
+        self.headed_department_id = headed_department_id
+        self.headed_division_id = headed_division_id
+        self.headed_section_id = headed_section_id
+        self.headed_unit_id = headed_unit_id
+
+    @classmethod
+    def load(cls, staff):
+        """Resolve roles for ``staff`` with one query (none for unsaved staff)."""
+        if staff.pk is None:
+            return cls()
+
+        from .models import Staff
+
+        return cls.from_rows(Staff.objects.filter(pk=staff.pk).values_list(*ROLE_LOOKUPS))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a role set from ``values_list(*ROLE_LOOKUPS)`` rows for one staff member."""
+        rows = list(rows)
+        if not rows:
+            return cls()
+        designation_name, _, dept_id, div_id, sec_id, unit_id = rows[0]
+        return cls(
+            designation_name=designation_name,
+            groups=[row[1] for row in rows],
+            headed_department_id=dept_id,
+            headed_division_id=div_id,
+            headed_section_id=sec_id,
+            headed_unit_id=unit_id,
+        )
+
+    @property
+    def is_stale(self):
+        return self.generation != _generation
+
+    def in_group(self, name):
+        return name.lower() in self.groups
+
+    def designation_contains(self, *keywords):
+        return any(keyword in self.designation_name for keyword in keywords)
+
+    def flags(self, is_supervisor=False):
+        """Values for the materialized role columns on Staff."""
+        registry = self.designation_contains("registry") or self.in_group("Registry")
+        hod = self.designation_contains(*HOD_DESIGNATION_KEYWORDS) or self.headed_department_id is not None
+        executive = self.in_group("Executive")
+        md = self.in_group("MD")
+        supervisor = (
+            is_supervisor
+            or hod
+            or executive
+            or md
+            or self.headed_unit_id is not None
+            or self.headed_section_id is not None
+            or self.headed_division_id is not None
+        )
+        return {
+            "registry_role": registry,
+            "hod_role": hod,
+            "executive_role": executive,
+            "md_role": md,
+            "supervisor_role": supervisor,
+        }
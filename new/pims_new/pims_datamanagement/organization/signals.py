@@ -1,7 +1,13 @@
+from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
+from .closure import descendant_keys, remove_node, sync_node
+from .roles import invalidate_roles
+from .snapshot import invalidate_snapshot
+
 
 def _get_hod_group():
     group, _ = Group.objects.get_or_create(name="HOD/HOU")
@@ -15,12 +21,27 @@ def _is_still_head(staff):
     return Department.objects.filter(head=staff).exists() or Unit.objects.filter(head=staff).exists()
 
 
+def _refresh_roles(*staff_members):
+    """Re-sync the role columns of the given staff, then invalidate cached role sets."""
+    seen = set()
+    for staff in staff_members:
+        if staff is None or staff.pk in seen:
+            continue
+        seen.add(staff.pk)
+        staff.sync_role_flags()
+    # After the sync, so a snapshot rebuilt under the new version holds the new flags
+    invalidate_roles()
+    invalidate_snapshot()
+    transaction.on_commit(invalidate_roles)
+
+
 def _handle_head_change(old_head, new_head):
     group = _get_hod_group()
     if new_head:
         new_head.user.groups.add(group)
     if old_head and old_head != new_head and not _is_still_head(old_head):
         old_head.user.groups.remove(group)
+    _refresh_roles(old_head, new_head)
 
 
 @receiver(pre_save, sender="organization.Department")
@@ -55,3 +76,119 @@ def unit_head_pre_save(sender, instance, **kwargs):
 def unit_head_post_save(sender, instance, **kwargs):
     old_head = getattr(instance, "_old_head", None)
     _handle_head_change(old_head, instance.head)
+
+
+@receiver(pre_save, sender="organization.Division")
+def division_head_pre_save(sender, instance, **kwargs):
+    if not instance.pk:
+        instance._old_head = None
+        return
+    try:
+        instance._old_head = sender.objects.get(pk=instance.pk).head
+    except sender.DoesNotExist:
+        instance._old_head = None
+
+
+@receiver(post_save, sender="organization.Division")
+def division_head_post_save(sender, instance, **kwargs):
+    _refresh_roles(getattr(instance, "_old_head", None), instance.head)
+
+
+@receiver(pre_save, sender="organization.Section")
+def section_head_pre_save(sender, instance, **kwargs):
+    if not instance.pk:
+        instance._old_head = None
+        return
+    try:
+        instance._old_head = sender.objects.get(pk=instance.pk).head
+    except sender.DoesNotExist:
+        instance._old_head = None
+
+
+@receiver(post_save, sender="organization.Section")
+def section_head_post_save(sender, instance, **kwargs):
+    _refresh_roles(getattr(instance, "_old_head", None), instance.head)
+
+
+@receiver(post_delete, sender="organization.Department")
+@receiver(post_delete, sender="organization.Division")
+@receiver(post_delete, sender="organization.Section")
+@receiver(post_delete, sender="organization.Unit")
+def org_unit_post_delete(sender, instance, **kwargs):
+    if instance.head_id:
+        from .models import Staff
+
+        _refresh_roles(Staff.objects.filter(pk=instance.head_id).first())
+
+
+@receiver(pre_save, sender="organization.Designation")
+def designation_pre_save(sender, instance, **kwargs):
+    if not instance.pk:
+        instance._old_name = None
+        return
+    instance._old_name = sender.objects.filter(pk=instance.pk).values_list("name", flat=True).first()
+
+
+@receiver(post_save, sender="organization.Designation")
+def designation_post_save(sender, instance, created, **kwargs):
+    if created or getattr(instance, "_old_name", None) == instance.name:
+        return
+    _refresh_roles(*instance.staff_set.all())
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep role columns and cached roles in step with group membership."""
+    from .models import Staff
+
+    if reverse:
+        # Changed from the Group side: pk_set holds user ids, except for clear().
+        if action == "pre_clear":
+            instance._cleared_user_ids = list(instance.user_set.values_list("pk", flat=True))
+        elif action in ("post_add", "post_remove", "post_clear"):
+            user_ids = pk_set if action != "post_clear" else getattr(instance, "_cleared_user_ids", [])
+            _refresh_roles(*Staff.objects.filter(user_id__in=user_ids))
+        return
+    if action in ("post_add", "post_remove", "post_clear"):
+        _refresh_roles(getattr(instance, "staff", None))
+
+
+@receiver(post_save, sender="organization.Staff")
+@receiver(post_delete, sender="organization.Staff")
+@receiver(post_save, sender="organization.Department")
+@receiver(post_delete, sender="organization.Department")
+@receiver(post_save, sender="organization.Division")
+@receiver(post_delete, sender="organization.Division")
+@receiver(post_save, sender="organization.Section")
+@receiver(post_delete, sender="organization.Section")
+@receiver(post_save, sender="organization.Unit")
+@receiver(post_delete, sender="organization.Unit")
+@receiver(post_save, sender="organization.Designation")
+@receiver(post_delete, sender="organization.Designation")
+def org_structure_changed(sender, **kwargs):
+    invalidate_snapshot()
+
+
+@receiver(post_save, sender="organization.Department")
+@receiver(post_save, sender="organization.Division")
+@receiver(post_save, sender="organization.Section")
+@receiver(post_save, sender="organization.Unit")
+def org_node_saved(sender, instance, **kwargs):
+    sync_node(instance)
+
+
+@receiver(pre_delete, sender="organization.Department")
+@receiver(pre_delete, sender="organization.Division")
+@receiver(pre_delete, sender="organization.Section")
+@receiver(pre_delete, sender="organization.Unit")
+def org_node_pre_delete(sender, instance, **kwargs):
+    instance._closure_descendants = descendant_keys(instance)
+
+
+@receiver(post_delete, sender="organization.Department")
+@receiver(post_delete, sender="organization.Division")
+@receiver(post_delete, sender="organization.Section")
+@receiver(post_delete, sender="organization.Unit")
+def org_node_deleted(sender, instance, **kwargs):
+    # Units under a deleted division or section survive with the FK nulled
+    remove_node(instance, getattr(instance, "_closure_descendants", ()))
@@ -0,0 +1,183 @@
+"""
+Process-wide snapshot of the org structure.
+
+Departments, divisions, sections, units, their heads and designations are
+read on nearly every page (filter dropdowns, recipient routing, chain
+template resolution) but change a few times a month. ``OrgSnapshot.load``
+reads all of it in a fixed number of queries into plain dicts and tuples.
+
+Each process keeps the last snapshot it loaded together with the version it
+was loaded under. The version itself lives in the cache, so
+``invalidate_snapshot`` (called by the organization signals and the org
+CRUD views) bumps it once and every process reloads on its next read.
+"""
+
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+SNAPSHOT_VERSION_KEY = "organization:snapshot:version"
+
+
+class OrgNode(namedtuple("OrgNode", "pk name department_id head_id")):
+    """A department, division, section or unit; usable wherever templates expect the model."""
+
+    __slots__ = ()
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return self.name
+
+
+class DesignationNode(namedtuple("DesignationNode", "pk name level")):
+    __slots__ = ()
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return self.name
+
+
+class OrgSnapshot:
+    def __init__(
+        self,
+        departments=(),
+        divisions=(),
+        sections=(),
+        units=(),
+        designations=(),
+        flagged_supervisors=(),
+        effective_supervisors=(),
+        registry_staff=(),
+    ):
+        # Node tuples are sorted by name (designations by level), ready for dropdowns
+        self.departments = tuple(departments)
+        self.divisions = tuple(divisions)
+        self.sections = tuple(sections)
+        self.units = tuple(units)
+        self.designations = tuple(designations)
+
+        # org unit id -> head staff id
+        self.department_heads = _heads(self.departments)
+        self.division_heads = _heads(self.divisions)
+        self.section_heads = _heads(self.sections)
+        self.unit_heads = _heads(self.units)
+
+        # unit id -> department id, department id -> unit ids (in pk order)
+        self.unit_department = {u.pk: u.department_id for u in self.units}
+        department_units = {}
+        for unit in sorted(self.units, key=lambda u: u.pk):
+            department_units.setdefault(unit.department_id, []).append(unit.pk)
+        self.department_units = {dept_id: tuple(pks) for dept_id, pks in department_units.items()}
+
+        # staff ids with Staff.is_supervisor / supervisor_role / registry_role set
+        self.flagged_supervisors = frozenset(flagged_supervisors)
+        self.effective_supervisors = frozenset(effective_supervisors)
+        self.registry_staff = frozenset(registry_staff)
+
+    @classmethod
+    def load(cls):
+        from .models import Department, Designation, Division, Section, Staff, Unit
+
+        def nodes(model):
+            rows = model.objects.order_by("name", "pk").values_list("pk", "name", "department_id", "head_id")
+            return [OrgNode(*row) for row in rows]
+
+        flagged, effective, registry = set(), set(), set()
+        rows = Staff.objects.filter(Q(is_supervisor=True) | Q(supervisor_role=True) | Q(registry_role=True))
+        for pk, is_supervisor, supervisor_role, registry_role in rows.values_list(
+            "pk", "is_supervisor", "supervisor_role", "registry_role"
+        ):
+            if is_supervisor:
+                flagged.add(pk)
+            if supervisor_role:
+                effective.add(pk)
+            if registry_role:
+                registry.add(pk)
+
+        return cls(
+            departments=[
+                OrgNode(pk, name, None, head_id)
+                for pk, name, head_id in Department.objects.order_by("name", "pk").values_list("pk", "name", "head_id")
+            ],
+            divisions=nodes(Division),
+            sections=nodes(Section),
+            units=nodes(Unit),
+            designations=[
+                DesignationNode(*row)
+                for row in Designation.objects.order_by("level", "pk").values_list("pk", "name", "level")
+            ],
+            flagged_supervisors=flagged,
+            effective_supervisors=effective,
+            registry_staff=registry,
+        )
+
+    @property
+    def department_and_unit_head_ids(self):
+        return set(self.department_heads.values()) | set(self.unit_heads.values())
+
+    @property
+    def all_head_ids(self):
+        return self.department_and_unit_head_ids | set(self.section_heads.values()) | set(self.division_heads.values())
+
+    def units_in(self, department_id):
+        """Units of a department, sorted by name."""
+        return tuple(u for u in self.units if u.department_id == department_id)
+
+    def first_unit_head_in(self, department_id):
+        """Head of the lowest-pk unit in the department that has one."""
+        for unit_id in self.department_units.get(department_id, ()):
+            head_id = self.unit_heads.get(unit_id)
+            if head_id:
+                return head_id
+        return None
+
+
+def _heads(nodes):
+    return {node.pk: node.head_id for node in nodes if node.head_id}
+
+
+# (version, snapshot) last loaded by this process
+_process_snapshot = None
+
+
+def _current_version():
+    version = cache.get(SNAPSHOT_VERSION_KEY)
+    if version is None:
+        # Seed with the clock rather than 1 so an evicted counter never repeats an old version
+        cache.add(SNAPSHOT_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(SNAPSHOT_VERSION_KEY)
+    return version
+
+
+def get_snapshot():
+    """Return the org snapshot, reloading only if another change bumped the version."""
+    global _process_snapshot
+    version = _current_version()
+    memo = _process_snapshot
+    if version is not None and memo is not None and memo[0] == version:
+        return memo[1]
+    snapshot = OrgSnapshot.load()
+    _process_snapshot = (version, snapshot)
+    return snapshot
+
+
+def _bump_version():
+    try:
+        cache.incr(SNAPSHOT_VERSION_KEY)
+    except ValueError:
+        cache.add(SNAPSHOT_VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate_snapshot():
+    """Bump the snapshot version now and again once the current transaction commits."""
+    _bump_version()
+    transaction.on_commit(_bump_version)
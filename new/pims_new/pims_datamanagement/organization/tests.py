@@ -1 +1,265 @@
-# Create your tests here.
+"""
+Tests for Staff role resolution.
+
+Covers:
+1. All role properties resolve from a single query
+2. Group membership changes invalidate the cached roles
+3. Head assignment changes invalidate the cached roles
+4. Materialized role columns follow designation, group and head changes
+5. The org snapshot is loaded once per version and reloads after changes
+6. The org closure table follows creates, moves and deletes
+"""
+
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from user_management.models import CustomUser
+
+from organization.closure import rebuild_closure
+from organization.models import Department, Designation, Division, OrgClosure, Section, Staff, Unit
+from organization.snapshot import get_snapshot, invalidate_snapshot
+
+
+def make_user(username, group_name=None, is_superuser=False):
+    u = CustomUser.objects.create_user(username=username, password="Test1234!")
+    u.is_superuser = is_superuser
+    u.save()
+    if group_name:
+        g, _ = Group.objects.get_or_create(name=group_name)
+        u.groups.add(g)
+    return u
+
+
+def make_staff(user, designation_name="Officer", dept=None):
+    desig, _ = Designation.objects.get_or_create(name=designation_name, defaults={"level": 5})
+    return Staff.objects.create(user=user, designation=desig, department=dept)
+
+
+class StaffRoleCacheTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="IT Dept", code="IT")
+        self.user = make_user("officer", "Executive")
+        self.staff = make_staff(self.user, dept=self.dept)
+
+    def _fresh_staff(self):
+        return Staff.objects.select_related("user").get(pk=self.staff.pk)
+
+    def test_roles_resolved_in_one_query(self):
+        staff = self._fresh_staff()
+        with self.assertNumQueries(1):
+            self.assertTrue(staff.is_executive)
+            self.assertFalse(staff.is_md)
+            self.assertFalse(staff.is_registry)
+            self.assertFalse(staff.is_hod)
+            self.assertFalse(staff.is_unit_manager)
+            self.assertTrue(staff.is_effective_supervisor)
+
+    def test_headed_units_resolved(self):
+        section = Section.objects.create(name="Ops", department=self.dept)
+        Unit.objects.create(name="Helpdesk", department=self.dept, head=self.staff)
+        section.head = self.staff
+        section.save()
+        staff = self._fresh_staff()
+        self.assertTrue(staff.is_head_of_unit)
+        self.assertTrue(staff.is_head_of_section)
+        self.assertFalse(staff.is_head_of_division)
+        self.assertFalse(staff.is_hod)
+
+    def test_designation_roles(self):
+        registry = make_staff(make_user("reg"), "Registry Officer", self.dept)
+        director = make_staff(make_user("dir"), "Director of Finance", self.dept)
+        self.assertTrue(Staff.objects.get(pk=registry.pk).is_registry)
+        self.assertTrue(Staff.objects.get(pk=director.pk).is_hod)
+
+    def test_group_change_invalidates_cache(self):
+        self.assertFalse(self.user.staff.is_md)
+        self.user.groups.add(Group.objects.get_or_create(name="MD")[0])
+        self.assertTrue(self.user.staff.is_md)
+        self.user.groups.clear()
+        self.assertFalse(self.user.staff.is_executive)
+
+    def test_head_change_invalidates_cache(self):
+        other = make_staff(make_user("other"), dept=self.dept)
+        self.assertFalse(self.staff.is_hod)
+        self.dept.head = self.staff
+        self.dept.save()
+        self.assertTrue(self.staff.is_hod)
+
+        self.dept.head = other
+        self.dept.save()
+        self.assertTrue(other.is_hod)
+        self.assertFalse(self.staff.is_hod)
+
+
+class StaffRoleFlagsTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="IT Dept", code="IT")
+        self.user = make_user("officer")
+        self.staff = make_staff(self.user, dept=self.dept)
+
+    def _flags(self, staff):
+        return Staff.objects.values("registry_role", "hod_role", "executive_role", "md_role", "supervisor_role").get(
+            pk=staff.pk
+        )
+
+    def test_flags_set_on_create(self):
+        registry = make_staff(make_user("reg", "Registry"), dept=self.dept)
+        self.assertTrue(self._flags(registry)["registry_role"])
+        self.assertFalse(self._flags(self.staff)["registry_role"])
+
+    def test_group_changes_from_either_side(self):
+        executive, _ = Group.objects.get_or_create(name="Executive")
+        self.user.groups.add(executive)
+        flags = self._flags(self.staff)
+        self.assertTrue(flags["executive_role"])
+        self.assertTrue(flags["supervisor_role"])
+
+        executive.user_set.remove(self.user)
+        self.assertFalse(self._flags(self.staff)["executive_role"])
+
+        executive.user_set.add(self.user)
+        executive.user_set.clear()
+        self.assertFalse(self._flags(self.staff)["executive_role"])
+
+    def test_designation_rename(self):
+        designation = self.staff.designation
+        designation.name = "Registry Clerk"
+        designation.save()
+        self.assertTrue(self._flags(self.staff)["registry_role"])
+        self.assertTrue(Staff.objects.filter(registry_role=True, pk=self.staff.pk).exists())
+
+    def test_head_assignment_and_removal(self):
+        self.dept.head = self.staff
+        self.dept.save()
+        self.assertTrue(self._flags(self.staff)["hod_role"])
+
+        self.dept.head = None
+        self.dept.save()
+        self.assertFalse(self._flags(self.staff)["hod_role"])
+
+        unit = Unit.objects.create(name="Helpdesk", department=self.dept, head=self.staff)
+        self.assertTrue(self._flags(self.staff)["supervisor_role"])
+        unit.delete()
+        self.assertFalse(self._flags(self.staff)["supervisor_role"])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class OrgSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dept = Department.objects.create(name="IT Dept", code="IT")
+        self.head = make_staff(make_user("head"), dept=self.dept)
+        self.unit = Unit.objects.create(name="Helpdesk", department=self.dept, head=self.head)
+        Unit.objects.create(name="Audit", department=self.dept)
+
+    def test_lookups(self):
+        snapshot = get_snapshot()
+        self.assertEqual(snapshot.unit_heads, {self.unit.pk: self.head.pk})
+        self.assertEqual(snapshot.unit_department[self.unit.pk], self.dept.pk)
+        self.assertEqual([u.name for u in snapshot.units_in(self.dept.pk)], ["Audit", "Helpdesk"])
+        self.assertEqual(snapshot.first_unit_head_in(self.dept.pk), self.head.pk)
+        self.assertEqual(snapshot.departments[0].id, self.dept.pk)
+
+    def test_loaded_once_per_version(self):
+        get_snapshot()
+        with self.assertNumQueries(0):
+            snapshot = get_snapshot()
+        self.assertIs(get_snapshot(), snapshot)
+        invalidate_snapshot()
+        self.assertIsNot(get_snapshot(), snapshot)
+
+    def test_signals_bump_version(self):
+        get_snapshot()
+        self.dept.head = self.head
+        self.dept.save()
+        self.assertEqual(get_snapshot().department_heads, {self.dept.pk: self.head.pk})
+        Designation.objects.create(name="Auditor", level=3)
+        self.assertIn("Auditor", [d.name for d in get_snapshot().designations])
+
+    def test_role_change_synced_before_version_bump(self):
+        get_snapshot()
+        rebuilt = []
+
+        def invalidate_and_rebuild():
+            invalidate_snapshot()
+            # Another request rebuilding the snapshot right after the bump
+            rebuilt.append(get_snapshot())
+
+        with mock.patch("organization.signals.invalidate_snapshot", invalidate_and_rebuild):
+            self.head.user.groups.add(Group.objects.get_or_create(name="Registry")[0])
+        self.assertIn(self.head.pk, rebuilt[-1].registry_staff)
+        self.assertIn(self.head.pk, get_snapshot().registry_staff)
+
+    def test_crud_view_refreshes_snapshot(self):
+        get_snapshot()
+        client = Client()
+        client.force_login(make_user("admin", is_superuser=True))
+        client.post(
+            reverse("organization:unit_edit", kwargs={"pk": self.unit.pk}),
+            {"name": "Service Desk", "department": self.dept.pk, "head": ""},
+        )
+        snapshot = get_snapshot()
+        self.assertIn("Service Desk", [u.name for u in snapshot.units])
+        self.assertEqual(snapshot.unit_heads, {})
+
+
+class OrgClosureTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="IT Dept", code="IT")
+        self.other_dept = Department.objects.create(name="Finance", code="FIN")
+        self.division = Division.objects.create(name="Infrastructure", department=self.dept)
+        self.section = Section.objects.create(name="Networks", department=self.dept)
+        self.unit = Unit.objects.create(name="Helpdesk", department=self.dept, division=self.division)
+
+    def _ancestors(self, kind, pk):
+        return dict(
+            OrgClosure.objects.filter(descendant_kind=kind, descendant_id=pk).values_list("ancestor_kind", "depth")
+        )
+
+    def test_rows_on_create(self):
+        self.assertEqual(self._ancestors("unit", self.unit.pk), {"unit": 0, "division": 1, "department": 2})
+        self.assertEqual(self._ancestors("section", self.section.pk), {"section": 0, "department": 1})
+
+    def test_moving_a_node_moves_its_subtree(self):
+        self.division.department = self.other_dept
+        self.division.save()
+        self.unit.department = self.other_dept
+        self.unit.save()
+        self.assertTrue(
+            OrgClosure.objects.filter(
+                ancestor_kind="department", ancestor_id=self.other_dept.pk, descendant_kind="unit"
+            ).exists()
+        )
+        self.assertFalse(
+            OrgClosure.objects.filter(
+                ancestor_kind="department", ancestor_id=self.dept.pk, descendant_kind="unit"
+            ).exists()
+        )
+
+    def test_delete_reattaches_children(self):
+        self.division.delete()
+        self.assertEqual(self._ancestors("unit", self.unit.pk), {"unit": 0, "department": 1})
+        self.dept.delete()
+        self.assertFalse(OrgClosure.objects.filter(ancestor_id=self.dept.pk, ancestor_kind="department").exists())
+
+    def test_rebuild_matches_incremental(self):
+        Unit.objects.create(name="Cabling", department=self.dept, section=self.section, division=self.division)
+        incremental = set(
+            OrgClosure.objects.values_list("ancestor_kind", "ancestor_id", "descendant_kind", "descendant_id", "depth")
+        )
+        rebuild_closure()
+        rebuilt = set(
+            OrgClosure.objects.values_list("ancestor_kind", "ancestor_id", "descendant_kind", "descendant_id", "depth")
+        )
+        self.assertEqual(incremental, rebuilt)
+
+    def test_staff_within_org_node(self):
+        in_unit = Staff.objects.create(user=make_user("a"), department=self.dept, unit=self.unit)
+        in_division = Staff.objects.create(user=make_user("b"), department=self.dept, division=self.division)
+        elsewhere = Staff.objects.create(user=make_user("c"), department=self.other_dept)
+        division_staff = set(Staff.objects.within_org_node(self.division))
+        self.assertEqual(division_staff, {in_unit, in_division})
+        self.assertNotIn(elsewhere, Staff.objects.within_org_node(self.dept))
@@ -9,6 +9,7 @@ from django.views.generic import CreateView, DeleteView, DetailView, ListView, U
 
 from .forms import DepartmentForm, DesignationForm, DivisionForm, SectionForm, UnitForm
 from .models import Department, Designation, Division, Section, Unit
+from .snapshot import get_snapshot, invalidate_snapshot
 
 
 class SuperuserRequiredMixin(UserPassesTestMixin):
@@ -26,6 +27,15 @@ class RegistryOrSuperuserRequiredMixin(UserPassesTestMixin):
         return hasattr(user, "staff") and user.staff.is_registry
 
 
+class OrgSnapshotMixin:
+    """Bump the org snapshot version after a successful create, update or delete."""
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        invalidate_snapshot()
+        return response
+
+
 class DepartmentListView(LoginRequiredMixin, SuperuserRequiredMixin, ListView):
     model = Department
     context_object_name = "departments"
@@ -67,17 +77,15 @@ class UnitListView(LoginRequiredMixin, SuperuserRequiredMixin, ListView):
 
 @staff_member_required
 def units_by_department(request):
-    department_id = request.GET.get("department_id")
-    units = (
-        Unit.objects.filter(department_id=department_id).order_by("name").values("id", "name") if department_id else []
-    )
-    return JsonResponse(list(units), safe=False)
+    department_id = request.GET.get("department_id", "")
+    units = get_snapshot().units_in(int(department_id)) if department_id.isdigit() else ()
+    return JsonResponse([{"id": unit.pk, "name": unit.name} for unit in units], safe=False)
 
 
 # ── Department CRUD ──────────────────────────────────────────────────────────
 
 
-class DepartmentCreateView(LoginRequiredMixin, SuperuserRequiredMixin, CreateView):
+class DepartmentCreateView(LoginRequiredMixin, SuperuserRequiredMixin, OrgSnapshotMixin, CreateView):
     model = Department
     form_class = DepartmentForm
     template_name = "organization/department_form.html"
@@ -88,7 +96,7 @@ class DepartmentCreateView(LoginRequiredMixin, SuperuserRequiredMixin, CreateVie
         return super().form_valid(form)
 
 
-class DepartmentUpdateView(LoginRequiredMixin, SuperuserRequiredMixin, UpdateView):
+class DepartmentUpdateView(LoginRequiredMixin, SuperuserRequiredMixin, OrgSnapshotMixin, UpdateView):
     model = Department
     form_class = DepartmentForm
     template_name = "organization/department_form.html"
@@ -99,7 +107,7 @@ class DepartmentUpdateView(LoginRequiredMixin, SuperuserRequiredMixin, UpdateVie
         return super().form_valid(form)
 
 
-class DepartmentDeleteView(LoginRequiredMixin, SuperuserRequiredMixin, DeleteView):
+class DepartmentDeleteView(LoginRequiredMixin, SuperuserRequiredMixin, OrgSnapshotMixin, DeleteView):
     model = Department
     template_name = "organization/department_confirm_delete.html"
     success_url = reverse_lazy("organization:department_list")
@@ -112,7 +120,7 @@ class DepartmentDeleteView(LoginRequiredMixin, SuperuserRequiredMixin, DeleteVie
 # ── Unit CRUD ────────────────────────────────────────────────────────────────
 
 
-class UnitCreateView(LoginRequiredMixin, SuperuserRequiredMixin, CreateView):
+class UnitCreateView(LoginRequiredMixin, SuperuserRequiredMixin, OrgSnapshotMixin, CreateView):
     model = Unit
     form_class = UnitForm
     template_name = "organization/unit_form.html"
@@ -123,7 +131,7 @@ class UnitCreateView(LoginRequiredMixin, SuperuserRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class UnitUpdateView(LoginRequiredMixin, SuperuserRequiredMixin, UpdateView):
+class UnitUpdateView(LoginRequiredMixin, SuperuserRequiredMixin, OrgSnapshotMixin, UpdateView):
     model = Unit
     form_class = UnitForm
     template_name = "organization/unit_form.html"
@@ -134,7 +142,7 @@ class UnitUpdateView(LoginRequiredMixin, SuperuserRequiredMixin, UpdateView):
         return super().form_valid(form)
 
 
-class UnitDeleteView(LoginRequiredMixin, SuperuserRequiredMixin, DeleteView):
+class UnitDeleteView(LoginRequiredMixin, SuperuserRequiredMixin, OrgSnapshotMixin, DeleteView):
     model = Unit
     template_name = "organization/unit_confirm_delete.html"
     success_url = reverse_lazy("organization:unit_list")
@@ -154,7 +162,7 @@ class DesignationListView(LoginRequiredMixin, SuperuserRequiredMixin, ListView):
     ordering = ["level"]
 
 
-class DesignationCreateView(LoginRequiredMixin, SuperuserRequiredMixin, CreateView):
+class DesignationCreateView(LoginRequiredMixin, SuperuserRequiredMixin, OrgSnapshotMixin, CreateView):
     model = Designation
     form_class = DesignationForm
     template_name = "organization/designation_form.html"
@@ -165,7 +173,7 @@ class DesignationCreateView(LoginRequiredMixin, SuperuserRequiredMixin, CreateVi
         return super().form_valid(form)
 
 
-class DesignationUpdateView(LoginRequiredMixin, SuperuserRequiredMixin, UpdateView):
+class DesignationUpdateView(LoginRequiredMixin, SuperuserRequiredMixin, OrgSnapshotMixin, UpdateView):
     model = Designation
     form_class = DesignationForm
     template_name = "organization/designation_form.html"
@@ -176,7 +184,7 @@ class DesignationUpdateView(LoginRequiredMixin, SuperuserRequiredMixin, UpdateVi
         return super().form_valid(form)
 
 
-class DesignationDeleteView(LoginRequiredMixin, SuperuserRequiredMixin, DeleteView):
+class DesignationDeleteView(LoginRequiredMixin, SuperuserRequiredMixin, OrgSnapshotMixin, DeleteView):
     model = Designation
     template_name = "organization/designation_confirm_delete.html"
     success_url = reverse_lazy("organization:designation_list")
@@ -196,7 +204,7 @@ class DivisionListView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, Lis
     ordering = ["department__name", "name"]
 
 
-class DivisionCreateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, CreateView):
+class DivisionCreateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, OrgSnapshotMixin, CreateView):
     model = Division
     form_class = DivisionForm
     template_name = "organization/division_form.html"
@@ -207,7 +215,7 @@ class DivisionCreateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, C
         return super().form_valid(form)
 
 
-class DivisionUpdateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, UpdateView):
+class DivisionUpdateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, OrgSnapshotMixin, UpdateView):
     model = Division
     form_class = DivisionForm
     template_name = "organization/division_form.html"
@@ -218,7 +226,7 @@ class DivisionUpdateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, U
         return super().form_valid(form)
 
 
-class DivisionDeleteView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, DeleteView):
+class DivisionDeleteView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, OrgSnapshotMixin, DeleteView):
     model = Division
     template_name = "organization/division_confirm_delete.html"
     success_url = reverse_lazy("organization:division_list")
@@ -238,7 +246,7 @@ class SectionListView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, List
     ordering = ["department__name", "name"]
 
 
-class SectionCreateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, CreateView):
+class SectionCreateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, OrgSnapshotMixin, CreateView):
     model = Section
     form_class = SectionForm
     template_name = "organization/section_form.html"
@@ -249,7 +257,7 @@ class SectionCreateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, Cr
         return super().form_valid(form)
 
 
-class SectionUpdateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, UpdateView):
+class SectionUpdateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, OrgSnapshotMixin, UpdateView):
     model = Section
     form_class = SectionForm
     template_name = "organization/section_form.html"
@@ -260,7 +268,7 @@ class SectionUpdateView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, Up
         return super().form_valid(form)
 
 
-class SectionDeleteView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, DeleteView):
+class SectionDeleteView(LoginRequiredMixin, RegistryOrSuperuserRequiredMixin, OrgSnapshotMixin, DeleteView):
     model = Section
     template_name = "organization/section_confirm_delete.html"
     success_url = reverse_lazy("organization:section_list")
@@ -69,6 +69,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "audit_log.middleware.AuditBufferMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -103,6 +104,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "pims_datamanagement.wsgi.application"
 
+# Empties the caches before each test (see core.test_runner)
+TEST_RUNNER = "core.test_runner.PimsTestRunner"
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -123,6 +127,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Set CACHE_URL (e.g. redis://localhost:6379/1) so cached permission data is shared by all workers.
+
+CACHE_URL = os.environ.get("CACHE_URL", "")
+
+if CACHE_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}}
+else:
+    # Per-process only: fine for development, but other workers never see invalidations (check core.W001).
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -241,6 +258,26 @@ LOGOUT_REDIRECT_URL = "user_management:login"
 ENABLE_DOCUMENT_WATERMARKING = True
 DOCUMENT_WATERMARK_TEXT = "PIMS Confidential - Do Not Copy"
 
+# Registry desk: how files returned to the registry are spread across officers
+# ("least_loaded" or "round_robin"; see document_management.registry_desk)
+REGISTRY_DESK_STRATEGY = os.environ.get("REGISTRY_DESK_STRATEGY", "least_loaded")
+
+# Executive dashboard snapshots (refreshed by the refresh-dashboard-snapshots beat job).
+# Dashboards fall back to live counters when the newest snapshot is older than MAX_AGE seconds.
+DASHBOARD_SNAPSHOT_MAX_AGE = 900
+DASHBOARD_SNAPSHOT_RETENTION_HOURS = 24
+
+# Audit log entries that cannot be written to the database are appended here (see audit_log.writer).
+AUDIT_LOG_SPOOL_PATH = os.environ.get("AUDIT_LOG_SPOOL_PATH", str(BASE_DIR / "audit_spool.jsonl"))
+
+# Whole months of audit log entries older than this are moved to compressed files in
+# AUDIT_LOG_ARCHIVE_DIR (see audit_log.archive); the audit log list and exports still read them.
+AUDIT_LOG_ARCHIVE_AFTER_DAYS = int(os.environ.get("AUDIT_LOG_ARCHIVE_AFTER_DAYS", 365))
+AUDIT_LOG_ARCHIVE_DIR = os.environ.get("AUDIT_LOG_ARCHIVE_DIR", str(BASE_DIR / "audit_archive"))
+
+# Approval steps waiting longer than this are escalated to the approver's head.
+APPROVAL_STEP_SLA_HOURS = 48
+
 # Password Expiry Settings
 PASSWORD_EXPIRY_WARNING_DAYS = 7  # Warn users 7 days before password expires
 
@@ -281,6 +318,18 @@ CELERY_BEAT_SCHEDULE = {
         "task": "document_management.tasks.send_urgent_document_reminders",
         "schedule": 3600,  # every 1 hour
     },
+    "refresh-dashboard-snapshots": {
+        "task": "document_management.tasks.refresh_dashboard_snapshots",
+        "schedule": 300,  # every 5 minutes
+    },
+    "escalate-overdue-approval-steps": {
+        "task": "document_management.tasks.escalate_overdue_approval_steps",
+        "schedule": 3600,  # every 1 hour
+    },
+    "maintain-audit-log": {
+        "task": "audit_log.tasks.maintain_audit_log",
+        "schedule": 86400,  # every day
+    },
 }
 # Summernote Configuration
 SUMMERNOTE_CONFIG = {
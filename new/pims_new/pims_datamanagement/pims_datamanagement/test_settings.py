@@ -0,0 +1,20 @@
+"""
+Settings for running the test suite.
+
+    python manage.py test --settings=pims_datamanagement.test_settings
+"""
+
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+
+from .settings import *  # noqa: F403
+
+# Tests run in one process, so the per-process cache is enough; PimsTestRunner empties it before each test.
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "pims-tests"}}
+SILENCED_SYSTEM_CHECKS = ["core.W001"]
+
+# Uploads made by the tests go to a throwaway directory, not the project's attachments/
+MEDIA_ROOT = Path(tempfile.mkdtemp(prefix="pims-test-media-"))
+atexit.register(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
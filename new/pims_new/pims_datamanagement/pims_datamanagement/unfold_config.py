@@ -3,26 +3,28 @@ def environment_callback(request):
 
 
 def dashboard_callback(request, context):
+    from core.utils.dates import day_range
     from django.utils import timezone
-    from document_management.models import Document, File
+    from document_management.models import Document, FileCounter
     from organization.models import Department, Staff
 
-    today = timezone.now().date()
+    since, until = day_range(timezone.localdate())
+    file_counts = FileCounter.objects.by_status()
     context.update(
         {
             "kpis": [
-                {"title": "Total Files", "value": File.objects.count(), "icon": "folder"},
-                {"title": "Active Files", "value": File.objects.filter(status="active").count(), "icon": "folder_open"},
+                {"title": "Total Files", "value": sum(file_counts.values()), "icon": "folder"},
+                {"title": "Active Files", "value": file_counts["active"], "icon": "folder_open"},
                 {
                     "title": "Pending Activation",
-                    "value": File.objects.filter(status="pending_activation").count(),
+                    "value": file_counts["pending_activation"],
                     "icon": "pending",
                 },
                 {"title": "Total Staff", "value": Staff.objects.count(), "icon": "badge"},
                 {"title": "Departments", "value": Department.objects.count(), "icon": "account_tree"},
                 {
                     "title": "Documents Today",
-                    "value": Document.objects.filter(uploaded_at__date=today).count(),
+                    "value": Document.objects.filter(uploaded_at__gte=since, uploaded_at__lt=until).count(),
                     "icon": "description",
                 },
             ],
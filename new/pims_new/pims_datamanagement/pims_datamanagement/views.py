@@ -1,8 +1,8 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect
-from django.utils import timezone
 from django.views.generic import TemplateView
 from document_management.models import ApprovalStep, Document, File
+from document_management.stats import StatsService
 from organization.models import Staff
 
 
@@ -26,8 +26,6 @@ class HomeView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
-        now = timezone.now()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
         try:
             staff = user.staff
@@ -43,15 +41,21 @@ class HomeView(LoginRequiredMixin, TemplateView):
             File.objects.filter(current_location=staff).exclude(owner=staff) if staff else File.objects.none()
         )
 
-        context["total_files"] = owned_files.count()
-        context["active_files"] = owned_files.filter(status="active").count()
-        context["pending_files"] = owned_files.filter(status="pending_activation").count()
-        context["files_in_custody"] = custody_files.count()
+        if staff:
+            stats = StatsService(owned_files)
+            counts = stats.holder_counts(staff)
+            documents_this_month = stats.document_counts(Document.objects.filter(file__owner=staff))["added_this_month"]
+        else:
+            counts = {}
+            documents_this_month = 0
+
+        context["total_files"] = counts.get("owned", 0)
+        context["active_files"] = counts.get("owned_active", 0)
+        context["pending_files"] = counts.get("owned_pending_activation", 0)
+        context["files_in_custody"] = counts.get("in_custody", 0)
 
         # Documents this month
-        context["documents_this_month"] = (
-            Document.objects.filter(file__owner=staff, uploaded_at__gte=start_of_month).count() if staff else 0
-        )
+        context["documents_this_month"] = documents_this_month
 
         # Pending approval steps for this user
         context["pending_approvals"] = (
@@ -27,20 +27,14 @@ from django.utils import timezone  # Add this import
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.generic import CreateView, DetailView, ListView, TemplateView  # Added TemplateView
-from document_management.models import (  # Import for admin health dashboard
-    Document,
-    File,
-)
+from document_management.models import Document, FileCounter  # Import for admin health dashboard
+from document_management.stats import StatsService
 from notifications.utils import (  # Import notification utilities
     create_notification,
     notify_admins_of_critical_event,
 )
-from organization.models import (
-    Department,  # Added Designation for filtering
-    Designation,
-    Staff,
-    Unit,
-)
+from organization.models import Staff
+from organization.snapshot import get_snapshot
 
 from .forms import SignatureUploadForm, UserCreateForm, UserUpdateForm
 from .models import CustomUser, PasswordHistory  # Import PasswordHistory
@@ -249,9 +243,10 @@ class UserListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
         }
 
         # Filter context
-        context["all_departments"] = Department.objects.all().order_by("name")
-        context["all_units"] = Unit.objects.all().order_by("name")
-        context["all_designations"] = Designation.objects.all().order_by("level")
+        snapshot = get_snapshot()
+        context["all_departments"] = snapshot.departments
+        context["all_units"] = snapshot.units
+        context["all_designations"] = snapshot.designations
         context["selected_department"] = (
             int(self.request.GET.get("department")) if self.request.GET.get("department", "").isdigit() else ""
         )
@@ -461,28 +456,11 @@ class AdminDashboardHealthView(LoginRequiredMixin, UserPassesTestMixin, ListView
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # User Statistics
-        total_users = CustomUser.objects.count()
-        active_users = CustomUser.objects.filter(is_active=True).count()
-        inactive_users = CustomUser.objects.filter(is_active=False).count()
-        locked_users = CustomUser.objects.filter(lockout_until__gt=timezone.now()).count()
-        must_change_password_users = CustomUser.objects.filter(must_change_password=True).count()
-
-        # Organization Statistics
-        total_departments = Department.objects.count()
-        total_units = Unit.objects.count()
-
-        # File Statistics
-        total_files = File.objects.count()
-        inactive_files = File.objects.filter(status="inactive").count()
-        pending_activation_files = File.objects.filter(status="pending_activation").count()
-        active_files = File.objects.filter(status="active").count()
-        in_transit_files = File.objects.filter(status="in_transit").count()
-        closed_files = File.objects.filter(status="closed").count()
-        archived_files = File.objects.filter(status="archived").count()
-
-        # Document Statistics
-        total_documents = Document.objects.count()
+        # One aggregate query per table; org counts come from the cached snapshot
+        stats = StatsService()
+        user_counts = stats.user_counts()
+        file_counts = FileCounter.objects.by_status()
+        snapshot = get_snapshot()
 
         # Recent Audit Log Entries
         recent_failed_logins = (
@@ -496,39 +474,34 @@ class AdminDashboardHealthView(LoginRequiredMixin, UserPassesTestMixin, ListView
         recent_unlocked_accounts = AuditLogEntry.objects.filter(action="ACCOUNT_UNLOCKED").order_by("-timestamp")[:5]
 
         # Asset Breakdown for UI
+        total_files = sum(file_counts.values())
         file_status_breakdown = [
-            {"label": "Inactive", "count": inactive_files, "color": "slate"},
+            {"label": "Inactive", "count": file_counts["inactive"], "color": "slate"},
             {
                 "label": "Pending Activation",
-                "count": pending_activation_files,
+                "count": file_counts["pending_activation"],
                 "color": "amber",
             },
-            {"label": "Active", "count": active_files, "color": "green"},
-            {"label": "In Transit", "count": in_transit_files, "color": "blue"},
-            {"label": "Closed", "count": closed_files, "color": "orange"},
-            {"label": "Archived", "count": archived_files, "color": "purple"},
+            {"label": "Active", "count": file_counts["active"], "color": "green"},
+            {"label": "In Transit", "count": file_counts["in_transit"], "color": "blue"},
+            {"label": "Closed", "count": file_counts["closed"], "color": "orange"},
+            {"label": "Archived", "count": file_counts["archived"], "color": "purple"},
         ]
         for item in file_status_breakdown:
             item["percentage"] = (item["count"] / total_files * 100) if total_files > 0 else 0
 
         context["stats"] = {
-            "users": {
-                "total": total_users,
-                "active": active_users,
-                "inactive": inactive_users,
-                "locked": locked_users,
-                "must_change_password": must_change_password_users,
-            },
+            "users": user_counts,
             "org": {
-                "departments": total_departments,
-                "units": total_units,
+                "departments": len(snapshot.departments),
+                "units": len(snapshot.units),
             },
             "files": {
                 "total": total_files,
                 "breakdown": file_status_breakdown,
             },
             "documents": {
-                "total": total_documents,
+                "total": stats.document_counts(Document.objects.all())["total"],
             },
             "recent_failed_logins": recent_failed_logins,
             "recent_locked_accounts": recent_locked_accounts,